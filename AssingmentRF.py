@@ -1,12 +1,14 @@
+import sys
+
 import numpy as np
-import matplotlib
-# We DO NOT use matplotlib.use('Agg') because we want plt.show()
-import matplotlib.pyplot as plt
-import schemdraw
-import schemdraw.elements as elm
+
+from profiling import count, stage
+from solver_cache import memoize
+
+# matplotlib and schemdraw are imported only when a diagram is drawn or shown,
+# so number-only runs (the CLI with --no-draw, batch solvers) start fast.
 
 # --- Global Helper Functions: User Input ---
-# (Unchanged)
 def get_float_input(prompt):
     """A helper function to safely get a floating-point number from the user."""
     while True:
@@ -27,7 +29,6 @@ def get_complex_input(prompt):
             print("  Invalid input. Please enter valid numbers.")
 
 # --- Global Helper Functions: Component Calculation ---
-# (Unchanged)
 def get_component_value(reactance, omega):
     """(REUSABLE) Converts a reactance value (X) into a practical component."""
     if np.isnan(reactance) or abs(omega) < 1e-12:
@@ -54,8 +55,36 @@ def get_component_value_from_susceptance(susceptance, omega):
     else:
         return "0 S (open)"
 
+def element_kind(value, domain='X'):
+    """
+    (REUSABLE) 'L' or 'C' for a reactance (domain 'X') or susceptance (domain 'B').
+    Positive X and negative B are inductors; a zero value is a wire ('W') for
+    X and an open ('O') for B. Returns None for NaN.
+    """
+    if np.isnan(value):
+        return None
+    if value == 0:
+        return 'W' if domain == 'X' else 'O'
+    inductive = value > 0 if domain == 'X' else value < 0
+    return 'L' if inductive else 'C'
+
+# --- Global Helper Functions: Q Specification ---
+
+def nodal_q(z):
+    """Nodal Q of an impedance, |X| / R (infinite when R is zero)."""
+    return abs(z.imag) / z.real if z.real > 1e-9 else float('inf')
+
+def q_max_from_spec(frequency_mhz, q_max=None, q_tot=None, bw_mhz=None):
+    """Turns one of the Q_max / Q_tot / bandwidth options from `main` into Q_max."""
+    if q_max is not None:
+        return q_max
+    if q_tot is None:
+        if bw_mhz is None or bw_mhz <= 0:
+            raise ValueError("Bandwidth must be a positive number.")
+        q_tot = frequency_mhz / bw_mhz
+    return q_tot * 2
+
 # --- Global Helper Functions: Core Math ---
-# (Unchanged)
 def _solve_t_pi_math(r_s, x_s, r_l, x_l, q_val):
     """Core math solver for T and Pi networks (dual logic)."""
     all_solutions = []
@@ -88,124 +117,208 @@ def _solve_t_pi_math(r_s, x_s, r_l, x_l, q_val):
                 all_solutions.append({'Xa': Xa, 'Xb': Xb, 'Xc': Xc})
     return all_solutions, None
 
+# --- Global Helper Functions: Batch Math (vectorized) ---
+
+def _solve_l_math_batch(r_s, x_s, r_l, x_l):
+    """
+    Vectorized form of the L-section `solve_match` closure.
+    Returns (X_a, X_b) arrays of shape (..., 2); infeasible cells are NaN.
+    """
+    r_s, x_s, r_l, x_l = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (r_s, x_s, r_l, x_l)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        D = (4 * (r_s**2) * (x_l**2)) - \
+            (4 * (r_s**2) * (r_l**2 + x_l**2)) + \
+            (4 * r_s * r_l * (r_s**2 + x_s**2))
+        denominator = 2 * r_s
+        feasible = (D >= 0) & (np.abs(denominator) >= 1e-9)
+        sqrt_D = np.sqrt(np.where(feasible, D, np.nan))
+        denominator = np.where(feasible, denominator, np.nan)
+
+        X_b = np.stack([(-2 * r_s * x_l + sqrt_D) / denominator,
+                        (-2 * r_s * x_l - sqrt_D) / denominator], axis=-1)
+
+        # calc_Xa, applied to both roots at once
+        Rs2_Xs2 = (r_s**2 + x_s**2)[..., None]
+        Xb_Xl = X_b + x_l[..., None]
+        Rl2_XbXl2 = r_l[..., None]**2 + Xb_Xl**2
+        num = -(Rs2_Xs2 * Rl2_XbXl2)
+        den = (x_s[..., None] * Rl2_XbXl2) + (Xb_Xl * Rs2_Xs2)
+        X_a = np.where(np.abs(den) > 1e-9, num / den, np.nan)
+    return X_a, X_b
+
+def solve_l_section_batch(frequency_hz, z_source, z_load):
+    """
+    (BATCH) Solves every (Zs, Zl, f) cell for all four L-section solutions at once.
+    Inputs are broadcast together. Returns (solutions, valid, omega) where
+    solutions has shape (..., 4, 2) holding (X_a, X_b) per solution:
+      index 0-1: Shunt at SOURCE (X_a), Series at LOAD (X_b)   -> Solutions 1-2
+      index 2-3: Shunt at LOAD (X_a),   Series at SOURCE (X_b) -> Solutions 3-4
+    Infeasible solutions are NaN and False in `valid`.
+    """
+    z_source, z_load, frequency_hz = np.broadcast_arrays(
+        np.asarray(z_source, dtype=complex), np.asarray(z_load, dtype=complex),
+        np.asarray(frequency_hz, dtype=float))
+    omega = 2 * np.pi * frequency_hz
+
+    Rs, Xs = z_source.real, z_source.imag
+    Rl, Xl = z_load.real, z_load.imag
+    xa1, xb1 = _solve_l_math_batch(Rs, Xs, Rl, Xl)
+    xa2, xb2 = _solve_l_math_batch(Rl, Xl, Rs, Xs)
+
+    solutions = np.stack([np.concatenate([xa1, xa2], axis=-1),
+                          np.concatenate([xb1, xb2], axis=-1)], axis=-1)
+    valid = ~np.isnan(solutions).any(axis=-1) & (np.abs(omega) >= 1e-12)[..., None]
+    solutions[~valid] = np.nan
+    return solutions, valid, omega
+
+def _solve_t_pi_math_batch(r_s, x_s, r_l, x_l, q_val):
+    """
+    Vectorized form of `_solve_t_pi_math` (dual T/Pi logic).
+    All inputs are broadcast together, including Q. The Rl<Rs / Rl>Rs topology
+    swap is done per element, so (Xa, Xb, Xc) always means (at source, at load,
+    middle). Returns (solutions, valid): solutions has shape (..., 4, 3), one
+    slot per (Xb root, Xc root) pair in the same order as the scalar solver.
+    """
+    r_s, x_s, r_l, x_l, q_val = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (r_s, x_s, r_l, x_l, q_val)))
+
+    # Topology swap: the formulas need the higher resistance on the source side
+    swapped = r_l > r_s
+    r_hi = np.where(swapped, r_l, r_s); x_hi = np.where(swapped, x_l, x_s)
+    r_lo = np.where(swapped, r_s, r_l); x_lo = np.where(swapped, x_s, x_l)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Xb = np.stack([(q_val * r_lo - x_lo), (-q_val * r_lo - x_lo)], axis=-1)
+        denominator_Xc = 2 * (r_lo - r_hi)
+        denominator_Xc = np.where(np.abs(denominator_Xc) < 1e-9, np.nan, denominator_Xc)[..., None]
+
+        r_s_, r_l_, x_s_, x_l_ = (v[..., None] for v in (r_hi, r_lo, x_hi, x_lo))
+        Xb_plus_Xl = Xb + x_l_
+        term1 = r_s_ * (Xb_plus_Xl)**2
+        term2 = (r_l_ - r_s_) * (r_l_**2 + (Xb_plus_Xl)**2)
+        Delta = 4 * r_s_ * (term1 + term2)
+        sqrt_Delta = np.sqrt(np.where(Delta < 0, np.nan, Delta))
+        numerator_base_Xc = 2 * r_s_ * Xb_plus_Xl
+        Xc = np.stack([(numerator_base_Xc + sqrt_Delta) / denominator_Xc,
+                       (numerator_base_Xc - sqrt_Delta) / denominator_Xc], axis=-1)
+
+        # Flatten (Xb root, Xc root) into 4 solution slots
+        shape = Xc.shape[:-2] + (4,)
+        Xb = np.broadcast_to(Xb[..., None], Xc.shape).reshape(shape)
+        Xc = Xc.reshape(shape)
+        r_l_, x_s_, x_l_ = r_l_[..., :1], x_s_[..., :1], x_l_[..., :1]
+
+        Xc_plus_Xb_plus_Xl = Xc + Xb + x_l_
+        numerator_Xa = Xc * (r_l_**2 + (Xb + x_l_) * Xc_plus_Xb_plus_Xl)
+        denominator_Xa = r_l_**2 + Xc_plus_Xb_plus_Xl**2
+        Xa = np.where(np.abs(denominator_Xa) < 1e-9, np.nan,
+                      -x_s_ - (numerator_Xa / denominator_Xa))
+
+    sw = swapped[..., None]
+    solutions = np.stack([np.where(sw, Xb, Xa), np.where(sw, Xa, Xb), Xc], axis=-1)
+    valid = ~np.isnan(solutions).any(axis=-1)
+    solutions[~valid] = np.nan
+    return solutions, valid
+
+def solve_t_section_batch(frequency_hz, z_source, z_load, q_max):
+    """
+    (BATCH) T-section counterpart of `solve_l_section_batch`.
+    Returns (solutions, valid, omega); solutions[..., k, :] is
+    (Xa series at Zs, Xb series at Zl, Xc shunt middle) in ohms.
+    """
+    z_source, z_load, frequency_hz, q_max = np.broadcast_arrays(
+        np.asarray(z_source, dtype=complex), np.asarray(z_load, dtype=complex),
+        np.asarray(frequency_hz, dtype=float), np.asarray(q_max, dtype=float))
+    omega = 2 * np.pi * frequency_hz
+    solutions, valid = _solve_t_pi_math_batch(z_source.real, z_source.imag,
+                                              z_load.real, z_load.imag, q_max)
+    valid &= (np.abs(omega) >= 1e-12)[..., None]
+    solutions[~valid] = np.nan
+    return solutions, valid, omega
+
+def solve_pi_section_batch(frequency_hz, z_source, z_load, q_max):
+    """
+    (BATCH) Pi-section counterpart of `solve_l_section_batch`.
+    Returns (solutions, valid, omega); solutions[..., k, :] is
+    (Ba shunt at Zs, Bb shunt at Zl, Bc series middle) in siemens.
+    """
+    z_source, z_load, frequency_hz, q_max = np.broadcast_arrays(
+        np.asarray(z_source, dtype=complex), np.asarray(z_load, dtype=complex),
+        np.asarray(frequency_hz, dtype=float), np.asarray(q_max, dtype=float))
+    omega = 2 * np.pi * frequency_hz
+    nonzero = (np.abs(z_source) >= 1e-9) & (np.abs(z_load) >= 1e-9)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y_source = 1 / np.where(nonzero, z_source, np.nan)
+        y_load = 1 / np.where(nonzero, z_load, np.nan)
+    solutions, valid = _solve_t_pi_math_batch(y_source.real, y_source.imag,
+                                              y_load.real, y_load.imag, q_max)
+    valid &= (np.abs(omega) >= 1e-12)[..., None]
+    solutions[~valid] = np.nan
+    return solutions, valid, omega
+
 # --- Global Helper Functions: Drawing (USER'S LOGIC) ---
+# Each element is passed as a (kind, label) pair; see element_kind.
+
+def _render_schematic(spec, filename, show):
+    """
+    show=True draws on the calling thread and keeps the figure for plt.show();
+    show=False hands the spec to the headless, cached background renderer.
+    """
+    from schematic_render import draw_schematic, get_renderer
+    if show:
+        draw_schematic(spec, filename, canvas='matplotlib')
+        print(f"  🖼️  Circuit diagram saved as: {filename}")
+    else:
+        get_renderer().submit(spec, filename)
+        print(f"  🖼️  Circuit diagram queued as: {filename}")
 
-def draw_l_section(solution_number, z_source, z_load, shunt_comp, series_comp, topology):
+def draw_l_section(solution_number, z_source, z_load, shunt, series, topology, show=True):
     """
     Draws the L-section circuit and saves it to a file.
-    Also prepares it for plt.show().
+    Also prepares it for plt.show() unless show=False.
     """
+    from schematic_render import schematic_spec
     filename = f"L-Section_Solution_{solution_number}.svg"
-    
-    with schemdraw.Drawing(show=False) as d:
-        d.config(unit=3)
-        d.add(elm.SourceV().label('$Z_S$\n' + f'{z_source.real:.1f} + {z_source.imag:.1f}j Ω', loc='bottom'))
-        
-        if topology == 'shunt_source':
-            shunt_element = elm.Capacitor if 'pF' in shunt_comp else elm.Inductor
-            series_element = elm.Capacitor if 'pF' in series_comp else elm.Inductor
-            d.add(elm.Line().right())
-            d.push()
-            d.add(shunt_element().down().label(shunt_comp, loc='bottom'))
-            d.add(elm.Ground())
-            d.pop()
-            d.add(series_element().right().label(series_comp, loc='bottom'))
-        
-        elif topology == 'shunt_load':
-            series_element = elm.Capacitor if 'pF' in series_comp else elm.Inductor
-            shunt_element = elm.Capacitor if 'pF' in shunt_comp else elm.Inductor
-            d.add(series_element().right().label(series_comp, loc='bottom'))
-            d.push()
-            d.add(shunt_element().down().label(shunt_comp, loc='bottom'))
-            d.add(elm.Ground())
-            d.pop()
-
-        d.add(elm.Resistor().right().label('$Z_L$\n' + f'{z_load.real:.1f} + {z_load.imag:.1f}j Ω', loc='bottom'))
-        
-        d.save(filename)
-    
-    print(f"  🖼️  Circuit diagram saved as: {filename}")
+    spec = schematic_spec('L_' + topology, z_source, z_load, [shunt, series])
+    _render_schematic(spec, filename, show)
 
-def draw_t_section(solution_number, z_source, z_load, xa_comp, xb_comp, xc_comp):
+def draw_t_section(solution_number, z_source, z_load, xa, xb, xc, show=True):
     """
     Draws the T-section circuit and saves it to a file.
-    Also prepares it for plt.show().
+    Also prepares it for plt.show() unless show=False.
     """
+    from schematic_render import schematic_spec
     filename = f"T-Section_Solution_{solution_number}.svg"
+    spec = schematic_spec('T', z_source, z_load, [xa, xb, xc])
+    _render_schematic(spec, filename, show)
 
-    with schemdraw.Drawing(show=False) as d:
-        d.config(unit=3)
-        
-        d.add(elm.SourceV().label('$Z_S$\n' + f'{z_source.real:.1f} + {z_source.imag:.1f}j Ω', loc='bottom'))
-        
-        el_a = elm.Capacitor if 'pF' in xa_comp else elm.Inductor
-        d.add(el_a().right().label(xa_comp, loc='bottom'))
-        
-        d.push()
-        el_c = elm.Capacitor if 'pF' in xc_comp else elm.Inductor
-        d.add(el_c().down().label(xc_comp, loc='bottom'))
-        d.add(elm.Ground())
-        d.pop()
-        
-        el_b = elm.Capacitor if 'pF' in xb_comp else elm.Inductor
-        d.add(el_b().right().label(xb_comp, loc='bottom'))
-        
-        d.add(elm.Resistor().right().label('$Z_L$\n' + f'{z_load.real:.1f} + {z_load.imag:.1f}j Ω', loc='bottom'))
-
-        d.save(filename)
-    
-    print(f"  🖼️  Circuit diagram saved as: {filename}")
-
-def draw_pi_section(solution_number, z_source, z_load, ba_comp, bb_comp, bc_comp):
+def draw_pi_section(solution_number, z_source, z_load, ba, bb, bc, show=True):
     """
     Draws the Pi-section circuit and saves it to a file.
-    Also prepares it for plt.show().
+    Also prepares it for plt.show() unless show=False.
     """
+    from schematic_render import schematic_spec
     filename = f"Pi-Section_Solution_{solution_number}.svg"
-
-    with schemdraw.Drawing(show=False) as d:
-        d.config(unit=3)
-        
-        d.add(elm.SourceV().label('$Z_S$\n' + f'{z_source.real:.1f} + {z_source.imag:.1f}j Ω', loc='bottom'))
-        
-        # --- FIX ---
-        # Add a short wire to create the node *after* the source
-        d.add(elm.Line().right(d.unit/2)) 
-        
-        # Element Ba (Shunt at Source)
-        d.push() # Save the node position
-        el_a = elm.Capacitor if 'pF' in ba_comp else elm.Inductor
-        d.add(el_a().down().label(ba_comp, loc='bottom'))
-        d.add(elm.Ground())
-        d.pop() # Return to the node position
-        
-        # Element Bc (Series)
-        el_c = elm.Capacitor if 'pF' in bc_comp else elm.Inductor
-        d.add(el_c().right().label(bc_comp, loc='bottom'))
-        
-        # --- FIX ---
-        # Add a short wire to create the second node
-        d.add(elm.Line().right(d.unit/2))
-        
-        # Element Bb (Shunt at Load)
-        d.push() # Save the second node position
-        el_b = elm.Capacitor if 'pF' in bb_comp else elm.Inductor
-        d.add(el_b().down().label(bb_comp, loc='bottom'))
-        d.add(elm.Ground())
-        d.pop() # Return to the second node position
-        
-        d.add(elm.Resistor().right().label('$Z_L$\n' + f'{z_load.real:.1f} + {z_load.imag:.1f}j Ω', loc='bottom'))
-
-        d.save(filename)
-    
-    print(f"  🖼️  Circuit diagram saved as: {filename}")
+    spec = schematic_spec('Pi', z_source, z_load, [ba, bb, bc])
+    _render_schematic(spec, filename, show)
+
+def _show_diagrams():
+    """Shows every diagram drawn with show=True."""
+    # We DO NOT use matplotlib.use('Agg') because we want plt.show()
+    import matplotlib.pyplot as plt
+    print("Displaying all valid circuit diagrams...")
+    with stage('show'):
+        plt.show()
 
 
 # --- Network Calculation Functions (USER'S LOGIC) ---
 
-def calculate_l_section(frequency_hz, z_source, z_load):
+def calculate_l_section(frequency_hz, z_source, z_load, show=True, draw=True):
     """
     Calculates and displays L-section networks, then calls plt.show().
+    With show=False diagrams are rendered headless in the background instead;
+    draw=False skips the diagrams altogether. Returns the listed solutions as
+    results.MatchingSolution objects.
     """
     omega = 2 * np.pi * frequency_hz
     Rs, Xs = z_source.real, z_source.imag
@@ -238,26 +351,39 @@ def calculate_l_section(frequency_hz, z_source, z_load):
     print(f" Matching Zs = {z_source} Ω to Zl = {z_load} Ω @ {frequency_hz / 1e6} MHz")
     print("-------------------------------------------\n")
 
-    solutions1, error1 = solve_match(Rs, Xs, Rl, Xl)
-    solutions2, error2 = solve_match(Rl, Xl, Rs, Xs)
+    from results import format_console, solution_from_values
+
+    with stage('solve'):
+        solutions1, error1 = memoize('l_match', solve_match, Rs, Xs, Rl, Xl)
+        solutions2, error2 = memoize('l_match', solve_match, Rl, Xl, Rs, Xs)
     found_solution = False 
+    results = []
 
     if not solutions1 and not solutions2:
         print(f"❌ No L-section match possible. Reason: {error1 or error2}")
-        return
+        return results
 
     print("## Topology 1: Shunt Component at SOURCE, Series at LOAD")
     if solutions1:
         for i, sol in enumerate(solutions1):
             sol_num = i + 1
-            shunt_val = get_component_value(sol['X_a'], omega)
-            series_val = get_component_value(sol['X_b'], omega)
-            print(f"--- Solution {sol_num} ---")
-            print(f"  Shunt Component (at Zs): {shunt_val}")
-            print(f"  Series Component (at Zl): {series_val}")
+            with stage('convert'):
+                shunt_val = get_component_value(sol['X_a'], omega)
+                series_val = get_component_value(sol['X_b'], omega)
+                result = solution_from_values('L', sol_num - 1, frequency_hz, z_source, z_load,
+                                              (sol['X_a'], sol['X_b']))
+                lines = format_console(result)
+            results.append(result)
+            print("\n".join(lines))
             if 'N/A' not in shunt_val and 'N/A' not in series_val:
+                count('solutions_found')
                 found_solution = True
-                draw_l_section(sol_num, z_source, z_load, shunt_val, series_val, 'shunt_source')
+                if draw:
+                    draw_l_section(sol_num, z_source, z_load,
+                                   (element_kind(sol['X_a']), shunt_val),
+                                   (element_kind(sol['X_b']), series_val), 'shunt_source', show)
+            else:
+                count('solutions_na')
     else:
         print(f"-> No solutions found for this topology. ({error1})")
     
@@ -267,27 +393,40 @@ def calculate_l_section(frequency_hz, z_source, z_load):
     if solutions2:
         for i, sol in enumerate(solutions2):
             sol_num = i + 3
-            series_val = get_component_value(sol['X_b'], omega)
-            shunt_val = get_component_value(sol['X_a'], omega)
-            print(f"--- Solution {sol_num} ---")
-            print(f"  Series Component (at Zs): {series_val}")
-            print(f"  Shunt Component (at Zl): {shunt_val}")
+            with stage('convert'):
+                series_val = get_component_value(sol['X_b'], omega)
+                shunt_val = get_component_value(sol['X_a'], omega)
+                result = solution_from_values('L', sol_num - 1, frequency_hz, z_source, z_load,
+                                              (sol['X_a'], sol['X_b']))
+                lines = format_console(result)
+            results.append(result)
+            print("\n".join(lines))
             if 'N/A' not in shunt_val and 'N/A' not in series_val:
+                count('solutions_found')
                 found_solution = True
-                draw_l_section(sol_num, z_source, z_load, shunt_val, series_val, 'shunt_load')
+                if draw:
+                    draw_l_section(sol_num, z_source, z_load,
+                                   (element_kind(sol['X_a']), shunt_val),
+                                   (element_kind(sol['X_b']), series_val), 'shunt_load', show)
+            else:
+                count('solutions_na')
     else:
         print(f"-> No solutions found for this topology. ({error2})")
     
     print("\n-------------------------------------------")
 
-    if found_solution:
-        print("Displaying all valid circuit diagrams...")
-        plt.show()
+    if found_solution and show and draw:
+        _show_diagrams()
+
+    return results
 
 
-def calculate_t_section(frequency_hz, z_source, z_load, q_max):
+def calculate_t_section(frequency_hz, z_source, z_load, q_max, show=True, draw=True):
     """
     Calculates and displays T-section networks, then calls plt.show().
+    With show=False diagrams are rendered headless in the background instead;
+    draw=False skips the diagrams altogether. Returns the listed solutions as
+    results.MatchingSolution objects.
     """
     omega = 2 * np.pi * frequency_hz
     Rs, Xs = z_source.real, z_source.imag
@@ -301,72 +440,81 @@ def calculate_t_section(frequency_hz, z_source, z_load, q_max):
 
     if abs(Rl - Rs) < 1e-9:
         print("❌ Rs is equal to Rl. The T-network formulas are not suitable.")
-        return
+        return []
+
+    from results import format_console, solution_from_values
 
     solutions = []
+    results = []
     topology = ""
     found_solution = False # Tracks if we found any valid plots to show
     
-    if Rl < Rs:
-        topology = "standard"
-        solutions, error = _solve_t_pi_math(Rs, Xs, Rl, Xl, q_max)
-    elif Rl > Rs:
-        topology = "swapped"
-        solutions, error = _solve_t_pi_math(Rl, Xl, Rs, Xs, q_max)
+    with stage('solve'):
+        if Rl < Rs:
+            topology = "standard"
+            solutions, error = memoize('t_pi', _solve_t_pi_math, Rs, Xs, Rl, Xl, q_max)
+        elif Rl > Rs:
+            topology = "swapped"
+            solutions, error = memoize('t_pi', _solve_t_pi_math, Rl, Xl, Rs, Xs, q_max)
         
     if error:
         print(f"❌ Calculation error: {error}")
-        return
+        return results
         
     if not solutions:
         print("❌ No real solutions found for these parameters and Q_max.")
-        return
+        return results
 
     sol_num = 1
     
     for sol in solutions:
         if topology == "standard":
             xa_val, xb_val, xc_val = sol['Xa'], sol['Xb'], sol['Xc']
-            xa_comp = get_component_value(xa_val, omega)
-            xb_comp = get_component_value(xb_val, omega)
-            xc_comp = get_component_value(xc_val, omega)
-            print(f"--- Solution {sol_num} (Topology Rl < Rs) ---")
-            print(f"  Series (at Zs):   {xa_comp}")
-            print(f"  Shunt (middle):   {xc_comp}")
-            print(f"  Series (at Zl):   {xb_comp}")
-            
         elif topology == "swapped":
             xa_val, xb_val, xc_val = sol['Xb'], sol['Xa'], sol['Xc']
+        with stage('convert'):
             xa_comp = get_component_value(xa_val, omega)
             xb_comp = get_component_value(xb_val, omega)
             xc_comp = get_component_value(xc_val, omega)
-            print(f"--- Solution {sol_num} (Topology Rl > Rs) ---")
-            print(f"  Series (at Zs):   {xa_comp}")
-            print(f"  Shunt (middle):   {xc_comp}")
-            print(f"  Series (at Zl):   {xb_comp}")
+            result = solution_from_values('T', sol_num - 1, frequency_hz, z_source, z_load,
+                                          (xa_val, xb_val, xc_val), q_max)
+            lines = format_console(result)
+        results.append(result)
+        print("\n".join(lines))
 
         if 'N/A' not in [xa_comp, xb_comp, xc_comp]:
+            count('solutions_found')
             found_solution = True
-            draw_t_section(sol_num, z_source, z_load, xa_comp, xb_comp, xc_comp)
-        
+            if draw:
+                draw_t_section(sol_num, z_source, z_load,
+                               (element_kind(xa_val), xa_comp),
+                               (element_kind(xb_val), xb_comp),
+                               (element_kind(xc_val), xc_comp), show)
+        else:
+            count('solutions_na')
+
         sol_num += 1
     
     print("\n-------------------------------------------")
 
-    if found_solution:
-        print("Displaying all valid circuit diagrams...")
-        plt.show()
+    if found_solution and show and draw:
+        _show_diagrams()
+
+    return results
 
 
-def calculate_pi_section(frequency_hz, z_source, z_load, q_max):
+def calculate_pi_section(frequency_hz, z_source, z_load, q_max, show=True, draw=True):
     """
     Calculates and displays Pi-section networks, then calls plt.show().
+    With show=False diagrams are rendered headless in the background instead;
+    draw=False skips the diagrams altogether. Returns the listed solutions as
+    results.MatchingSolution objects.
     """
     omega = 2 * np.pi * frequency_hz
 
     if abs(z_source) < 1e-9 or abs(z_load) < 1e-9:
         print("❌ Error: Source or Load impedance is zero.")
-        return
+        return []
 
     y_source = 1 / z_source
     y_load = 1 / z_load
@@ -382,65 +530,70 @@ def calculate_pi_section(frequency_hz, z_source, z_load, q_max):
 
     if abs(Gl - Gs) < 1e-9:
         print("❌ Gs is equal to Gl. The Pi-network formulas are not suitable.")
-        return
+        return []
+
+    from results import format_console, solution_from_values
 
     solutions = []
+    results = []
     topology = ""
     found_solution = False # Tracks if we found any valid plots to show
     
-    if Gl < Gs:
-        topology = "standard"
-        solutions, error = _solve_t_pi_math(Gs, Bs, Gl, Bl, q_max)
-    elif Gl > Gs:
-        topology = "swapped"
-        solutions, error = _solve_t_pi_math(Gl, Bl, Gs, Bs, q_max)
+    with stage('solve'):
+        if Gl < Gs:
+            topology = "standard"
+            solutions, error = memoize('t_pi', _solve_t_pi_math, Gs, Bs, Gl, Bl, q_max)
+        elif Gl > Gs:
+            topology = "swapped"
+            solutions, error = memoize('t_pi', _solve_t_pi_math, Gl, Bl, Gs, Bs, q_max)
         
     if error:
         print(f"❌ Calculation error: {error}")
-        return
+        return results
         
     if not solutions:
         print("❌ No real solutions found for these parameters and Q_max.")
-        return
+        return results
 
     sol_num = 1
     
     for sol in solutions:
         if topology == "standard":
             ba_val, bb_val, bc_val = sol['Xa'], sol['Xb'], sol['Xc']
-            ba_comp = get_component_value_from_susceptance(ba_val, omega)
-            bb_comp = get_component_value_from_susceptance(bb_val, omega)
-            bc_comp = get_component_value_from_susceptance(bc_val, omega)
-            print(f"--- Solution {sol_num} (Topology Gl < Gs) ---")
-            print(f"  Shunt (at Zs):    {ba_comp}")
-            print(f"  Series (middle):  {bc_comp}")
-            print(f"  Shunt (at Zl):    {bb_comp}")
-            
         elif topology == "swapped":
             ba_val, bb_val, bc_val = sol['Xb'], sol['Xa'], sol['Xc']
+        with stage('convert'):
             ba_comp = get_component_value_from_susceptance(ba_val, omega)
             bb_comp = get_component_value_from_susceptance(bb_val, omega)
             bc_comp = get_component_value_from_susceptance(bc_val, omega)
-            print(f"--- Solution {sol_num} (Topology Gl > Gs) ---")
-            print(f"  Shunt (at Zs):    {ba_comp}")
-            print(f"  Series (middle):  {bc_comp}")
-            print(f"  Shunt (at Zl):    {bb_comp}")
+            result = solution_from_values('Pi', sol_num - 1, frequency_hz, z_source, z_load,
+                                          (ba_val, bb_val, bc_val), q_max)
+            lines = format_console(result)
+        results.append(result)
+        print("\n".join(lines))
 
         if 'N/A' not in [ba_comp, bb_comp, bc_comp]:
+            count('solutions_found')
             found_solution = True
-            draw_pi_section(sol_num, z_source, z_load, ba_comp, bb_comp, bc_comp)
-        
+            if draw:
+                draw_pi_section(sol_num, z_source, z_load,
+                                (element_kind(ba_val, 'B'), ba_comp),
+                                (element_kind(bb_val, 'B'), bb_comp),
+                                (element_kind(bc_val, 'B'), bc_comp), show)
+        else:
+            count('solutions_na')
+
         sol_num += 1
     
     print("\n-------------------------------------------")
 
-    if found_solution:
-        print("Displaying all valid circuit diagrams...")
-        plt.show()
+    if found_solution and show and draw:
+        _show_diagrams()
+
+    return results
 
 
 # --- Main Program Logic ---
-# (Unchanged)
 def main():
     """Main function to run the matching network tool."""
     print("=============================================")
@@ -465,13 +618,16 @@ def main():
 
     frequency_hz = frequency_mhz * 1e6
 
+    from frequency_response import print_bandwidth_report
+
     if choice == '1':
         calculate_l_section(frequency_hz, z_source, z_load)
+        print_bandwidth_report('L', frequency_hz, z_source, z_load)
         
     elif choice == '2' or choice == '3':
         
-        q_s = abs(z_source.imag) / z_source.real if z_source.real > 1e-9 else float('inf')
-        q_l = abs(z_load.imag) / z_load.real if z_load.real > 1e-9 else float('inf')
+        q_s = nodal_q(z_source)
+        q_l = nodal_q(z_load)
         
         min_required_q = max(q_s, q_l)
         
@@ -498,7 +654,7 @@ def main():
                 q_max = get_float_input("Enter Maximum Nodal Quality Factor (Q_max): ")
             elif q_choice == '2':
                 q_tot = get_float_input("Enter Total Quality Factor (Q_tot): ")
-                q_max = q_tot * 2
+                q_max = q_max_from_spec(frequency_mhz, q_tot=q_tot)
                 print(f"-> Calculated Q_max = {q_tot} * 2 = {q_max:.2f}")
             elif q_choice == '3':
                 bw_mhz = get_float_input("Enter Desired Bandwidth (in MHz): ")
@@ -506,7 +662,7 @@ def main():
                     print("❌ Error: Bandwidth must be a positive number. Please try again.")
                     continue
                 q_tot = frequency_mhz / bw_mhz
-                q_max = q_tot * 2
+                q_max = q_max_from_spec(frequency_mhz, bw_mhz=bw_mhz)
                 print(f"-> Calculated Q_tot = {frequency_mhz} MHz / {bw_mhz} MHz = {q_tot:.2f}")
                 print(f"-> Calculated Q_max = {q_tot:.2f} * 2 = {q_max:.2f}")
             else:
@@ -525,10 +681,15 @@ def main():
         
         if choice == '2':
             calculate_pi_section(frequency_hz, z_source, z_load, q_max)
+            print_bandwidth_report('Pi', frequency_hz, z_source, z_load, q_max)
         elif choice == '3':
             calculate_t_section(frequency_hz, z_source, z_load, q_max)
+            print_bandwidth_report('T', frequency_hz, z_source, z_load, q_max)
     
     print("\nProgram finished. Goodbye! 👋")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main())
     main()
\ No newline at end of file
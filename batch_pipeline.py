@@ -0,0 +1,384 @@
+import csv
+import io
+import itertools
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+import numpy as np
+
+from frequency_response import VerificationStats, solve_batch, verify_batch
+from results import CSV_COLUMNS, record_columns, records_from_batch
+
+# --- Streaming Batch Pipeline ---
+# Design files (CSV or Parquet) are read through generators a fixed number of
+# rows at a time; every chunk goes through one batch solve and its
+# RESULT_DTYPE records are appended to the output straight away, so memory
+# depends on the chunk size and the number of chunks in flight, not on the
+# file size.
+#
+# Input columns: frequency_hz, zs and zl (complex strings such as '10-25j')
+# or zs_real / zs_imag / zl_real / zl_imag, and an optional per-row q_max.
+#
+# After every written chunk a small JSON checkpoint next to the output
+# records which chunks are done (and, for CSV, the file size at that point),
+# so an interrupted run can resume where it stopped. Parquet output is a
+# directory of one part file per chunk, named by chunk index.
+
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+
+def _pyarrow():
+    """Imports pyarrow (and pyarrow.parquet) on first Parquet use."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError("Parquet input/output needs pyarrow (pip install pyarrow).") from exc
+    return pyarrow
+
+# --- Readers ---
+# Each reader yields (chunk index, row count, columns) with columns a
+# {name: sequence} dict; chunks listed in `skip` are counted but not decoded.
+
+def iter_csv_chunks(path, chunk_rows=65536, skip=()):
+    """
+    (GENERATOR) Streams a design CSV in chunks of `chunk_rows` rows (blank
+    lines are skipped). Raises ValueError on a row whose field count differs
+    from the header's.
+    """
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        for index in itertools.count():
+            rows = []
+            for row in reader:
+                if len(row) != len(header):
+                    if not row:
+                        continue
+                    raise ValueError(f"{path}, line {reader.line_num}: expected {len(header)} fields, "
+                                     f"got {len(row)}.")
+                rows.append(row)
+                if len(rows) == chunk_rows:
+                    break
+            if not rows:
+                return
+            yield index, len(rows), None if index in skip else dict(zip(header, zip(*rows)))
+
+def iter_parquet_chunks(path, chunk_rows=65536, skip=()):
+    """(GENERATOR) Streams a design Parquet file in record batches of `chunk_rows` rows."""
+    parquet_file = _pyarrow().parquet.ParquetFile(path)
+    for index, batch in enumerate(parquet_file.iter_batches(batch_size=chunk_rows)):
+        columns = None
+        if index not in skip:
+            columns = {name: batch.column(name).to_numpy(zero_copy_only=False) for name in batch.schema.names}
+        yield index, batch.num_rows, columns
+
+READERS = {'.csv': iter_csv_chunks, '.parquet': iter_parquet_chunks}
+
+def _format(path, formats):
+    for extension in formats:
+        if str(path).lower().rstrip('/\\').endswith(extension):
+            return extension
+    raise ValueError(f"Unsupported file format for '{path}'. Use one of {tuple(formats)}.")
+
+def _impedance_column(columns, name):
+    if name in columns:
+        return np.asarray(columns[name]).astype(str).astype(complex)
+    if f'{name}_real' in columns:
+        return (np.asarray(columns[f'{name}_real'], dtype=float)
+                + 1j * np.asarray(columns.get(f'{name}_imag', 0.0), dtype=float))
+    raise ValueError(f"Input has no '{name}' (or '{name}_real' / '{name}_imag') column.")
+
+def design_arrays(columns, q_max=None):
+    """Input columns -> (frequency_hz, z_source, z_load, q_max) arrays; q_max falls back to the default."""
+    if 'frequency_hz' not in columns:
+        raise ValueError("Input has no 'frequency_hz' column.")
+    frequency_hz = np.asarray(columns['frequency_hz'], dtype=float)
+    if 'q_max' in columns:
+        q_max = np.asarray(columns['q_max'], dtype=float)
+    return frequency_hz, _impedance_column(columns, 'zs'), _impedance_column(columns, 'zl'), q_max
+
+def solve_chunk(topology, columns, q_max=None, verify='drop', tolerance=None, stats=None):
+    """
+    Decodes one input chunk, solves and verifies it (totals merged into
+    `stats` when given). Returns its RESULT_DTYPE records (4 per row).
+    """
+    frequency_hz, z_source, z_load, q = design_arrays(columns, q_max)
+    if topology == 'L':
+        q = None
+    solutions, valid, _ = solve_batch(topology, frequency_hz, z_source, z_load, q, verify=None)
+    if verify:
+        solutions, valid, _ = verify_batch(topology, solutions, valid, z_source, z_load, tolerance, verify, stats)
+    return records_from_batch(topology, frequency_hz, z_source, z_load, solutions, valid, q)
+
+def process_chunk(topology, columns, q_max, encode, verify='drop', tolerance=None):
+    """
+    Solves one chunk and encodes it for the sink (in the worker).
+    Returns (record count, payload, VerificationStats of the chunk).
+    """
+    stats = VerificationStats()
+    records = solve_chunk(topology, columns, q_max, verify, tolerance, stats)
+    return len(records), encode(records), stats
+
+# --- Writers ---
+# Formatting is the expensive part of writing, so sinks split it: encode()
+# turns records into a payload (run in the workers), write() only stores it.
+
+def encode_csv(records):
+    """CSV text of one chunk's records, without the header."""
+    text = io.StringIO()
+    csv.writer(text).writerows(zip(*record_columns(records)))
+    return text.getvalue()
+
+def encode_parquet(records):
+    """Arrow table of one chunk's records, with the CSV column names."""
+    return _pyarrow().table(dict(zip(CSV_COLUMNS, record_columns(records))))
+
+class CsvSink:
+    """Appends records to one CSV; resuming truncates it to the last checkpointed size."""
+
+    encode = staticmethod(encode_csv)
+
+    def __init__(self, path, offset=None):
+        if offset is None:
+            self._file = open(path, 'w', newline='')
+            csv.writer(self._file).writerow(CSV_COLUMNS)
+        else:
+            os.truncate(path, offset)
+            self._file = open(path, 'a', newline='')
+
+    def write(self, index, payload):
+        self._file.write(payload)
+
+    def position(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+class ParquetSink:
+    """Writes every chunk to its own part file in a directory; parts sort in input order."""
+
+    encode = staticmethod(encode_parquet)
+
+    def __init__(self, path, offset=None):
+        self._pa = _pyarrow()
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if offset is None:
+            for name in os.listdir(path):
+                if name.startswith('part-') and name.endswith('.parquet'):
+                    os.remove(os.path.join(path, name))
+
+    def write(self, index, payload):
+        target = os.path.join(self.path, f'part-{index:06d}.parquet')
+        self._pa.parquet.write_table(payload, target + '.tmp')
+        os.replace(target + '.tmp', target)
+
+    def position(self):
+        return None
+
+    def close(self):
+        pass
+
+SINKS = {'.csv': CsvSink, '.parquet': ParquetSink}
+
+# --- Checkpoints ---
+
+class Checkpoint:
+    """
+    Progress of one run: every chunk below `prefix` is written, plus the
+    chunks in `extra` (out-of-order completions). Saved atomically as JSON.
+    """
+
+    def __init__(self, path, run):
+        self.path = path
+        self.run = run
+        self.prefix = 0
+        self.extra = set()
+        self.rows = 0
+        self.records = 0
+        self.offset = None
+
+    @classmethod
+    def load(cls, path, run):
+        checkpoint = cls(path, run)
+        with open(path) as f:
+            state = json.load(f)
+        if state['run'] != run:
+            raise ValueError(f"Checkpoint {path} was written by a different run "
+                             f"({state['run']}); start without resuming instead.")
+        checkpoint.prefix = state['prefix']
+        checkpoint.extra = set(state['extra'])
+        checkpoint.rows = state['rows']
+        checkpoint.records = state['records']
+        checkpoint.offset = state['offset']
+        return checkpoint
+
+    def __contains__(self, index):
+        return index < self.prefix or index in self.extra
+
+    def mark(self, index, rows, records, offset):
+        self.extra.add(index)
+        while self.prefix in self.extra:
+            self.extra.remove(self.prefix)
+            self.prefix += 1
+        self.rows += rows
+        self.records += records
+        self.offset = offset
+        self.save()
+
+    def save(self):
+        state = {'run': self.run, 'prefix': self.prefix, 'extra': sorted(self.extra),
+                 'rows': self.rows, 'records': self.records, 'offset': self.offset}
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(state, f)
+        os.replace(self.path + '.tmp', self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+# --- Runner ---
+
+class _SkipView:
+    """`index in skip` view of a checkpoint, frozen at start so new completions are not skipped."""
+
+    def __init__(self, checkpoint):
+        self._prefix = checkpoint.prefix
+        self._extra = frozenset(checkpoint.extra)
+
+    def __contains__(self, index):
+        return index < self._prefix or index in self._extra
+
+def _input_columns(path, reader):
+    """Column names of an input file (reads only its first chunk)."""
+    for _, _, columns in reader(path, 1):
+        return set(columns)
+    return set()
+
+@dataclass(slots=True)
+class PipelineResult:
+    """
+    Totals of one run; `resumed_rows` were already done by an earlier,
+    interrupted run, and `verification` covers this run only.
+    """
+    topology: str
+    rows: int
+    records: int
+    chunks: int
+    resumed_rows: int
+    elapsed_s: float
+    verification: VerificationStats
+
+    @property
+    def rows_per_second(self):
+        solved = self.rows - self.resumed_rows
+        return solved / self.elapsed_s if self.elapsed_s > 0 else float('inf')
+
+def run_pipeline(input_path, output_path, topology, q_max=None, chunk_rows=65536, workers=1,
+                 ordered=True, resume=False, progress=True, verify='drop', tolerance=None):
+    """
+    Streams `input_path` (.csv or .parquet) through the `topology` batch
+    solver and writes the records to `output_path` (.csv, or a .parquet
+    directory). q_max is the default for rows without a q_max column (T/Pi).
+    workers > 1 solves chunks in a process pool; at most 2 * workers chunks
+    are in flight or waiting to be written. ordered=False writes CSV chunks
+    as they finish instead of in input order. resume=True continues from the
+    checkpoint of an interrupted run. verify / tolerance are passed to
+    solve_batch. Returns a PipelineResult.
+    """
+    reader = READERS[_format(input_path, READERS)]
+    sink_class = SINKS[_format(output_path, SINKS)]
+    if topology != 'L' and q_max is None and 'q_max' not in _input_columns(input_path, reader):
+        raise ValueError(f"{topology}-section matching needs a q_max column or a default Q_max.")
+
+    # The input's size and mtime are part of the run, so an edited input cannot resume
+    info = os.stat(input_path)
+    run = {'input': os.path.abspath(input_path), 'input_size': info.st_size, 'input_mtime_ns': info.st_mtime_ns,
+           'topology': topology, 'chunk_rows': chunk_rows,
+           'q_max': q_max, 'ordered': ordered, 'verify': verify, 'tolerance': tolerance}
+    checkpoint_path = str(output_path).rstrip('/\\') + CHECKPOINT_SUFFIX
+    if resume and os.path.exists(checkpoint_path):
+        checkpoint = Checkpoint.load(checkpoint_path, run)
+        sink = sink_class(output_path, checkpoint.offset if checkpoint.offset is not None else 0)
+    else:
+        checkpoint = Checkpoint(checkpoint_path, run)
+        sink = sink_class(output_path)
+        checkpoint.offset = sink.position()
+        checkpoint.save()
+    resumed_rows = checkpoint.rows
+    skip = _SkipView(checkpoint)
+
+    start_time = time.perf_counter()
+    chunks = 0
+    verification = VerificationStats()
+
+    def commit(index, rows, result):
+        records, payload, chunk_verification = result
+        verification.merge(chunk_verification)
+        sink.write(index, payload)
+        checkpoint.mark(index, rows, records, sink.position())
+        if progress:
+            elapsed = time.perf_counter() - start_time
+            rate = (checkpoint.rows - resumed_rows) / elapsed if elapsed > 0 else float('inf')
+            print(f"\r  Pipeline {topology}: {checkpoint.rows:,} rows, {checkpoint.records:,} records, "
+                  f"{rate:,.0f} rows/s", end='', flush=True)
+
+    try:
+        chunk_iter = reader(input_path, chunk_rows, skip)
+        if workers <= 1:
+            for index, rows, columns in chunk_iter:
+                chunks += 1
+                if columns is not None:
+                    commit(index, rows, process_chunk(topology, columns, q_max, sink_class.encode,
+                                                      verify, tolerance))
+        else:
+            limit = 2 * workers
+            pending = {}                    # future -> (index, rows)
+            ready = {}                      # index -> (rows, records), waiting for earlier chunks
+            next_write = 0
+
+            def drain(block):
+                nonlocal next_write
+                done, _ = wait(pending, return_when=FIRST_COMPLETED) if block else (
+                    [f for f in pending if f.done()], None)
+                for future in done:
+                    index, rows = pending.pop(future)
+                    if ordered:
+                        ready[index] = (rows, future.result())
+                    else:
+                        commit(index, rows, future.result())
+                while ordered:
+                    if next_write in ready:
+                        commit(next_write, *ready.pop(next_write))
+                    elif next_write not in checkpoint:
+                        break
+                    next_write += 1
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for index, rows, columns in chunk_iter:
+                    chunks += 1
+                    if columns is None:
+                        continue
+                    while len(pending) + len(ready) >= limit:
+                        drain(block=True)
+                    future = pool.submit(process_chunk, topology, columns, q_max, sink_class.encode,
+                                         verify, tolerance)
+                    pending[future] = (index, rows)
+                    drain(block=False)
+                while pending:
+                    drain(block=True)
+                drain(block=False)
+    finally:
+        sink.close()
+    if progress:
+        print()
+
+    checkpoint.remove()
+    return PipelineResult(topology, checkpoint.rows, checkpoint.records, chunks, resumed_rows,
+                          time.perf_counter() - start_time, verification)
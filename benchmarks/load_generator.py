@@ -0,0 +1,140 @@
+"""
+Open-loop load generator for the matching service (`AssingmentRF.py serve`).
+
+Sends POST /match requests at a fixed target rate over a pool of keep-alive
+connections and reports achieved requests/s with p50/p90/p99 latency. Each
+rate in --rates is run for --duration seconds, so the output maps latency
+against load. Without --port a service is started on a free port and stopped
+afterwards.
+
+    python benchmarks/load_generator.py --rates 200 1000 5000 [--duration 5] [--connections 64]
+    python benchmarks/load_generator.py --port 8765 --rates 1000 --topology pi
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'AssingmentRF.py')
+
+def make_bodies(topology, n=1024, seed=20240101):
+    """Seeded /match request bodies (pre-encoded)."""
+    rng = random.Random(seed)
+    bodies = []
+    for _ in range(n):
+        request = {'topology': topology, 'frequency_hz': 10 ** rng.uniform(6, 9.5),
+                   'z_source': 50, 'z_load': [10 ** rng.uniform(0.7, 2.5), rng.uniform(-200, 200)]}
+        if topology.lower() != 'l':
+            request['q_max'] = rng.uniform(2, 12)
+        bodies.append(json.dumps(request).encode())
+    return bodies
+
+async def _request(reader, writer, body):
+    writer.write(b"POST /match HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = int(re.search(rb'(?i)content-length:\s*(\d+)', head).group(1))
+    await reader.readexactly(length)
+    return status
+
+async def run_rate(port, rate, duration, connections, bodies):
+    """Fires requests at `rate`/s for `duration` s. Returns (latencies, statuses, elapsed)."""
+    idle = asyncio.Queue()
+    for _ in range(connections):
+        idle.put_nowait(await asyncio.open_connection('127.0.0.1', port))
+    latencies, statuses, tasks = [], {}, []
+
+    async def one(scheduled, body):
+        connection = await idle.get()
+        try:
+            status = await _request(*connection, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            status = 0
+            connection = await asyncio.open_connection('127.0.0.1', port)
+        idle.put_nowait(connection)
+        # Latency from the scheduled send time, so queueing delay counts (no coordinated omission)
+        latencies.append(time.perf_counter() - scheduled)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    total = int(rate * duration)
+    for i in range(total):
+        scheduled = start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(scheduled, bodies[i % len(bodies)])))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    while not idle.empty():
+        _, writer = idle.get_nowait()
+        writer.close()
+    return latencies, statuses, elapsed
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else float('nan')
+
+async def _stats(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b"GET /stats HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return json.loads(data.split(b'\r\n\r\n', 1)[1])
+
+def start_service(window_ms):
+    """Starts `AssingmentRF.py serve` on a free port; returns (process, port)."""
+    process = subprocess.Popen([sys.executable, SCRIPT, 'serve', '--port', '0', '--window-ms', str(window_ms)],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    match = re.search(r':(\d+) ', line)
+    if not match:
+        process.kill()
+        raise RuntimeError(f"service did not start: {line!r}")
+    return process, int(match.group(1))
+
+async def main_async(args, port):
+    bodies = make_bodies(args.topology)
+    print(f"{'target rps':>11}{'achieved':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}  statuses")
+    for rate in args.rates:
+        latencies, statuses, elapsed = await run_rate(port, rate, args.duration, args.connections, bodies)
+        ms = [v * 1e3 for v in latencies]
+        print(f"{rate:>11,.0f}{len(latencies) / elapsed:>10,.0f}{percentile(ms, 50):>9.2f}"
+              f"{percentile(ms, 90):>9.2f}{percentile(ms, 99):>9.2f}{max(ms):>9.2f}  {statuses}")
+    batching = (await _stats(port))['batching']
+    print(f"server: {batching['batches']:,} batches, mean batch size {batching['mean_batch_size'] or 0:.1f}, "
+          f"largest {batching['largest_batch']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, help="port of a running service (default: start one)")
+    parser.add_argument('--rates', type=float, nargs='+', default=[200, 1000, 2000], help="target requests/s")
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per rate")
+    parser.add_argument('--connections', type=int, default=64, help="keep-alive connections")
+    parser.add_argument('--topology', default='T', choices=('L', 'T', 'Pi', 'l', 't', 'pi'))
+    parser.add_argument('--window-ms', type=float, default=2.0, help="batch window of a started service")
+    args = parser.parse_args(argv)
+
+    process = None
+    port = args.port
+    if port is None:
+        process, port = start_service(args.window_ms)
+    try:
+        asyncio.run(main_async(args, port))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
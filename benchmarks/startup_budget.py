@@ -0,0 +1,59 @@
+"""
+Startup-time regression check for the non-interactive CLI.
+
+Runs `AssingmentRF.py l ... --no-draw` several times in fresh interpreters and
+fails (exit code 1) when the median wall time exceeds the budget, or when a
+plotting/schematic library was imported on a number-only run.
+
+    python benchmarks/startup_budget.py [--budget 1.0] [--runs 7]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'AssingmentRF.py')
+COMMAND = [sys.executable, SCRIPT, 'l', '--freq-mhz', '100', '--zs', '50', '--zl', '10-25j', '--no-draw']
+HEAVY_MODULES = ('matplotlib', 'schemdraw')
+
+def time_runs(runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(COMMAND, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def heavy_imports():
+    """Modules from HEAVY_MODULES that a --no-draw run imports."""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + COMMAND[1:], check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imported = {line.rsplit('|', 1)[-1].strip().split('.')[0] for line in result.stderr.splitlines()}
+    return sorted(imported.intersection(HEAVY_MODULES))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=1.0, help="median wall-time budget in seconds")
+    parser.add_argument('--runs', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    failures = []
+    heavy = heavy_imports()
+    if heavy:
+        failures.append(f"--no-draw run imported {', '.join(heavy)}")
+
+    median = statistics.median(time_runs(args.runs))
+    print(f"CLI --no-draw startup: median {median * 1000:.0f} ms over {args.runs} runs "
+          f"(budget {args.budget * 1000:.0f} ms)")
+    if median > args.budget:
+        failures.append(f"median startup {median:.3f} s exceeds budget {args.budget:.3f} s")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
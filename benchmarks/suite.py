@@ -0,0 +1,283 @@
+"""
+Performance baselines for the solvers, component conversion and drawing.
+
+Every benchmark runs a fixed workload (seeded impedance datasets, so runs are
+comparable across machines and commits) several times and records the median
+wall time, the throughput in items/s and the peak traced memory of one extra
+run under tracemalloc. Results are written as JSON; `compare` flags
+benchmarks whose throughput fell, or whose peak memory grew, by more than the
+threshold relative to a stored baseline (exit code 1).
+
+    python benchmarks/suite.py run --out bench.json [--filter solve] [--repeat 5]
+    python benchmarks/suite.py compare baseline.json bench.json [--threshold 0.10]
+    python benchmarks/suite.py list
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FORMAT = 1
+SEED = 20240101
+
+# Representative single designs: (frequency Hz, Zs, Zl, Q_max)
+CANONICAL = (
+    (100e6, 50, 10 - 25j, 5.0),
+    (433e6, 50, 120 + 40j, 4.0),
+    (2.4e9, 50, 5 - 3j, 8.0),
+    (13.56e6, 50, 2 + 15j, 10.0),
+    (900e6, 75 + 10j, 30 - 60j, 3.0),
+)
+
+def design_dataset(n, seed=SEED):
+    """n seeded designs spanning 1 MHz - 3 GHz, 5-300 ohm loads, +-200 ohm reactances and Q 2-12."""
+    rng = np.random.default_rng(seed)
+    frequency_hz = 10 ** rng.uniform(6, np.log10(3e9), n)
+    z_source = rng.choice([50.0, 75.0, 25.0 + 5j], n)
+    z_load = 10 ** rng.uniform(np.log10(5), np.log10(300), n) + 1j * rng.uniform(-200, 200, n)
+    q_max = rng.uniform(2, 12, n)
+    return frequency_hz, z_source, z_load, q_max
+
+# --- Registry ---
+# A benchmark is a setup function returning (callable, items per call).
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+@contextlib.contextmanager
+def _quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def _scalar_solve(topology):
+    from AssingmentRF import calculate_l_section, calculate_t_section, calculate_pi_section
+
+    def run():
+        with _quiet():
+            for f, zs, zl, q in CANONICAL:
+                if topology == 'L':
+                    calculate_l_section(f, zs, zl, draw=False)
+                elif topology == 'T':
+                    calculate_t_section(f, zs, zl, q, draw=False)
+                else:
+                    calculate_pi_section(f, zs, zl, q, draw=False)
+    return run, len(CANONICAL)
+
+def _batch_solve(topology, n=100000, verify='drop'):
+    from frequency_response import solve_batch
+
+    f, zs, zl, q = design_dataset(n)
+    return (lambda: solve_batch(topology, f, zs, zl, None if topology == 'L' else q, verify)), n
+
+def _verify(topology, n=100000):
+    from frequency_response import solve_batch, verify_batch
+
+    f, zs, zl, q = design_dataset(n)
+    solutions, valid, _ = solve_batch(topology, f, zs, zl, None if topology == 'L' else q, verify=None)
+    return (lambda: verify_batch(topology, solutions, valid, zs, zl)), n
+
+# solve_batch verifies by default; the _unverified and verify_batch entries
+# split out the cost of the check
+for _topology in ('L', 'T', 'Pi'):
+    benchmark(f'solve_scalar_{_topology}')(lambda topology=_topology: _scalar_solve(topology))
+    benchmark(f'solve_batch_{_topology}')(lambda topology=_topology: _batch_solve(topology))
+    benchmark(f'solve_batch_{_topology}_unverified')(lambda topology=_topology: _batch_solve(topology, verify=None))
+    benchmark(f'verify_batch_{_topology}')(lambda topology=_topology: _verify(topology))
+
+@benchmark('solve_scalar_t_pi_math')
+def _bench_t_pi_math():
+    from AssingmentRF import _solve_t_pi_math
+
+    f, zs, zl, q = design_dataset(1000)
+    args = [(s.real, s.imag, l.real, l.imag, qq) for s, l, qq in zip(zs, zl, q)]
+    return (lambda: [_solve_t_pi_math(*a) for a in args]), len(args)
+
+def _q_sweep(topology, points=50000):
+    from frequency_response import solve_batch
+
+    f, zs, zl, _ = CANONICAL[0]
+    q = np.linspace(2, 50, points)
+    return (lambda: solve_batch(topology, f, zs, zl, q)), points
+
+benchmark('q_sweep_T')(lambda: _q_sweep('T'))
+benchmark('q_sweep_Pi')(lambda: _q_sweep('Pi'))
+
+@benchmark('convert_component_strings')
+def _bench_component_strings():
+    from AssingmentRF import get_component_value, get_component_value_from_susceptance
+
+    rng = np.random.default_rng(SEED)
+    reactances = rng.uniform(-500, 500, 2000).tolist()
+    susceptances = rng.uniform(-0.05, 0.05, 2000).tolist()
+    omega = 2 * np.pi * 100e6
+
+    def run():
+        for x in reactances:
+            get_component_value(x, omega)
+        for b in susceptances:
+            get_component_value_from_susceptance(b, omega)
+    return run, len(reactances) + len(susceptances)
+
+@benchmark('convert_element_values_batch')
+def _bench_element_values():
+    from frequency_response import solve_batch
+    from results import element_values
+
+    f, zs, zl, q = design_dataset(100000)
+    solutions, _, omega = solve_batch('T', f, zs, zl, q)
+    return (lambda: element_values('T', solutions, omega)), solutions.shape[0]
+
+@benchmark('ladder_objective_gradient')
+def _bench_ladder_objective():
+    from ladder_optimizer import ladder_objective, ladder_positions
+
+    population, sections, points = 256, 5, 200
+    rng = np.random.default_rng(SEED)
+    positions = ladder_positions(2 * sections, 'shunt')
+    log_magnitude = rng.normal(0, 1, (population, 2 * sections))
+    signs = rng.choice([-1.0, 1.0], log_magnitude.shape)
+    ratio = np.linspace(0.8, 1.2, points)
+    z_source = np.full(points, 50 + 0j)
+    z_load = 10 - 15j / ratio
+    return (lambda: ladder_objective(log_magnitude, signs, positions, ratio, z_source, z_load, 16.0)), \
+        population * points
+
+@benchmark('render_svg')
+def _bench_render_svg():
+    from AssingmentRF import element_kind, get_component_value
+    from frequency_response import LAYOUTS
+    from schematic_render import draw_schematic, schematic_spec
+
+    specs = []
+    for f, zs, zl, _ in CANONICAL:
+        omega = 2 * np.pi * f
+        values = (25.0, -40.0, 60.0)
+        elements = [(element_kind(values[column]), get_component_value(values[column], omega))
+                    for _, _, column in LAYOUTS['T']]
+        specs.append(schematic_spec('T', zs, zl, elements))
+    target = os.path.join(tempfile.mkdtemp(prefix='bench_svg_'), 'diagram.svg')
+    return (lambda: [draw_schematic(spec, target) for spec in specs]), len(specs)
+
+# --- Harness ---
+
+def measure(setup, repeat):
+    """Runs one benchmark: warm-up, `repeat` timed calls, then one call under tracemalloc."""
+    run, items = setup()
+    run()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    median = statistics.median(timings)
+    return {
+        'items': items,
+        'repeat': repeat,
+        'median_s': median,
+        'min_s': min(timings),
+        'throughput': items / median if median > 0 else float('inf'),
+        'peak_bytes': peak,
+    }
+
+def environment():
+    return {
+        'format': FORMAT,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def run_suite(names, repeat):
+    results = {}
+    for name in names:
+        result = measure(BENCHMARKS[name], repeat)
+        results[name] = result
+        print(f"  {name:<30} {result['throughput']:>14,.0f} items/s   "
+              f"{result['median_s'] * 1000:>9.2f} ms   peak {result['peak_bytes'] / 2**20:>8.2f} MiB")
+    return {'environment': environment(), 'results': results}
+
+def compare(baseline, current, threshold):
+    """Returns (report lines, regressions) for benchmarks present in both runs."""
+    lines, regressions = [], []
+    for name, new in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            lines.append(f"  {name:<30} (new)")
+            continue
+        speed = new['throughput'] / old['throughput'] - 1
+        memory = new['peak_bytes'] / old['peak_bytes'] - 1 if old['peak_bytes'] else 0.0
+        flags = []
+        if speed < -threshold:
+            flags.append(f"throughput {speed * 100:+.1f}%")
+        if memory > threshold:
+            flags.append(f"peak memory {memory * 100:+.1f}%")
+        status = "❌ " + ", ".join(flags) if flags else "ok"
+        lines.append(f"  {name:<30} throughput {speed * 100:+7.1f}%   memory {memory * 100:+7.1f}%   {status}")
+        if flags:
+            regressions.append(name)
+    return lines, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help="run benchmarks and write JSON results")
+    run.add_argument('--out', help="JSON results file")
+    run.add_argument('--filter', default='', help="only run benchmarks whose name contains this text")
+    run.add_argument('--repeat', type=int, default=5)
+    cmp = sub.add_parser('compare', help="flag regressions against a baseline")
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--threshold', type=float, default=0.10, help="allowed relative slowdown / memory growth")
+    sub.add_parser('list', help="list benchmark names")
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        print("\n".join(BENCHMARKS))
+        return 0
+    if args.command == 'run':
+        names = [name for name in BENCHMARKS if args.filter in name]
+        report = run_suite(names, args.repeat)
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"{len(names)} results written to {args.out}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    lines, regressions = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,413 @@
+import argparse
+import sys
+
+import numpy as np
+
+from AssingmentRF import (calculate_l_section, calculate_t_section, calculate_pi_section,
+                          nodal_q, q_max_from_spec)
+
+# --- Non-interactive Command Line ---
+# Same calculations as the `main` menu, driven by flags:
+#   python AssingmentRF.py t --freq-mhz 100 --zs 50 --zl 10-25j --q-max 5 --no-draw
+# Plotting and schematic libraries are only imported when a diagram is drawn.
+
+TOPOLOGIES = {'l': 'L', 't': 'T', 'pi': 'Pi'}
+
+def parse_impedance(text):
+    """Parses 'R+Xj', 'R-Xj', 'R' or 'R,X' into a complex impedance."""
+    try:
+        if ',' in text:
+            real_part, imag_part = text.split(',')
+            return complex(float(real_part), float(imag_part))
+        return complex(text.replace(' ', '').replace('i', 'j'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid impedance '{text}' (use R+Xj or R,X)")
+
+def parse_values(tokens, convert=float):
+    """Expands sweep tokens: plain values or 'start:stop:count' linear ranges."""
+    values = []
+    for token in tokens:
+        if token.count(':') == 2:
+            start, stop, count = token.split(':')
+            values.extend(np.linspace(float(start), float(stop), int(count)))
+        else:
+            values.append(convert(token))
+    return np.array(values)
+
+def parse_q_model(text):
+    """A constant unloaded Q, or the path of a Q(f) table file."""
+    try:
+        return float(text)
+    except ValueError:
+        from losses import load_q_table
+        try:
+            return load_q_table(text)
+        except (OSError, ValueError, IndexError):
+            raise argparse.ArgumentTypeError(f"invalid Q '{text}' (use a number or a Q(f) table file)")
+
+def _add_design_args(parser, needs_q):
+    parser.add_argument('--freq-mhz', type=float, required=True, help="operating frequency in MHz")
+    parser.add_argument('--zs', type=parse_impedance, required=True,
+                        help="source impedance, e.g. 50, 25+10j or 25,10 (use --zs=-5j for a leading minus)")
+    parser.add_argument('--zl', type=parse_impedance, required=True, help="load impedance, same format as --zs")
+    if needs_q:
+        q_group = parser.add_mutually_exclusive_group(required=True)
+        q_group.add_argument('--q-max', type=float, help="maximum nodal Q")
+        q_group.add_argument('--q-tot', type=float, help="total network Q (Q_max = 2 * Q_tot)")
+        q_group.add_argument('--bw-mhz', type=float, help="desired bandwidth in MHz (Q_tot = f / BW)")
+    draw_group = parser.add_mutually_exclusive_group()
+    draw_group.add_argument('--no-draw', action='store_true', help="skip circuit diagrams (fastest)")
+    draw_group.add_argument('--show', action='store_true', help="open the diagrams with plt.show()")
+    parser.add_argument('--bandwidth', action='store_true', help="also print the achieved -10 dB bandwidth")
+    parser.add_argument('--snap', choices=('E12', 'E24', 'E96'),
+                        help="also print the best standard-value build of each solution")
+    parser.add_argument('--inductor-q', type=parse_q_model, metavar='Q',
+                        help="also print insertion loss with inductors of this Q (number or Q(f) table file)")
+    parser.add_argument('--capacitor-q', type=parse_q_model, metavar='Q',
+                        help="capacitor Q for the insertion-loss report (number or Q(f) table file)")
+    parser.add_argument('--tolerance', type=float, metavar='PCT',
+                        help="also run a Monte Carlo yield analysis with +-PCT %% parts")
+    parser.add_argument('--samples', type=int, default=100000, help="Monte Carlo samples per solution")
+    parser.add_argument('--spec-rl', type=float, default=10.0, help="yield spec: minimum return loss in dB")
+    parser.add_argument('--seed', type=int, default=0, help="Monte Carlo random seed")
+    parser.add_argument('--output', help="also write all four solutions to a .jsonl, .csv or .npz file")
+    parser.add_argument('--cache', metavar='PATH',
+                        help="memoize solver calls, warming from and saving to this file")
+
+def _add_verify_args(parser):
+    group = parser.add_argument_group('verification')
+    group.add_argument('--verify', choices=('drop', 'flag', 'off'), default='drop',
+                       help="check every solution's conjugate match: drop failures (default), "
+                            "flag them (invalid, values kept) or skip the check")
+    group.add_argument('--verify-tol', type=float, default=None, metavar='GAMMA',
+                       help="largest accepted |Gamma| at the design frequency (default 1e-6)")
+
+def _verify_options(args):
+    return (None if args.verify == 'off' else args.verify), args.verify_tol
+
+def _print_verification(stats, mode):
+    if mode != 'off':
+        action = 'dropped' if mode == 'drop' else 'flagged'
+        print(f"Verification: {stats.checked:,} solutions checked, {stats.failed:,} {action}, "
+              f"max |Γ| error {stats.max_error:.2e}")
+
+def _add_profile_args(parser):
+    group = parser.add_argument_group('profiling')
+    group.add_argument('--profile', action='store_true', help="print per-stage timings and counters")
+    group.add_argument('--trace', metavar='PATH', help="write per-stage events as Chrome-trace JSON")
+    group.add_argument('--cprofile', metavar='PATH', help="run under cProfile, save pstats to PATH")
+    group.add_argument('--tracemalloc', action='store_true', help="report peak memory and top allocation sites")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='AssingmentRF.py',
+                                     description="Passive matching network design tool (non-interactive).")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    _add_design_args(sub.add_parser('l', help="L-section"), needs_q=False)
+    _add_design_args(sub.add_parser('t', help="T-section"), needs_q=True)
+    _add_design_args(sub.add_parser('pi', help="Pi-section"), needs_q=True)
+
+    sweep = sub.add_parser('sweep', help="grid sweep over frequency, Zs, Zl and Q_max")
+    sweep.add_argument('--topology', choices=TOPOLOGIES, required=True)
+    sweep.add_argument('--freq-mhz', nargs='+', required=True, help="values or start:stop:count")
+    sweep.add_argument('--zs', nargs='+', required=True, help="source impedances")
+    sweep.add_argument('--zl', nargs='+', required=True, help="load impedances")
+    sweep.add_argument('--q-max', nargs='+', help="Q_max values or start:stop:count (T/Pi only)")
+    sweep.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    sweep.add_argument('--chunk-size', type=int, default=65536, help="grid points per task")
+    sweep.add_argument('--out', help="write every solution to a .jsonl, .csv or .npz file")
+    sweep.add_argument('--store', help="append the results to a compact memory-mapped result store directory")
+    sweep.add_argument('--float32', action='store_true', help="create the --store in float32 precision")
+    sweep.add_argument('--quiet', action='store_true', help="no progress output")
+    _add_verify_args(sweep)
+
+    batch = sub.add_parser('batch', help="stream a CSV/Parquet design file through the batch solvers")
+    batch.add_argument('--topology', choices=TOPOLOGIES, required=True)
+    batch.add_argument('--input', required=True, help="design file (.csv or .parquet)")
+    batch.add_argument('--out', required=True, help="results file (.csv) or directory (.parquet)")
+    batch.add_argument('--q-max', type=float, help="Q_max for rows without a q_max column (T/Pi)")
+    batch.add_argument('--chunk-rows', type=int, default=65536, help="input rows per chunk")
+    batch.add_argument('--workers', type=int, default=1, help="worker processes (1: solve in-process)")
+    batch.add_argument('--unordered', action='store_true', help="write chunks as they finish, not in input order")
+    batch.add_argument('--resume', action='store_true', help="continue an interrupted run from its checkpoint")
+    batch.add_argument('--quiet', action='store_true', help="no progress output")
+    _add_verify_args(batch)
+
+    table = sub.add_parser('table', help="precompute a normalized solution table for fast lookups")
+    table.add_argument('--topology', choices=TOPOLOGIES, required=True)
+    table.add_argument('--out', required=True, help="table file to write")
+    table.add_argument('--dtype', choices=('float32', 'float64'), default='float32')
+
+    serve = sub.add_parser('serve', help="loopback HTTP/JSON matching service with micro-batching")
+    serve.add_argument('--host', default='127.0.0.1', help="loopback address to bind")
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--window-ms', type=float, default=2.0, help="micro-batch collection window")
+    serve.add_argument('--max-batch', type=int, default=4096, help="designs per batched solve")
+    serve.add_argument('--max-pending', type=int, default=16384,
+                       help="queued designs before requests are rejected with 503")
+
+    stub = sub.add_parser('stub', help="transmission-line matching: quarter-wave, single or double stub")
+    stub.add_argument('--method', choices=('qw', 'single', 'double'), default='single')
+    stub.add_argument('--series', action='store_true', help="series stubs instead of shunt stubs")
+    stub.add_argument('--freq-mhz', type=float, required=True, help="design frequency in MHz")
+    stub.add_argument('--zs', type=parse_impedance, required=True, help="source impedance, e.g. 50 or 50+10j")
+    stub.add_argument('--zl', type=parse_impedance, required=True, help="load impedance, e.g. 10-25j")
+    stub.add_argument('--z0', type=float, default=50.0, help="line and stub characteristic impedance")
+    stub.add_argument('--eps-eff', type=float, default=1.0, help="effective permittivity for physical lengths")
+    stub.add_argument('--spacing-wl', type=float, default=0.125, help="double-stub spacing in wavelengths")
+    stub.add_argument('--d0-wl', type=float, default=0.0, help="load to first stub (double stub), wavelengths")
+    stub.add_argument('--bandwidth', action='store_true', help="also report the achieved -10 dB bandwidth")
+
+    ladder = sub.add_parser('ladder', help="broadband N-section ladder optimized for worst-case in-band match")
+    ladder.add_argument('--f-low-mhz', type=float, required=True, help="lower band edge in MHz")
+    ladder.add_argument('--f-high-mhz', type=float, required=True, help="upper band edge in MHz")
+    ladder.add_argument('--zs', type=parse_impedance, required=True, help="source impedance at the band centre")
+    ladder.add_argument('--zl', type=parse_impedance, required=True, help="load impedance at the band centre")
+    ladder.add_argument('--sections', type=int, default=3, help="number of L-sections in the ladder")
+    ladder.add_argument('--points', type=int, default=200, help="in-band frequency grid points")
+    ladder.add_argument('--population', type=int, default=256, help="parallel random restarts")
+    ladder.add_argument('--iterations', type=int, default=400)
+    ladder.add_argument('--first', choices=('series', 'shunt'), help="element at the source (default: automatic)")
+    ladder.add_argument('--spec-rl', type=float, default=10.0, help="return loss (dB) for the bandwidth figure")
+    ladder.add_argument('--seed', type=int, default=0)
+
+    for subparser in sub.choices.values():
+        _add_profile_args(subparser)
+    return parser
+
+def run_design(args):
+    """Handles the l / t / pi subcommands."""
+    if args.cache:
+        from solver_cache import enable_cache
+        cache = enable_cache()
+        cache.warm(args.cache)
+        try:
+            return _run_design(args)
+        finally:
+            cache.save(args.cache)
+    return _run_design(args)
+
+def _run_design(args):
+    topology = TOPOLOGIES[args.command]
+    frequency_hz = args.freq_mhz * 1e6
+    show = args.show
+    draw = not args.no_draw
+
+    if topology == 'L':
+        calculate_l_section(frequency_hz, args.zs, args.zl, show=show, draw=draw)
+        q_max = None
+    else:
+        min_required_q = max(nodal_q(args.zs), nodal_q(args.zl))
+        if min_required_q == float('inf'):
+            print("❌ Error: Cannot match with a T or Pi network when Rs or Rl is zero.", file=sys.stderr)
+            return 2
+        try:
+            q_max = q_max_from_spec(args.freq_mhz, args.q_max, args.q_tot, args.bw_mhz)
+        except ValueError as exc:
+            print(f"❌ Error: {exc}", file=sys.stderr)
+            return 2
+        if q_max < min_required_q:
+            print(f"❌ ERROR: Specified Q_max ({q_max:.2f}) is too low. "
+                  f"It must be >= {min_required_q:.2f}.", file=sys.stderr)
+            return 2
+        calculate = calculate_t_section if topology == 'T' else calculate_pi_section
+        calculate(frequency_hz, args.zs, args.zl, q_max, show=show, draw=draw)
+
+    if args.bandwidth:
+        from frequency_response import print_bandwidth_report
+        print_bandwidth_report(topology, frequency_hz, args.zs, args.zl, q_max)
+    if args.snap:
+        from component_snap import print_snap_report
+        print_snap_report(topology, frequency_hz, args.zs, args.zl, q_max, args.snap)
+    if args.inductor_q is not None or args.capacitor_q is not None:
+        from losses import print_loss_report
+        print_loss_report(topology, frequency_hz, args.zs, args.zl, q_max, args.inductor_q, args.capacitor_q)
+    if args.tolerance is not None:
+        from tolerance import print_yield_report
+        print_yield_report(topology, frequency_hz, args.zs, args.zl, q_max, args.tolerance / 100,
+                           args.samples, args.spec_rl, args.seed)
+    if args.output:
+        from frequency_response import solve_batch
+        from results import records_from_batch, write_records
+        solutions, valid, _ = solve_batch(topology, frequency_hz, args.zs, args.zl, q_max)
+        count = write_records(records_from_batch(topology, frequency_hz, args.zs, args.zl,
+                                                 solutions, valid, q_max), args.output)
+        print(f"{count} solutions written to {args.output}")
+    return 0
+
+def run_sweep_command(args):
+    """Handles the sweep subcommand."""
+    from sweep import run_sweep
+
+    topology = TOPOLOGIES[args.topology]
+    if topology != 'L' and not args.q_max:
+        print(f"❌ Error: {topology}-section sweeps need --q-max.", file=sys.stderr)
+        return 2
+    try:
+        frequency_hz = parse_values(args.freq_mhz) * 1e6
+        z_source = parse_values(args.zs, parse_impedance)
+        z_load = parse_values(args.zl, parse_impedance)
+        q_max = parse_values(args.q_max) if args.q_max else None
+    except (ValueError, argparse.ArgumentTypeError) as exc:
+        print(f"❌ Error: {exc}", file=sys.stderr)
+        return 2
+
+    verify, tolerance = _verify_options(args)
+    with run_sweep(topology, frequency_hz, z_source, z_load, q_max, workers=args.workers,
+                   chunk_size=args.chunk_size, progress=not args.quiet, verify=verify,
+                   tolerance=tolerance) as result:
+        print(f"{topology}-section sweep: {result.points:,} points in {result.elapsed_s:.2f} s "
+              f"({result.points_per_second:,.0f} points/s), "
+              f"{result.valid.any(axis=-1).mean() * 100:.1f}% matchable")
+        _print_verification(result.verification, args.verify)
+        if args.out:
+            from results import write_records
+            count = write_records(result.iter_records(args.chunk_size), args.out)
+            print(f"{count:,} solutions written to {args.out}")
+        if args.store:
+            try:
+                store = result.write_store(args.store, 'float32' if args.float32 else None, args.chunk_size)
+            except ValueError as exc:
+                print(f"❌ Error: {exc}", file=sys.stderr)
+                return 2
+            print(f"{len(store):,} designs in {args.store} ({store.nbytes / 2**20:.2f} MiB, {store.precision})")
+    return 0
+
+def run_batch_command(args):
+    """Handles the batch subcommand."""
+    from batch_pipeline import run_pipeline
+
+    verify, tolerance = _verify_options(args)
+    try:
+        result = run_pipeline(args.input, args.out, TOPOLOGIES[args.topology], args.q_max, args.chunk_rows,
+                              args.workers, ordered=not args.unordered, resume=args.resume,
+                              progress=not args.quiet, verify=verify, tolerance=tolerance)
+    except (ValueError, ImportError) as exc:
+        print(f"❌ Error: {exc}", file=sys.stderr)
+        return 2
+    resumed = f" ({result.resumed_rows:,} from an earlier run)" if result.resumed_rows else ""
+    print(f"{result.topology}-section batch: {result.rows:,} rows{resumed} -> {result.records:,} records "
+          f"in {result.elapsed_s:.2f} s ({result.rows_per_second:,.0f} rows/s), written to {args.out}")
+    _print_verification(result.verification, args.verify)
+    return 0
+
+def run_table_command(args):
+    """Handles the table subcommand."""
+    from solution_table import build_table
+
+    topology = TOPOLOGIES[args.topology]
+    points, elapsed = build_table(args.out, topology, dtype=args.dtype)
+    print(f"{topology}-section table: {points:,} grid points written to {args.out} in {elapsed:.2f} s")
+    return 0
+
+def run_serve_command(args):
+    """Handles the serve subcommand."""
+    import asyncio
+    from service import serve
+
+    ready = lambda port: print(f"Matching service listening on http://{args.host}:{port} "
+                               f"(window {args.window_ms:g} ms, max batch {args.max_batch})", flush=True)
+    try:
+        asyncio.run(serve(args.host, args.port, args.window_ms / 1e3, args.max_batch, args.max_pending, ready))
+    except ValueError as exc:
+        print(f"❌ Error: {exc}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def run_stub_command(args):
+    """Handles the stub subcommand."""
+    from stub_matching import calculate_stub_section, print_distributed_bandwidth_report
+
+    position = 'Series' if args.series else 'Shunt'
+    topology = {'qw': 'QW', 'single': f'Stub{position}', 'double': f'DoubleStub{position}'}[args.method]
+    options = {'spacing_wl': args.spacing_wl, 'd0_wl': args.d0_wl} if args.method == 'double' else {}
+    frequency_hz = args.freq_mhz * 1e6
+    results = calculate_stub_section(frequency_hz, args.zs, args.zl, topology, args.z0, args.eps_eff, **options)
+    if results and args.bandwidth:
+        print_distributed_bandwidth_report(topology, frequency_hz, args.zs, args.zl, args.z0, **options)
+    return 0
+
+def run_ladder_command(args):
+    """Handles the ladder subcommand."""
+    from ladder_optimizer import optimize_ladder, print_ladder_report
+
+    if not 0 < args.f_low_mhz < args.f_high_mhz:
+        print("❌ Error: Need 0 < --f-low-mhz < --f-high-mhz.", file=sys.stderr)
+        return 2
+    try:
+        result = optimize_ladder(args.f_low_mhz * 1e6, args.f_high_mhz * 1e6, args.zs, args.zl,
+                                 sections=args.sections, points=args.points, population=args.population,
+                                 iterations=args.iterations, first=args.first, seed=args.seed)
+    except ValueError as exc:
+        print(f"❌ Error: {exc}", file=sys.stderr)
+        return 2
+    print_ladder_report(result, args.zs, args.zl, args.spec_rl)
+    return 0
+
+def run_profiled(args, handler):
+    """Runs handler(args) with the requested instrumentation, then reports it."""
+    profiler = None
+    if args.profile or args.trace:
+        from profiling import enable_profiling
+        profiler = enable_profiling(trace=bool(args.trace))
+    if args.tracemalloc:
+        import tracemalloc
+        tracemalloc.start()
+    profile = None
+    if args.cprofile:
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+
+    try:
+        status = handler(args)
+        if 'schematic_render' in sys.modules:
+            # Background renders are part of the run being measured
+            sys.modules['schematic_render'].shutdown_renderer()
+    finally:
+        if profile is not None:
+            profile.disable()
+        if args.tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"\ntracemalloc: peak {peak / 2**20:.2f} MiB; top allocation sites:")
+            for stat in snapshot.statistics('lineno')[:10]:
+                print(f"  {stat}")
+        if profile is not None:
+            import pstats
+            profile.dump_stats(args.cprofile)
+            print(f"\ncProfile stats saved to {args.cprofile}; top functions by cumulative time:")
+            pstats.Stats(profile).sort_stats('cumulative').print_stats(15)
+        if profiler is not None:
+            from profiling import disable_profiling
+            disable_profiling()
+            if args.profile:
+                print("\n" + profiler.format_summary())
+            if args.trace:
+                events = profiler.write_trace(args.trace)
+                print(f"{events} trace events written to {args.trace}")
+    return status
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'sweep':
+        handler = run_sweep_command
+    elif args.command == 'batch':
+        handler = run_batch_command
+    elif args.command == 'table':
+        handler = run_table_command
+    elif args.command == 'serve':
+        handler = run_serve_command
+    elif args.command == 'stub':
+        handler = run_stub_command
+    elif args.command == 'ladder':
+        handler = run_ladder_command
+    else:
+        handler = run_design
+    return run_profiled(args, handler)
+
+if __name__ == "__main__":
+    sys.exit(main())
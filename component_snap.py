@@ -0,0 +1,154 @@
+import numpy as np
+
+from frequency_response import design_point_response
+
+# --- Standard-Value Component Snapping ---
+# Ideal L/C values are snapped to a purchasable table (E-series decades or a
+# vendor list). Every element has a lower and an upper neighbour in the
+# sorted table (found with np.searchsorted), so an n-element network has 2**n
+# candidate builds (4 for L, 8 for T/Pi). All candidates of all solutions are
+# re-evaluated at the design frequency in one batched ABCD pass and the one
+# with the best return loss is kept.
+
+E_SERIES = {
+    'E12': (1.0, 1.2, 1.5, 1.8, 2.2, 2.7, 3.3, 3.9, 4.7, 5.6, 6.8, 8.2),
+    'E24': (1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7, 3.0,
+            3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1),
+    'E96': tuple(v / 100 for v in (
+        100, 102, 105, 107, 110, 113, 115, 118, 121, 124, 127, 130, 133, 137, 140, 143,
+        147, 150, 154, 158, 162, 165, 169, 174, 178, 182, 187, 191, 196, 200, 205, 210,
+        215, 221, 226, 232, 237, 243, 249, 255, 261, 267, 274, 280, 287, 294, 301, 309,
+        316, 324, 332, 340, 348, 357, 365, 374, 383, 392, 402, 412, 422, 432, 442, 453,
+        464, 475, 487, 499, 511, 523, 536, 549, 562, 576, 590, 604, 619, 634, 649, 665,
+        681, 698, 715, 732, 750, 768, 787, 806, 825, 845, 866, 887, 909, 931, 953, 976)),
+}
+
+# Default decade spans: 0.1 nH - 1 mH and 0.1 pF - 1 uF
+INDUCTOR_RANGE_H = (1e-10, 1e-3)
+CAPACITOR_RANGE_F = (1e-13, 1e-6)
+
+def standard_values(series, min_value, max_value):
+    """Sorted array of every E-series value between min_value and max_value."""
+    mantissas = np.asarray(E_SERIES[series])
+    decades = 10.0 ** np.arange(np.floor(np.log10(min_value)), np.ceil(np.log10(max_value)) + 1)
+    values = np.round((decades[:, None] * mantissas).ravel(), 15)
+    values = values[(values >= min_value * (1 - 1e-9)) & (values <= max_value * (1 + 1e-9))]
+    return np.unique(values)
+
+def load_value_table(path):
+    """Reads a vendor value list (one value per line or comma separated, SI units; '#' comments)."""
+    values = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            values.extend(float(v) for v in line.replace(',', ' ').split())
+    return np.unique(np.asarray(values, dtype=float))
+
+def value_tables(series='E24', inductors=None, capacitors=None):
+    """(inductor table, capacitor table); explicit vendor arrays override the E-series."""
+    if inductors is None:
+        inductors = standard_values(series, *INDUCTOR_RANGE_H)
+    if capacitors is None:
+        capacitors = standard_values(series, *CAPACITOR_RANGE_F)
+    return np.sort(np.asarray(inductors, dtype=float)), np.sort(np.asarray(capacitors, dtype=float))
+
+def neighbours(table, values):
+    """(lower, upper) table entries around each value, clipped to the table ends."""
+    idx = np.searchsorted(table, values)
+    lower = table[np.clip(idx - 1, 0, len(table) - 1)]
+    upper = table[np.clip(idx, 0, len(table) - 1)]
+    return lower, upper
+
+def _domain(topology):
+    return 'B' if topology == 'Pi' else 'X'
+
+def snap_solutions(topology, solutions, frequency_hz, z_source, z_load, series='E24',
+                   inductors=None, capacitors=None, chunk_size=65536):
+    """
+    (BATCH) Snaps every solve_*_batch solution to standard values.
+    Returns a dict of arrays shaped like the input (designs x 4 solutions):
+      'solutions'      snapped values in the solver's own format
+      'values'         snapped component values (H for inductors, F for capacitors)
+      'is_inductor'    True where an element is an inductor
+      'return_loss_db' return loss of the snapped network at the design frequency
+    NaN solutions stay NaN; zero-valued elements (wires/opens) are kept as is.
+    Designs are processed `chunk_size` at a time to bound the candidate arrays.
+    """
+    tables = value_tables(series, inductors, capacitors)
+    solutions = np.asarray(solutions, dtype=float)
+    design_shape = solutions.shape[:-2]
+    n = int(np.prod(design_shape))
+    if n <= chunk_size:
+        return _snap_chunk(topology, solutions, frequency_hz, z_source, z_load, tables)
+
+    flat = lambda a, dtype: np.broadcast_to(np.asarray(a, dtype=dtype), design_shape).reshape(n)
+    solutions = solutions.reshape((n,) + solutions.shape[-2:])
+    frequency_hz, z_source, z_load = flat(frequency_hz, float), flat(z_source, complex), flat(z_load, complex)
+    parts = [_snap_chunk(topology, solutions[i:i + chunk_size], frequency_hz[i:i + chunk_size],
+                         z_source[i:i + chunk_size], z_load[i:i + chunk_size], tables)
+             for i in range(0, n, chunk_size)]
+    return {key: np.concatenate([p[key] for p in parts]).reshape(design_shape + parts[0][key].shape[1:])
+            for key in parts[0]}
+
+def _snap_chunk(topology, solutions, frequency_hz, z_source, z_load, tables):
+    inductor_table, capacitor_table = tables
+    frequency_hz = np.asarray(frequency_hz, dtype=float)
+    omega = 2 * np.pi * frequency_hz[..., None, None]
+    domain = _domain(topology)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        X = solutions if domain == 'X' else -1 / solutions
+        is_inductor = X > 0
+        ideal = np.where(is_inductor, X / omega, -1 / (omega * X))
+        lower_l, upper_l = neighbours(inductor_table, np.where(is_inductor, ideal, inductor_table[0]))
+        lower_c, upper_c = neighbours(capacitor_table, np.where(is_inductor, capacitor_table[0], ideal))
+        lower = np.where(is_inductor, lower_l, lower_c)
+        upper = np.where(is_inductor, upper_l, upper_c)
+        keep = ~np.isfinite(ideal) | (X == 0)
+
+        # Candidate axis first: bit j of the candidate index picks the upper value of column j
+        k = solutions.shape[-1]
+        bits = (np.arange(2 ** k)[:, None] >> np.arange(k)) & 1
+        bits = bits.reshape((2 ** k,) + (1,) * (solutions.ndim - 1) + (k,)).astype(bool)
+        values = np.where(bits, upper, lower)
+        values = np.where(keep, ideal, values)
+        X_snapped = np.where(is_inductor, omega * values, -1 / (omega * values))
+        X_snapped = np.where(keep, X, X_snapped)
+        candidates = X_snapped if domain == 'X' else -1 / X_snapped
+
+    response = design_point_response(topology, candidates, z_source, z_load)
+    return_loss = np.nan_to_num(response['return_loss_db'], nan=-np.inf)
+
+    best = np.argmax(return_loss, axis=0)
+    pick = lambda a: np.take_along_axis(a, best[None, ..., None], axis=0)[0]
+    snapped = pick(candidates)
+    invalid = np.isnan(solutions).any(axis=-1)
+    snapped[invalid] = np.nan
+    best_rl = np.take_along_axis(return_loss, best[None], axis=0)[0]
+    return {
+        'solutions': snapped,
+        'values': np.where(invalid[..., None], np.nan, pick(values)),
+        'is_inductor': is_inductor,
+        'return_loss_db': np.where(invalid | np.isneginf(best_rl), np.nan, best_rl),
+    }
+
+def print_snap_report(topology, frequency_hz, z_source, z_load, q_max=None, series='E24'):
+    """Prints the best standard-value build of every valid solution of one design."""
+    from AssingmentRF import get_component_value, get_component_value_from_susceptance
+    from frequency_response import LAYOUTS, solve_batch
+    from results import layout_for
+
+    solutions, valid, omega = solve_batch(topology, frequency_hz, z_source, z_load, q_max)
+    snapped = snap_solutions(topology, solutions, frequency_hz, z_source, z_load, series)
+    convert = get_component_value_from_susceptance if topology == 'Pi' else get_component_value
+
+    print("\n-------------------------------------------")
+    print(f" {series} Standard-Value Builds ({topology}-Section, source -> load)")
+    print("-------------------------------------------")
+    # Same numbering as print_bandwidth_report
+    for sol_num, k in enumerate(np.flatnonzero(valid), start=1):
+        if topology == 'L':
+            sol_num = k + 1
+        columns = [column for _, _, column in LAYOUTS[layout_for(topology, k)]]
+        comps = ", ".join(convert(snapped['solutions'][k, column], omega) for column in columns)
+        print(f"  Solution {sol_num}: {comps} -> RL = {snapped['return_loss_db'][k]:.1f} dB")
@@ -0,0 +1,304 @@
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from AssingmentRF import solve_l_section_batch, solve_t_section_batch, solve_pi_section_batch
+from profiling import count, stage
+from solver_cache import active_cache, memoize
+
+# --- Network Layouts ---
+# Each topology is a ladder of elements listed from SOURCE to LOAD as
+# (position, domain, column): position is 'series' or 'shunt', domain is
+# 'X' (reactance, ohms) or 'B' (susceptance, siemens) and column indexes the
+# last axis of the batch solutions returned by the solve_*_batch functions.
+LAYOUTS = {
+    'L_shunt_source': (('shunt', 'X', 0), ('series', 'X', 1)),
+    'L_shunt_load': (('series', 'X', 1), ('shunt', 'X', 0)),
+    'T': (('series', 'X', 0), ('shunt', 'X', 2), ('series', 'X', 1)),
+    'Pi': (('shunt', 'B', 0), ('series', 'B', 2), ('shunt', 'B', 1)),
+}
+
+BATCH_SOLVERS = {
+    'L': solve_l_section_batch,
+    'T': solve_t_section_batch,
+    'Pi': solve_pi_section_batch,
+}
+
+def solve_batch(topology, frequency_hz, z_source, z_load, q_max=None, verify='drop', tolerance=None):
+    """
+    Dispatches to the L/T/Pi batch solver. Returns (solutions, valid, omega).
+    Every solution is checked with verify_batch (verify='drop' or 'flag',
+    None to skip; tolerance defaults to VERIFY_TOLERANCE).
+    Single-design (all-scalar) queries go through the solver cache when enabled.
+    """
+    with stage('solve_batch'):
+        if active_cache() is not None and all(np.ndim(v) == 0 for v in (frequency_hz, z_source, z_load, q_max)):
+            return memoize('batch_' + topology, _solve_batch, topology, float(frequency_hz), complex(z_source),
+                           complex(z_load), None if q_max is None else float(q_max), verify, tolerance)
+        return _solve_batch(topology, frequency_hz, z_source, z_load, q_max, verify, tolerance)
+
+def _solve_batch(topology, frequency_hz, z_source, z_load, q_max=None, verify=None, tolerance=None):
+    if topology == 'L':
+        solutions, valid, omega = solve_l_section_batch(frequency_hz, z_source, z_load)
+    elif q_max is None:
+        raise ValueError(f"{topology}-section matching needs a Q_max.")
+    else:
+        solutions, valid, omega = BATCH_SOLVERS[topology](frequency_hz, z_source, z_load, q_max)
+    if verify:
+        solutions, valid, _ = verify_batch(topology, solutions, valid, z_source, z_load, tolerance, verify)
+    return solutions, valid, omega
+
+def slot_layouts(topology):
+    """Returns [(slot slice, layout)] covering the 4 solution slots of a topology."""
+    if topology == 'L':
+        return [(slice(0, 2), LAYOUTS['L_shunt_source']), (slice(2, 4), LAYOUTS['L_shunt_load'])]
+    return [(slice(0, 4), LAYOUTS[topology])]
+
+# --- Element Models ---
+
+def scale_immittance(value, omega0, omega):
+    """
+    Moves a design reactance/susceptance from omega0 to omega.
+    Positive values (L reactance, C susceptance) grow with frequency,
+    negative values (C reactance, L susceptance) shrink with it.
+    """
+    ratio = omega / omega0
+    return np.where(value > 0, value * ratio, value / ratio)
+
+def element_immittance(position, domain, value, q=None):
+    """
+    Series elements return an impedance Z, shunt elements an admittance Y.
+    q: optional (inductor Q, capacitor Q), broadcastable to `value`. A finite Q
+    adds a series resistance |X|/Q to X-domain elements and a parallel
+    conductance |B|/Q to B-domain elements.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = 1j * value
+        if q is not None:
+            inductive = value > 0 if domain == 'X' else value < 0
+            w = w + np.abs(value) / np.where(inductive, q[0], q[1])
+        if (position == 'series') == (domain == 'X'):
+            return w
+        return 1 / w
+
+def cascade_abcd(elements):
+    """
+    Cascades (position, immittance) pairs from source to load.
+    Immittances may be any broadcastable arrays; returns (A, B, C, D).
+    A 'line' element takes (characteristic impedance, electrical length in
+    radians) instead of an immittance.
+    """
+    A, B, C, D = 1 + 0j, 0j, 0j, 1 + 0j
+    for position, w in elements:
+        if position == 'series':
+            B = A * w + B
+            D = C * w + D
+        elif position == 'line':
+            z0, theta = w
+            cos, jsin = np.cos(theta), 1j * np.sin(theta)
+            A, B = A * cos + B * jsin / z0, A * jsin * z0 + B * cos
+            C, D = C * cos + D * jsin / z0, C * jsin * z0 + D * cos
+        else:
+            A = A + B * w
+            C = C + D * w
+    return tuple(np.broadcast_arrays(A, B, C, D))
+
+def network_abcd(topology, solutions, omega0, omega, q=None):
+    """
+    Evaluates every solution's ABCD matrix over a frequency grid in one pass.
+    solutions: (..., 4, k) from a solve_*_batch call, omega0: (...) design
+    angular frequency, omega: (F,) grid. q: optional (inductor Q, capacitor Q)
+    for lossy elements (see element_immittance), each broadcastable to
+    (..., 4, F). Returns (A, B, C, D), each (..., 4, F).
+    """
+    solutions = np.asarray(solutions, dtype=float)
+    omega0 = np.asarray(omega0, dtype=float)[..., None, None]
+    omega = np.asarray(omega, dtype=float)
+    parts = []
+    for slots, layout in slot_layouts(topology):
+        values = solutions[..., slots, :]
+        elements = [(position, element_immittance(position, domain,
+                                                  scale_immittance(values[..., column, None], omega0, omega), q))
+                    for position, domain, column in layout]
+        parts.append(cascade_abcd(elements))
+    return tuple(np.concatenate(p, axis=-2) for p in zip(*parts))
+
+# --- Verification ---
+# A solution is checked by cascading its elements between Zs and Zl at the
+# design frequency and measuring how far the input impedance is from the
+# conjugate of Zs, as the power-wave |Gamma|. The closed-form solvers land at
+# ~1e-15 for healthy designs; near-singular denominators (the 1e-9 guards)
+# and Rs ~ Rl cases that slip through show up as errors many orders larger.
+
+VERIFY_TOLERANCE = 1e-6
+
+@dataclass(slots=True)
+class VerificationStats:
+    """Running totals of verify_batch calls; max_error is over the valid solutions checked."""
+    checked: int = 0
+    failed: int = 0
+    max_error: float = 0.0
+
+    def merge(self, other):
+        self.checked += other.checked
+        self.failed += other.failed
+        self.max_error = max(self.max_error, other.max_error)
+
+_verification = VerificationStats()
+_verification_lock = threading.Lock()
+
+def verification_stats():
+    """Copy of the process-wide verification totals."""
+    with _verification_lock:
+        return VerificationStats(_verification.checked, _verification.failed, _verification.max_error)
+
+def reset_verification_stats():
+    """Returns the process-wide verification totals and starts new ones."""
+    global _verification
+    with _verification_lock:
+        stats, _verification = _verification, VerificationStats()
+    return stats
+
+def match_error(topology, solutions, z_source, z_load):
+    """
+    (BATCH) Conjugate-match error |Zin - Zs*| / |Zin + Zs| of every solution
+    at its design frequency, with Zin looking into the network terminated by
+    Zl. Returns (..., 4); NaN for NaN solutions.
+    """
+    solutions = np.asarray(solutions, dtype=float)
+    z_source = np.asarray(z_source, dtype=complex)[..., None]
+    z_load = np.asarray(z_load, dtype=complex)[..., None]
+    errors = []
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for slots, layout in slot_layouts(topology):
+            values = solutions[..., slots, :]
+            A, B, C, D = cascade_abcd([(position, element_immittance(position, domain, values[..., column]))
+                                       for position, domain, column in layout])
+            z_in = (A * z_load + B) / (C * z_load + D)
+            errors.append(np.abs((z_in - np.conj(z_source)) / (z_in + z_source)))
+    return np.concatenate(errors, axis=-1)
+
+def verify_batch(topology, solutions, valid, z_source, z_load, tolerance=None, mode='drop', stats=None):
+    """
+    (BATCH) Checks every valid solution with match_error. Solutions whose
+    error exceeds `tolerance` (default VERIFY_TOLERANCE) or cannot be
+    evaluated become invalid; mode='drop' also sets them to NaN, mode='flag'
+    keeps their values. Returns (solutions, valid, error); the process-wide
+    totals are in verification_stats(), and this call's totals are also
+    merged into `stats` (a VerificationStats) when given.
+    """
+    if mode not in ('drop', 'flag'):
+        raise ValueError(f"Unknown verification mode '{mode}'. Use 'drop' or 'flag'.")
+    tolerance = VERIFY_TOLERANCE if tolerance is None else tolerance
+    error = match_error(topology, solutions, z_source, z_load)
+    failed = valid & ~(error <= tolerance)
+    n_checked, n_failed = int(np.count_nonzero(valid)), int(np.count_nonzero(failed))
+    worst = float(np.max(np.where(valid, np.where(np.isnan(error), np.inf, error), 0.0), initial=0.0))
+    totals = VerificationStats(n_checked, n_failed, worst)
+    with _verification_lock:
+        _verification.merge(totals)
+    if stats is not None:
+        stats.merge(totals)
+    count('solutions_verified', n_checked)
+    if n_failed:
+        count('solutions_rejected', n_failed)
+        valid = valid & ~failed
+        if mode == 'drop':
+            solutions = np.where(failed[..., None], np.nan, solutions)
+    return solutions, valid, error
+
+# --- Frequency Response ---
+
+def frequency_response(topology, solutions, frequency_hz, z_source, z_load, freq_grid_hz):
+    """
+    (BATCH) Input impedance, reflection coefficient, return loss and VSWR of
+    every solution over a frequency grid. Zs and Zl broadcast against the
+    design shape (...) and are held constant across the grid.
+    Returns a dict of (..., 4, F) arrays.
+    """
+    omega0 = 2 * np.pi * np.asarray(frequency_hz, dtype=float)
+    omega = 2 * np.pi * np.asarray(freq_grid_hz, dtype=float)
+    return abcd_response(network_abcd(topology, solutions, omega0, omega), z_source, z_load)
+
+def abcd_response(abcd, z_source, z_load):
+    """
+    Input impedance, reflection coefficient, return loss and VSWR of
+    (..., S, F) ABCD arrays between Zs and Zl (broadcast against (...)).
+    """
+    A, B, C, D = abcd
+    z_source = np.asarray(z_source, dtype=complex)[..., None, None]
+    z_load = np.asarray(z_load, dtype=complex)[..., None, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_in = (A * z_load + B) / (C * z_load + D)
+        # Power-wave reflection seen by a (possibly complex) source
+        gamma = (z_in - np.conj(z_source)) / (z_in + z_source)
+        mag = np.minimum(np.abs(gamma), 1.0)
+        return_loss_db = -20 * np.log10(mag)
+        vswr = (1 + mag) / (1 - mag)
+    return {
+        'z_in': z_in,
+        'gamma': gamma,
+        'return_loss_db': return_loss_db,
+        'vswr': vswr,
+    }
+
+def design_point_response(topology, solutions, z_source, z_load):
+    """
+    (BATCH) frequency_response at each design's own frequency, where every
+    element takes exactly its solved value. Returns a dict of (..., 4) arrays.
+    """
+    response = frequency_response(topology, solutions, 1.0, z_source, z_load, [1.0])
+    return {key: value[..., 0] for key, value in response.items()}
+
+def matched_bandwidth(freq_grid_hz, return_loss_db, frequency_hz, threshold_db=10.0):
+    """
+    Contiguous band around the design frequency where return loss >= threshold.
+    Returns (bandwidth_hz, f_low, f_high), each (..., 4); NaN where the design
+    frequency itself is not matched. Edges are limited to the grid span.
+    """
+    freq_grid_hz = np.asarray(freq_grid_hz, dtype=float)
+    n = freq_grid_hz.size
+    frequency_hz = np.asarray(frequency_hz, dtype=float)
+    i0 = np.clip(np.searchsorted(freq_grid_hz, frequency_hz), 0, n - 1)
+    i0 = i0[..., None, None]
+
+    idx = np.arange(n)
+    failed = ~(np.asarray(return_loss_db) >= threshold_db)
+    low = np.where(failed & (idx < i0), idx, -1).max(axis=-1) + 1
+    high = np.where(failed & (idx > i0), idx, n).min(axis=-1) - 1
+    matched = ~np.take_along_axis(failed, np.broadcast_to(i0, failed.shape[:-1] + (1,)), axis=-1)[..., 0]
+
+    f_low = np.where(matched, freq_grid_hz[low], np.nan)
+    f_high = np.where(matched, freq_grid_hz[np.maximum(high, 0)], np.nan)
+    return f_high - f_low, f_low, f_high
+
+def print_bandwidth_report(topology, frequency_hz, z_source, z_load, q_max=None, threshold_db=10.0, points=20001):
+    """
+    Prints the achieved bandwidth of every verified solution next to the Q
+    spec from `main`; prints nothing when there is none.
+    """
+    solutions, listed, _ = solve_batch(topology, frequency_hz, z_source, z_load, q_max, verify=None)
+    solutions, valid, _ = verify_batch(topology, solutions, listed, z_source, z_load)
+    # Numbers match the console output: L solutions keep their fixed slots
+    # 1-4, calculate_t_section / calculate_pi_section count every solution the
+    # solver found, including ones verification drops here
+    numbers = np.arange(1, 5) if topology == 'L' else np.cumsum(listed)
+    freq_grid = np.linspace(0.5 * frequency_hz, 1.5 * frequency_hz, points)
+    response = frequency_response(topology, solutions, frequency_hz, z_source, z_load, freq_grid)
+    bandwidth, f_low, f_high = matched_bandwidth(freq_grid, response['return_loss_db'], frequency_hz, threshold_db)
+    reported = np.flatnonzero(valid & ~np.isnan(bandwidth))
+    if not len(reported):
+        return
+
+    print("\n-------------------------------------------")
+    print(f" Achieved -{threshold_db:g} dB Bandwidth ({topology}-Section)")
+    if q_max is not None:
+        q_tot = q_max / 2
+        print(f" Requested: Q_tot = {q_tot:.2f} -> BW = {frequency_hz / q_tot / 1e6:.3f} MHz")
+    print("-------------------------------------------")
+    for k in reported:
+        at_edge = f_low[k] <= freq_grid[0] or f_high[k] >= freq_grid[-1]
+        print(f"  Solution {numbers[k]}: BW {'>= ' if at_edge else ''}{bandwidth[k] / 1e6:.3f} MHz "
+              f"({f_low[k] / 1e6:.3f} - {f_high[k] / 1e6:.3f} MHz), Q_loaded = {frequency_hz / bandwidth[k]:.2f}")
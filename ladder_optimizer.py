@@ -0,0 +1,351 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from AssingmentRF import (get_component_value, get_component_value_from_susceptance,
+                          nodal_q, solve_l_section_batch, solve_t_section_batch, solve_pi_section_batch)
+from frequency_response import matched_bandwidth, scale_immittance
+from profiling import stage
+
+# --- Broadband N-Section Ladder Synthesis ---
+# A ladder of 2N alternating series / shunt reactive elements (N L-sections),
+# listed from SOURCE to LOAD. Series elements are stored as reactances X
+# (ohms), shunt elements as susceptances B (siemens), both at the band centre
+# f0 and scaled with frequency like the lumped solvers (scale_immittance).
+#
+# The whole population of random restarts is optimized at once: each member
+# is a (P, 2N) row of log-magnitudes with a fixed sign (component kind) per
+# element, and every iteration is one vectorized (P, F) pass over the ladder
+# plus an adjoint pass that gives the exact gradient of |Gamma|^2 at every
+# grid frequency for every element. The worst-case in-band reflection is
+# minimized through a p-norm of |Gamma|^2 whose exponent is raised as the
+# optimization proceeds (Adam on the log-magnitudes).
+#
+# Seeds come from the closed-form solvers: stepped L-sections through
+# geometrically spaced intermediate resistances, and single T / Pi sections
+# (padded with near-zero elements) over a range of Q_max. The rest of the
+# population is jittered copies of the seeds and fully random ladders.
+
+@dataclass(slots=True)
+class LadderResult:
+    """Best ladder found; `values` are X (series) / B (shunt) at f0, source to load."""
+    positions: tuple
+    values: np.ndarray
+    center_hz: float
+    freq_grid_hz: np.ndarray
+    gamma: np.ndarray
+    worst_gamma: float
+    worst_return_loss_db: float
+    single_section_return_loss_db: float
+    load_q: float
+    bode_fano_gamma: float
+    population: int
+    iterations: int
+    elapsed_s: float
+
+def ladder_positions(elements, first='series'):
+    """Alternating positions of a ladder starting with `first` at the source."""
+    other = 'shunt' if first == 'series' else 'series'
+    return tuple(first if k % 2 == 0 else other for k in range(elements))
+
+def equivalent_impedance(z, center_hz, freq_grid_hz):
+    """
+    Impedance over the grid. A scalar is taken as a series R + L (or R + C)
+    equivalent at center_hz; an array already sampled on the grid is used as is.
+    """
+    z = np.asarray(z, dtype=complex)
+    if z.ndim:
+        return z
+    ratio = np.asarray(freq_grid_hz, dtype=float) / center_hz
+    return z.real + 1j * scale_immittance(z.imag, 1.0, ratio)
+
+def bode_fano_gamma(load_q, fractional_bandwidth):
+    """
+    Smallest constant in-band |Gamma| the Bode-Fano criterion allows for a
+    load of quality factor load_q over a fractional bandwidth (rectangular
+    passband, narrowband form): exp(-pi / (Q * FBW)).
+    """
+    with np.errstate(divide='ignore', over='ignore'):
+        return np.exp(-np.pi / (np.asarray(load_q, dtype=float) * fractional_bandwidth))
+
+def bode_fano_bandwidth(load_q, gamma, center_hz):
+    """Widest band (Hz) over which |Gamma| <= gamma is possible for the load (Bode-Fano)."""
+    with np.errstate(divide='ignore'):
+        return np.pi * center_hz / (load_q * np.log(1 / np.asarray(gamma, dtype=float)))
+
+# --- Batched Evaluation and Gradient ---
+
+def ladder_immittances(log_magnitude, signs, positions, ratio):
+    """(P, E) log-magnitudes and signs -> list of E (P, F) immittances (series Z / shunt Y)."""
+    scale = np.where(signs[..., None] > 0, ratio, 1 / ratio)
+    w = 1j * (signs * np.exp(log_magnitude))[..., None] * scale
+    return [w[:, k] for k in range(len(positions))]
+
+def ladder_gamma(immittances, positions, z_source, z_load):
+    """|Gamma|^2 plus the node (V, I) states of a load-to-source pass over the ladder."""
+    V = np.broadcast_to(z_load, immittances[0].shape).astype(complex)
+    I = np.ones_like(V)
+    nodes = [None] * len(positions)
+    for k in range(len(positions) - 1, -1, -1):
+        nodes[k] = (V, I)
+        if positions[k] == 'series':
+            V = V + immittances[k] * I
+        else:
+            I = I + immittances[k] * V
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_in = V / I
+        gamma = (z_in - np.conj(z_source)) / (z_in + z_source)
+    return gamma, nodes, V, I
+
+def ladder_objective(log_magnitude, signs, positions, ratio, z_source, z_load, p):
+    """
+    p-norm of |Gamma|^2 over the grid for every member and its gradient with
+    respect to the log-magnitudes. Returns (objective (P,), gradient (P, E),
+    worst |Gamma| (P,)).
+    """
+    w = ladder_immittances(log_magnitude, signs, positions, ratio)
+    gamma, nodes, num, den = ladder_gamma(w, positions, z_source, z_load)
+    g = np.nan_to_num(np.abs(gamma) ** 2, nan=1.0)
+    g_max = np.maximum(g.max(axis=-1, keepdims=True), 1e-300)
+    r = g / g_max
+    s = np.mean(r ** p, axis=-1, keepdims=True)
+    objective = g_max[:, 0] * s[:, 0] ** (1 / p)
+    weight = s ** (1 / p - 1) * r ** (p - 1) / g.shape[-1]
+
+    # Adjoint pass: dGamma/dw_k = K * (row vector before element k) . (node state after it)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        K = 2 * z_source.real / ((num / den + z_source) ** 2 * den ** 2)
+        conj_gamma_K = np.conj(gamma) * K
+    r0, r1 = den, -num
+    gradient = np.empty(log_magnitude.shape)
+    for k, position in enumerate(positions):
+        V, I = nodes[k]
+        if position == 'series':
+            bracket = I * r0
+            r1 = r1 + r0 * w[k]
+        else:
+            bracket = V * r1
+            r0 = r0 + r1 * w[k]
+        dg = 2 * np.real(conj_gamma_K * bracket * w[k])
+        gradient[:, k] = np.sum(np.nan_to_num(weight * dg), axis=-1)
+    return objective, gradient, np.sqrt(g.max(axis=-1))
+
+# --- Seeds ---
+
+def _to_ladder(positions, values, offset, elements, reference_ohm):
+    """Places section values (X for series, B for shunt) at `offset`; pads with near-zero elements."""
+    ladder = np.array([1e-3 * reference_ohm if p == 'series' else 1e-3 / reference_ohm
+                       for p in ladder_positions(elements, positions[0] if offset == 0 else
+                                                 ('series' if positions[0] == 'shunt' else 'shunt'))])
+    ladder = np.broadcast_to(ladder, values.shape[:-1] + (elements,)).copy()
+    ladder[..., offset:offset + values.shape[-1]] = values
+    return ladder
+
+def seed_population(z_source, z_load, center_hz, sections, first):
+    """Closed-form seeds (S, 2N) in ladder value order; rows with NaN are dropped."""
+    elements = 2 * sections
+    zs, zl = complex(z_source), complex(z_load)
+    reference_ohm = np.sqrt(zs.real * zl.real)
+    seeds = []
+
+    # Stepped L-sections: Zs -> R_1 -> ... -> R_{N-1} -> Zl, one root per step
+    steps = np.geomspace(zs.real, zl.real, sections + 1)
+    z_steps = np.concatenate([[zs], steps[1:-1], [zl]])
+    solutions, _, _ = solve_l_section_batch(center_hz, z_steps[:-1], z_steps[1:])
+    slots = slice(0, 2) if first == 'shunt' else slice(2, 4)
+    step_solutions = solutions[:, slots, :]             # (N, 2 roots, (X_a, X_b))
+    roots = np.array(np.meshgrid(*[[0, 1]] * sections, indexing='ij')).reshape(sections, -1).T[:64]
+    with np.errstate(divide='ignore'):
+        for choice in roots:
+            x = step_solutions[np.arange(sections), choice]
+            if first == 'shunt':                        # (shunt X_a, series X_b) per step
+                pairs = np.stack([-1 / x[:, 0], x[:, 1]], axis=-1)
+            else:                                       # (series X_b, shunt X_a) per step
+                pairs = np.stack([x[:, 1], -1 / x[:, 0]], axis=-1)
+            seeds.append(pairs.reshape(-1))
+
+    # Single T / Pi sections over a range of Q_max
+    min_q = max(nodal_q(zs), nodal_q(zl), abs(np.sqrt(zl.real / zs.real) - 1) + 1e-6)
+    q_values = min_q * np.geomspace(1.05, 4.0, 6)
+    for solver, section_first in ((solve_t_section_batch, 'series'), (solve_pi_section_batch, 'shunt')):
+        solutions, valid, _ = solver(center_hz, zs, zl, q_values[:, None])
+        rows = solutions[valid]
+        if not len(rows):
+            continue
+        with np.errstate(divide='ignore'):
+            if section_first == 'series':               # T: (Xa at Zs, Xb at Zl, Xc shunt)
+                values = np.stack([rows[:, 0], -1 / rows[:, 2], rows[:, 1]], axis=-1)
+            else:                                       # Pi: (Ba at Zs, Bb at Zl, Bc series)
+                values = np.stack([rows[:, 0], -1 / rows[:, 2], rows[:, 1]], axis=-1)
+        offset = 0 if section_first == first else 1
+        if offset + 3 <= elements:
+            positions = ladder_positions(3, section_first)
+            seeds.extend(_to_ladder(positions, values, offset, elements, reference_ohm))
+
+    seeds = np.array(seeds, dtype=float).reshape(-1, elements)
+    return seeds[np.isfinite(seeds).all(axis=-1) & (seeds != 0).all(axis=-1)]
+
+def initial_population(seeds, population, positions, reference_ohm, rng, jitter=0.3):
+    """(P, E) log-magnitudes and signs: the seeds, jittered seeds, then random ladders."""
+    scale = np.array([reference_ohm if p == 'series' else 1 / reference_ohm for p in positions])
+    n_seeds = min(len(seeds), population // 4)
+    n_jitter = population // 2 - n_seeds if len(seeds) else 0
+    picks = seeds[rng.integers(0, len(seeds), n_jitter)] if n_jitter else seeds[:0]
+    n_random = population - n_seeds - n_jitter
+
+    signs = np.concatenate([np.sign(seeds[:n_seeds]), np.sign(picks),
+                            rng.choice([-1.0, 1.0], (n_random, len(positions)))])
+    log_magnitude = np.concatenate([
+        np.log(np.abs(seeds[:n_seeds])),
+        np.log(np.abs(picks)) + rng.normal(0, jitter, picks.shape),
+        np.log(scale) + rng.uniform(-2.5, 2.5, (n_random, len(positions))),
+    ])
+    return log_magnitude, signs
+
+# --- Optimizer ---
+# Most restarts are visibly hopeless after a few dozen steps, so the
+# population is halved (best worst-case |Gamma| kept) at fixed fractions of
+# the run; the survivors finish the full p / step-size schedule.
+
+PRUNE_AT = (0.1, 0.25, 0.5)
+MIN_SURVIVORS = 8
+
+def optimize_ladder(f_low_hz, f_high_hz, z_source, z_load, sections=3, points=200, population=256,
+                    iterations=400, first=None, seed=0, learning_rate=0.1, p_final=64.0,
+                    prune_at=PRUNE_AT):
+    """
+    Synthesizes an N-section ladder minimizing the worst-case |Gamma| over
+    [f_low_hz, f_high_hz] (`points` grid frequencies). z_source / z_load are
+    scalars (series-equivalent at the band centre) or arrays over the grid.
+    first: 'series' or 'shunt' element at the source; by default the one the
+    stepped L-section seeds need (shunt first when Rs > Rl).
+    prune_at: fractions of `iterations` at which the worse half of the
+    population is dropped (successive halving; () keeps every restart).
+    Stops early once a member reaches the Bode-Fano |Gamma|.
+    Returns a LadderResult.
+    """
+    start = time.perf_counter()
+    center_hz = (f_low_hz + f_high_hz) / 2
+    freq_grid = np.linspace(f_low_hz, f_high_hz, points)
+    ratio = freq_grid / center_hz
+    zs = equivalent_impedance(z_source, center_hz, freq_grid)
+    zl = equivalent_impedance(z_load, center_hz, freq_grid)
+    zs0 = complex(np.interp(center_hz, freq_grid, zs.real) + 1j * np.interp(center_hz, freq_grid, zs.imag))
+    zl0 = complex(np.interp(center_hz, freq_grid, zl.real) + 1j * np.interp(center_hz, freq_grid, zl.imag))
+    if zs0.real <= 0 or zl0.real <= 0:
+        raise ValueError("Broadband matching needs positive source and load resistance.")
+    if first is None:
+        first = 'shunt' if zs0.real > zl0.real else 'series'
+    positions = ladder_positions(2 * sections, first)
+    rng = np.random.default_rng(seed)
+    load_q = max(nodal_q(zs0), nodal_q(zl0))
+    limit_gamma = float(bode_fano_gamma(load_q, (f_high_hz - f_low_hz) / center_hz))
+    prune_steps = {int(fraction * iterations) for fraction in prune_at if 0 < fraction < 1}
+
+    with stage('ladder_optimize'):
+        seeds = seed_population(zs0, zl0, center_hz, sections, first)
+        u, signs = initial_population(seeds, population, positions, np.sqrt(zs0.real * zl0.real), rng)
+        m = np.zeros_like(u)
+        v = np.zeros_like(u)
+        best_u = u.copy()
+        best_worst = np.full(len(u), np.inf)
+        beta1, beta2 = 0.9, 0.999
+        done = 0
+        for t in range(iterations):
+            if t in prune_steps and len(u) >= 2 * MIN_SURVIVORS:
+                keep = np.argsort(best_worst)[:len(u) // 2]
+                u, signs, m, v, best_u, best_worst = (a[keep] for a in (u, signs, m, v, best_u, best_worst))
+            if best_worst.min() <= limit_gamma:
+                break
+            done = t + 1
+            progress = t / max(iterations - 1, 1)
+            p = 2.0 * (p_final / 2.0) ** progress
+            _, gradient, worst = ladder_objective(u, signs, positions, ratio, zs, zl, p)
+            improved = worst < best_worst
+            best_worst = np.where(improved, worst, best_worst)
+            best_u[improved] = u[improved]
+
+            gradient = np.nan_to_num(gradient)
+            m = beta1 * m + (1 - beta1) * gradient
+            v = beta2 * v + (1 - beta2) * gradient ** 2
+            step = learning_rate * (0.05 + 0.95 * 0.5 * (1 + np.cos(np.pi * progress)))
+            u = u - step * (m / (1 - beta1 ** (t + 1))) / (np.sqrt(v / (1 - beta2 ** (t + 1))) + 1e-12)
+            u = np.clip(u, -60, 60)
+        _, _, worst = ladder_objective(u, signs, positions, ratio, zs, zl, p_final)
+        improved = worst < best_worst
+        best_worst = np.where(improved, worst, best_worst)
+        best_u[improved] = u[improved]
+
+    best = int(np.argmin(best_worst))
+    values = signs[best] * np.exp(best_u[best])
+    gamma, _, _, _ = ladder_gamma(ladder_immittances(best_u[best:best + 1], signs[best:best + 1], positions, ratio),
+                                  positions, zs, zl)
+    worst_gamma = float(best_worst[best])
+
+    # Reference: best single L-section at the band centre over the same grid
+    single = np.inf
+    l_solutions, l_valid, _ = solve_l_section_batch(center_hz, zs0, zl0)
+    for slot in np.flatnonzero(l_valid):
+        l_first = 'shunt' if slot < 2 else 'series'
+        x_a, x_b = l_solutions[slot]
+        l_values = np.array([-1 / x_a, x_b] if l_first == 'shunt' else [x_b, -1 / x_a])
+        l_positions = ladder_positions(2, l_first)
+        w = ladder_immittances(np.log(np.abs(l_values))[None], np.sign(l_values)[None], l_positions, ratio)
+        single = min(single, float(np.nanmax(np.abs(ladder_gamma(w, l_positions, zs, zl)[0]))))
+
+    with np.errstate(divide='ignore'):
+        return LadderResult(positions, values, center_hz, freq_grid, gamma[0], worst_gamma,
+                            float(-20 * np.log10(worst_gamma)), float(-20 * np.log10(single)), load_q,
+                            limit_gamma, population, done, time.perf_counter() - start)
+
+# --- Report ---
+
+def ladder_response(result, z_source, z_load, freq_grid_hz):
+    """|Gamma| of a LadderResult over any frequency grid (for bandwidth checks)."""
+    ratio = np.asarray(freq_grid_hz, dtype=float) / result.center_hz
+    values = np.asarray(result.values, dtype=float)
+    w = ladder_immittances(np.log(np.abs(values))[None], np.sign(values)[None], result.positions, ratio)
+    zs = equivalent_impedance(z_source, result.center_hz, freq_grid_hz)
+    zl = equivalent_impedance(z_load, result.center_hz, freq_grid_hz)
+    return np.abs(ladder_gamma(w, result.positions, zs, zl)[0][0])
+
+def print_ladder_report(result, z_source, z_load, spec_rl_db=10.0):
+    """Element values, in-band match and the Bode-Fano comparison."""
+    f_low, f_high = result.freq_grid_hz[0], result.freq_grid_hz[-1]
+    omega = 2 * np.pi * result.center_hz
+    print("\n-------------------------------------------")
+    print(f" {len(result.positions) // 2}-Section Ladder: {f_low / 1e6:.3f} - {f_high / 1e6:.3f} MHz")
+    print(f" Matching Zs = {z_source} Ω to Zl = {z_load} Ω")
+    print("-------------------------------------------")
+    for k, (position, value) in enumerate(zip(result.positions, result.values), start=1):
+        if position == 'series':
+            component = get_component_value(value, omega)
+        else:
+            component = get_component_value_from_susceptance(value, omega)
+        print(f"  {k:>2}. {position.capitalize() + ':':<9}{component}")
+
+    print("-------------------------------------------")
+    print(f"  Worst in-band |Γ|:      {result.worst_gamma:.4f} "
+          f"(RL {result.worst_return_loss_db:.2f} dB, VSWR {(1 + result.worst_gamma) / (1 - result.worst_gamma):.3f})")
+    print(f"  Best single L-section:  RL {result.single_section_return_loss_db:.2f} dB over the same band")
+    if np.isfinite(result.load_q) and result.load_q > 0:
+        limit_rl = -20 * np.log10(result.bode_fano_gamma)
+        print(f"  Bode-Fano limit:        |Γ| >= {result.bode_fano_gamma:.4f} (RL <= {limit_rl:.2f} dB) "
+              f"for load Q = {result.load_q:.2f}")
+        gamma_spec = 10 ** (-spec_rl_db / 20)
+        span = f_high - f_low
+        grid = np.linspace(max(result.center_hz - 2 * span, result.center_hz / 20), result.center_hz + 2 * span, 4001)
+        rl = -20 * np.log10(ladder_response(result, z_source, z_load, grid))
+        bandwidth, low, high = (value[0] for value in matched_bandwidth(grid, rl[None], result.center_hz, spec_rl_db))
+        limit = bode_fano_bandwidth(result.load_q, gamma_spec, result.center_hz)
+        if np.isnan(bandwidth):
+            print(f"  -{spec_rl_db:g} dB bandwidth:       not matched at the band centre "
+                  f"(Bode-Fano allows {limit / 1e6:.3f} MHz)")
+        else:
+            print(f"  -{spec_rl_db:g} dB bandwidth:       {bandwidth / 1e6:.3f} MHz ({low / 1e6:.3f} - {high / 1e6:.3f} MHz), "
+                  f"{bandwidth / limit * 100:.1f}% of the Bode-Fano {limit / 1e6:.3f} MHz")
+    else:
+        print("  Bode-Fano limit:        none (purely resistive source and load)")
+    print(f"  {result.population} restarts x {result.iterations} iterations in {result.elapsed_s:.2f} s")
+    print("-------------------------------------------")
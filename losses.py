@@ -0,0 +1,162 @@
+import numpy as np
+
+from frequency_response import network_abcd, solve_batch
+from results import MAX_ELEMENTS, TOPOLOGY_CODES
+
+# --- Lossy Components and Insertion-Loss Ranking ---
+# The solvers assume ideal reactances, so a high Q_max looks free. Here every
+# element gets a finite unloaded Q: a constant, or a Q(f) table interpolated
+# in log-frequency. Inductors and capacitors have separate models. The lossy
+# ABCD cascade gives the transducer gain (mismatch and dissipation together)
+# and the efficiency (the fraction of the input power that reaches the load).
+# Batches are ranked on insertion loss to pick a topology and solution for
+# each design.
+
+NO_TOPOLOGY = 255   # 'topology' code of designs without any valid solution
+
+def load_q_table(path):
+    """Reads a Q(f) table: one 'frequency_hz q' pair per line (comma or space separated; '#' comments)."""
+    rows = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].replace(',', ' ').split()
+            if line:
+                rows.append((float(line[0]), float(line[1])))
+    table = np.array(sorted(rows), dtype=float).reshape(-1, 2)
+    return table[:, 0], table[:, 1]
+
+def component_q(model, frequency_hz):
+    """
+    Evaluates a Q model at frequency_hz (any shape).
+    model: None (lossless), a constant Q or a (frequencies_hz, q_values) table.
+    Tables are interpolated in log-frequency and held constant past their ends.
+    """
+    if model is None:
+        return np.inf
+    if np.ndim(model) == 0:
+        return float(model)
+    freqs, q_values = (np.asarray(a, dtype=float) for a in model)
+    return np.interp(np.log(frequency_hz), np.log(freqs), q_values)
+
+def insertion_loss(topology, solutions, frequency_hz, z_source, z_load, inductor_q=None,
+                   capacitor_q=None, freq_grid_hz=None):
+    """
+    (BATCH) Insertion loss and efficiency of every solve_*_batch solution built
+    from lossy parts. Evaluated at each design's own frequency (arrays shaped
+    (..., 4)) or, with freq_grid_hz, over a grid (arrays shaped (..., 4, F)).
+    Returns a dict:
+      'transducer_gain'     P_load / P_available from the source
+      'insertion_loss_db'   -10 log10(transducer_gain)
+      'efficiency'          P_load / P_in (dissipation only, mismatch excluded)
+      'dissipation_loss_db' -10 log10(efficiency)
+    """
+    frequency_hz = np.asarray(frequency_hz, dtype=float)
+    if freq_grid_hz is None:
+        # Every element at its solved value, Q taken at the design frequency
+        omega0 = omega = 1.0
+        f_eval = frequency_hz[..., None, None]
+    else:
+        omega0 = 2 * np.pi * frequency_hz
+        f_eval = np.asarray(freq_grid_hz, dtype=float)
+        omega = 2 * np.pi * f_eval
+    q = (component_q(inductor_q, f_eval), component_q(capacitor_q, f_eval))
+    A, B, C, D = network_abcd(topology, solutions, omega0, omega, q)
+    z_source = np.asarray(z_source, dtype=complex)[..., None, None]
+    z_load = np.asarray(z_load, dtype=complex)[..., None, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        v_in = A * z_load + B       # V1 / I2
+        i_in = C * z_load + D       # I1 / I2
+        gain = 4 * z_source.real * z_load.real / np.abs(v_in + z_source * i_in) ** 2
+        efficiency = z_load.real / np.real(v_in * np.conj(i_in))
+        result = {
+            'transducer_gain': gain,
+            'insertion_loss_db': -10 * np.log10(gain),
+            'efficiency': efficiency,
+            'dissipation_loss_db': -10 * np.log10(efficiency),
+        }
+    if freq_grid_hz is None:
+        result = {key: value[..., 0] for key, value in result.items()}
+    return result
+
+def lowest_loss(insertion_loss_db, valid):
+    """Index of the lowest-loss valid solution along the last axis (-1 where none is valid)."""
+    loss = np.where(valid, np.nan_to_num(insertion_loss_db, nan=np.inf), np.inf)
+    best = np.argmin(loss, axis=-1)
+    return np.where(np.isfinite(np.min(loss, axis=-1)), best, -1)
+
+def rank_topologies(frequency_hz, z_source, z_load, q_max=None, inductor_q=None, capacitor_q=None,
+                    topologies=None, chunk_size=65536):
+    """
+    (BATCH) Picks the lowest-insertion-loss solution across topologies for every
+    design. frequency_hz, z_source, z_load and q_max broadcast to the design
+    shape (...); `topologies` defaults to L, T and Pi (only L without q_max).
+    Designs are processed `chunk_size` at a time. Returns a dict of arrays:
+      'topology'          results.TOPOLOGY_CODES code (NO_TOPOLOGY if unmatched)
+      'solution'          winning slot 0-3 of that topology (-1 if unmatched)
+      'solutions'         (..., MAX_ELEMENTS) winning values, NaN padded
+      'insertion_loss_db', 'efficiency'
+    """
+    if topologies is None:
+        topologies = ('L',) if q_max is None else ('L', 'T', 'Pi')
+    arrays = [np.asarray(frequency_hz, dtype=float), np.asarray(z_source, dtype=complex),
+              np.asarray(z_load, dtype=complex)]
+    if q_max is not None:
+        arrays.append(np.asarray(q_max, dtype=float))
+    arrays = np.broadcast_arrays(*arrays)
+    design_shape = arrays[0].shape
+    flat = [a.reshape(-1) for a in arrays]
+    n = flat[0].size
+
+    parts = [_rank_chunk([a[i:i + chunk_size] for a in flat], topologies, inductor_q, capacitor_q)
+             for i in range(0, n, chunk_size)] or [_rank_chunk(flat, topologies, inductor_q, capacitor_q)]
+    return {key: np.concatenate([p[key] for p in parts]).reshape(design_shape + parts[0][key].shape[1:])
+            for key in parts[0]}
+
+def _rank_chunk(arrays, topologies, inductor_q, capacitor_q):
+    frequency_hz, z_source, z_load = arrays[:3]
+    q_max = arrays[3] if len(arrays) > 3 else None
+    n = frequency_hz.size
+    best = {
+        'topology': np.full(n, NO_TOPOLOGY, dtype=np.uint8),
+        'solution': np.full(n, -1, dtype=np.int8),
+        'solutions': np.full((n, MAX_ELEMENTS), np.nan),
+        'insertion_loss_db': np.full(n, np.inf),
+        'efficiency': np.full(n, np.nan),
+    }
+    for topology in topologies:
+        solutions, valid, _ = solve_batch(topology, frequency_hz, z_source, z_load,
+                                          None if topology == 'L' else q_max)
+        loss = insertion_loss(topology, solutions, frequency_hz, z_source, z_load, inductor_q, capacitor_q)
+        slot = lowest_loss(loss['insertion_loss_db'], valid)
+        rows = np.flatnonzero(slot >= 0)
+        il = loss['insertion_loss_db'][rows, slot[rows]]
+        better = rows[il < best['insertion_loss_db'][rows]]
+        slot = slot[better]
+        best['topology'][better] = TOPOLOGY_CODES[topology]
+        best['solution'][better] = slot
+        best['solutions'][better] = np.nan
+        best['solutions'][better, :solutions.shape[-1]] = solutions[better, slot]
+        best['insertion_loss_db'][better] = loss['insertion_loss_db'][better, slot]
+        best['efficiency'][better] = loss['efficiency'][better, slot]
+    best['insertion_loss_db'][best['solution'] < 0] = np.nan
+    return best
+
+def print_loss_report(topology, frequency_hz, z_source, z_load, q_max=None, inductor_q=None, capacitor_q=None):
+    """Prints insertion loss and efficiency of every valid solution of one design."""
+    solutions, valid, _ = solve_batch(topology, frequency_hz, z_source, z_load, q_max)
+    loss = insertion_loss(topology, solutions, frequency_hz, z_source, z_load, inductor_q, capacitor_q)
+    best = lowest_loss(loss['insertion_loss_db'], valid)
+    describe = lambda model: 'ideal' if model is None else (f"{model:g}" if np.ndim(model) == 0 else 'Q(f) table')
+
+    print("\n-------------------------------------------")
+    print(f" Insertion Loss ({topology}-Section, Q_L = {describe(inductor_q)}, "
+          f"Q_C = {describe(capacitor_q)})")
+    print("-------------------------------------------")
+    # Same numbering as print_bandwidth_report
+    for sol_num, k in enumerate(np.flatnonzero(valid), start=1):
+        if topology == 'L':
+            sol_num = k + 1
+        marker = "  <- lowest loss" if k == best else ""
+        print(f"  Solution {sol_num}: IL = {loss['insertion_loss_db'][k]:.3f} dB, "
+              f"efficiency = {loss['efficiency'][k] * 100:.2f} %{marker}")
@@ -0,0 +1,147 @@
+import contextlib
+import os
+import threading
+import time
+
+# --- Per-Stage Timing and Counters ---
+# Hot paths are wrapped in `with stage('solve'):` and bump counters with
+# count('solutions_found'). Nothing is recorded until enable_profiling()
+# installs a Profiler. Until then stage() returns a shared null context and
+# count() returns at once, so a disabled hook costs one global lookup.
+#
+# Stages used by the tool:
+#   solve, solve_batch   matching math (scalar solvers / batch dispatch)
+#   convert              component values and console strings
+#   render, save         schemdraw layout (including its save) and d.save file I/O
+#   show                 plt.show()
+# Counters: solutions_found, solutions_na, render_cache_hits/_misses,
+# solutions_verified/_rejected.
+
+_NULL_STAGE = contextlib.nullcontext()
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start_ns')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start_ns, time.perf_counter_ns())
+
+class Profiler:
+    """
+    Collects per-stage wall times, counters and (optionally) trace events.
+    trace: keep one event per stage call for write_trace().
+    max_events: events kept before new ones are dropped (counted in `dropped_events`).
+    """
+
+    def __init__(self, trace=True, max_events=200000):
+        self.trace = trace
+        self.max_events = max_events
+        self.stages = {}      # name -> [calls, total ns, min ns, max ns]
+        self.counters = {}
+        self.events = []      # (name, start ns, end ns, thread id)
+        self.dropped_events = 0
+        self.origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def record(self, name, start_ns, end_ns):
+        elapsed = end_ns - start_ns
+        with self._lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                self.stages[name] = [1, elapsed, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = min(entry[2], elapsed)
+                entry[3] = max(entry[3], elapsed)
+            if self.trace:
+                if len(self.events) < self.max_events:
+                    self.events.append((name, start_ns, end_ns, threading.get_ident()))
+                else:
+                    self.dropped_events += 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        """Per-stage totals (slowest first) and counters as plain dicts."""
+        with self._lock:
+            stages = {name: {'calls': calls, 'total_s': total / 1e9, 'mean_s': total / calls / 1e9,
+                             'min_s': low / 1e9, 'max_s': high / 1e9}
+                      for name, (calls, total, low, high) in self.stages.items()}
+            counters = dict(self.counters)
+        stages = dict(sorted(stages.items(), key=lambda item: -item[1]['total_s']))
+        return {'stages': stages, 'counters': counters}
+
+    def format_summary(self):
+        """The summary as a printable table."""
+        summary = self.summary()
+        lines = ["-------------------------------------------",
+                 " Profile: per-stage wall time",
+                 "-------------------------------------------",
+                 f"  {'stage':<20}{'calls':>8}{'total ms':>12}{'mean ms':>11}{'max ms':>11}"]
+        for name, s in summary['stages'].items():
+            lines.append(f"  {name:<20}{s['calls']:>8}{s['total_s'] * 1e3:>12.3f}"
+                         f"{s['mean_s'] * 1e3:>11.3f}{s['max_s'] * 1e3:>11.3f}")
+        for name, value in sorted(summary['counters'].items()):
+            lines.append(f"  {name:<20}{value:>8}")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Events in Chrome trace-event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+            end_us = (time.perf_counter_ns() - self.origin_ns) / 1e3
+        trace = [{'name': name, 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': tid,
+                  'ts': (start - self.origin_ns) / 1e3, 'dur': (end - start) / 1e3}
+                 for name, start, end, tid in events]
+        trace.extend({'name': name, 'cat': 'counter', 'ph': 'C', 'pid': pid, 'tid': 0,
+                      'ts': end_us, 'args': {name: value}} for name, value in counters.items())
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms',
+                'otherData': {'dropped_events': self.dropped_events}}
+
+    def write_trace(self, path):
+        import json
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return len(self.events)
+
+_active = None
+
+def enable_profiling(profiler=None, **kwargs):
+    """Installs `profiler` (or a new Profiler(**kwargs)) and returns it."""
+    global _active
+    _active = profiler if profiler is not None else Profiler(**kwargs)
+    return _active
+
+def disable_profiling():
+    global _active
+    _active = None
+
+def active_profiler():
+    return _active
+
+def stage(name):
+    """Context manager timing one stage; a shared no-op while profiling is disabled."""
+    profiler = _active
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name)
+
+def count(name, n=1):
+    profiler = _active
+    if profiler is not None:
+        profiler.count(name, n)
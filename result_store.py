@@ -0,0 +1,244 @@
+import json
+import os
+
+import numpy as np
+
+from results import MAX_ELEMENTS, RESULT_DTYPE, TOPOLOGY_CODES, TOPOLOGY_NAMES, records_from_batch
+
+# --- Compact Columnar Result Store ---
+# A store is a directory with one flat binary file per column plus a JSON
+# meta file holding the committed design count. Rows are designs, not
+# solutions: each row keeps the raw solver values of its 4 solution slots
+# (NaN-padded to MAX_ELEMENTS columns), so a design costs about 77 bytes in
+# float32 mode instead of 4 RESULT_DTYPE records (556 bytes).
+#
+# - topology is a uint8 code (results.TOPOLOGY_CODES)
+# - impedances are split into real / imag columns
+# - validity is bit-packed, 4 bits per design, least significant bit first
+#   (Arrow's boolean layout)
+# - frequency_hz stays float64 in float32 mode, where it would lose Hz
+#   resolution at GHz
+#
+# Readers map the column files with np.memmap, so other processes can open and
+# slice a store while it is being appended to. Appends write the column files
+# first and then atomically replace the meta file; columns beyond the
+# committed count are ignored by readers and cut off by the next writer.
+
+STORE_FORMAT = 1
+META_FILE = 'store.json'
+PRECISIONS = ('float32', 'float64')
+
+def store_columns(precision='float64'):
+    """[(name, dtype, per-design shape)] of the value columns (validity is stored separately)."""
+    real = np.dtype(precision)
+    return [('topology', np.dtype('u1'), ()), ('frequency_hz', np.dtype('f8'), ()),
+            ('zs_real', real, ()), ('zs_imag', real, ()), ('zl_real', real, ()), ('zl_imag', real, ()),
+            ('q_max', real, ()), ('solutions', real, (4, MAX_ELEMENTS))]
+
+def compact_dtype(precision='float64'):
+    """Structured dtype of one store row, as returned by slicing a ResultStore."""
+    return np.dtype([(name, dtype, shape) for name, dtype, shape in store_columns(precision)]
+                    + [('valid', '?', (4,))])
+
+def _packed_bytes(designs):
+    return -(-4 * designs // 8)
+
+class ResultStore:
+    """
+    Memory-mapped columnar store of batch solutions (see the module comment).
+    Open an existing store with ResultStore(path) (read-only) or
+    ResultStore(path, mode='a'); create one with ResultStore.create().
+    store[i:j] returns a compact_dtype structured array; column(name) a
+    zero-copy view of one column.
+    """
+
+    def __init__(self, path, mode='r'):
+        if mode not in ('r', 'a'):
+            raise ValueError("mode must be 'r' or 'a'.")
+        self.path = path
+        self.mode = mode
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta.get('format') != STORE_FORMAT:
+            raise ValueError(f"{path} is not a result store (format {meta.get('format')}).")
+        self.precision = meta['precision']
+        self.columns = store_columns(self.precision)
+        self.dtype = compact_dtype(self.precision)
+        self._count = meta['count']
+        self._maps = {}
+        if mode == 'a':
+            self._truncate()
+        self._map()
+
+    @classmethod
+    def create(cls, path, precision='float64', overwrite=False):
+        """Creates an empty store directory and opens it for appending."""
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}'. Use one of {PRECISIONS}.")
+        if os.path.exists(os.path.join(path, META_FILE)) and not overwrite:
+            raise ValueError(f"A result store already exists at {path}.")
+        os.makedirs(path, exist_ok=True)
+        for name in [c[0] for c in store_columns(precision)] + ['valid']:
+            open(os.path.join(path, name + '.bin'), 'wb').close()
+        _write_meta(path, {'format': STORE_FORMAT, 'precision': precision, 'count': 0})
+        return cls(path, mode='a')
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        """Bytes of committed data on disk."""
+        per_design = sum(dtype.itemsize * int(np.prod(shape)) for _, dtype, shape in self.columns)
+        return self._count * per_design + _packed_bytes(self._count)
+
+    def _file(self, name):
+        return os.path.join(self.path, name + '.bin')
+
+    def _truncate(self):
+        """Cuts every column file back to the committed count (drops an interrupted append)."""
+        for name, dtype, shape in self.columns:
+            os.truncate(self._file(name), self._count * dtype.itemsize * int(np.prod(shape)))
+        os.truncate(self._file('valid'), _packed_bytes(self._count))
+
+    def _map(self):
+        self._maps = {}
+        for name, dtype, shape in self.columns:
+            if self._count:
+                self._maps[name] = np.memmap(self._file(name), dtype=dtype, mode='r', shape=(self._count,) + shape)
+            else:
+                self._maps[name] = np.empty((0,) + shape, dtype=dtype)
+        size = _packed_bytes(self._count)
+        self._maps['valid'] = (np.memmap(self._file('valid'), dtype=np.uint8, mode='r', shape=(size,))
+                               if size else np.empty(0, dtype=np.uint8))
+
+    def refresh(self):
+        """Re-reads the committed count, picking up rows appended by another process."""
+        with open(os.path.join(self.path, META_FILE)) as f:
+            self._count = json.load(f)['count']
+        self._map()
+        return self._count
+
+    def column(self, name):
+        """Zero-copy memmap view of a column; 'valid' is the packed bit buffer (uint8)."""
+        return self._maps[name]
+
+    def valid_bits(self, start=0, stop=None):
+        """Unpacked (n, 4) validity of designs [start, stop)."""
+        start, stop, _ = slice(start, stop).indices(self._count)
+        first, last = 4 * start, 4 * max(stop, start)
+        packed = self._maps['valid'][first // 8:-(-last // 8)]
+        bits = np.unpackbits(packed, bitorder='little')[first % 8:first % 8 + last - first]
+        return bits.astype(bool).reshape(-1, 4)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("ResultStore supports contiguous slices only; use column() for fancy indexing.")
+        start, stop, _ = key.indices(self._count)
+        stop = max(stop, start)
+        rows = np.empty(stop - start, dtype=self.dtype)
+        for name, _, _ in self.columns:
+            rows[name] = self._maps[name][start:stop]
+        rows['valid'] = self.valid_bits(start, stop)
+        return rows
+
+    # --- Appending ---
+
+    def append(self, topology, frequency_hz, z_source, z_load, solutions, valid, q_max=None):
+        """
+        Appends one solve_batch result: solutions (..., 4, k), valid (..., 4)
+        with the design inputs broadcast to the design shape. Returns the new
+        design count.
+        """
+        solutions = np.asarray(solutions)
+        design_shape = solutions.shape[:-2]
+        n = int(np.prod(design_shape))
+        rows = np.empty(n, dtype=self.dtype)
+        rows['topology'] = TOPOLOGY_CODES[topology]
+        rows['frequency_hz'] = np.broadcast_to(np.asarray(frequency_hz, dtype=float), design_shape).reshape(-1)
+        for prefix, z in (('zs', z_source), ('zl', z_load)):
+            z = np.broadcast_to(np.asarray(z, dtype=complex), design_shape).reshape(-1)
+            rows[prefix + '_real'] = z.real
+            rows[prefix + '_imag'] = z.imag
+        q = np.nan if q_max is None else q_max
+        rows['q_max'] = np.broadcast_to(np.asarray(q, dtype=float), design_shape).reshape(-1)
+        padded = np.full((n, 4, MAX_ELEMENTS), np.nan)
+        padded[..., :solutions.shape[-1]] = solutions.reshape(n, 4, -1)
+        rows['solutions'] = padded
+        rows['valid'] = np.asarray(valid, dtype=bool).reshape(n, 4)
+        return self.append_rows(rows)
+
+    def append_rows(self, rows):
+        """Appends a compact_dtype structured array. Returns the new design count."""
+        if self.mode != 'a':
+            raise ValueError("Store is open read-only; open it with mode='a' to append.")
+        rows = np.asarray(rows).astype(self.dtype, copy=False)
+        if not len(rows):
+            return self._count
+        for name, _, _ in self.columns:
+            with open(self._file(name), 'ab') as f:
+                f.write(np.ascontiguousarray(rows[name]).tobytes())
+
+        bits = rows['valid'].reshape(-1)
+        tail = (4 * self._count) % 8
+        with open(self._file('valid'), 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            if tail:
+                # Merge into the half-filled last byte
+                f.seek(-1, os.SEEK_END)
+                last = np.frombuffer(f.read(1), dtype=np.uint8)
+                bits = np.concatenate([np.unpackbits(last, bitorder='little')[:tail].astype(bool), bits])
+                f.seek(-1, os.SEEK_END)
+            f.write(np.packbits(bits, bitorder='little').tobytes())
+
+        self._count += len(rows)
+        _write_meta(self.path, {'format': STORE_FORMAT, 'precision': self.precision, 'count': self._count})
+        self._map()
+        return self._count
+
+    # --- Export ---
+
+    def iter_records(self, chunk_size=65536):
+        """(GENERATOR) results.RESULT_DTYPE chunks (4 records per design) for the bulk writers."""
+        for start in range(0, self._count, chunk_size):
+            rows = self[start:start + chunk_size]
+            records = np.empty((len(rows), 4), dtype=RESULT_DTYPE)
+            for code in np.unique(rows['topology']):
+                members = rows['topology'] == code
+                group = rows[members]
+                records[members] = records_from_batch(
+                    TOPOLOGY_NAMES[int(code)], group['frequency_hz'], group['zs_real'] + 1j * group['zs_imag'],
+                    group['zl_real'] + 1j * group['zl_imag'], group['solutions'].astype(float),
+                    group['valid'], group['q_max']).reshape(-1, 4)
+            yield records.reshape(-1)
+
+    def to_arrow(self):
+        """
+        pyarrow Table over the memory-mapped columns, without copying:
+        topology is a dictionary column, solutions a (4, MAX_ELEMENTS)
+        nested fixed-size list and valid a 4-item boolean list.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as exc:
+            raise ImportError("Arrow export needs pyarrow (pip install pyarrow).") from exc
+
+        n = self._count
+        names = [TOPOLOGY_NAMES[code] for code in sorted(TOPOLOGY_NAMES)]
+        arrays = {'topology': pa.DictionaryArray.from_arrays(pa.array(self._maps['topology'], pa.uint8()),
+                                                             pa.array(names))}
+        for name, dtype, shape in self.columns[1:]:
+            flat = pa.array(self._maps[name].reshape(-1), type=pa.from_numpy_dtype(dtype))
+            if name == 'solutions':
+                flat = pa.FixedSizeListArray.from_arrays(pa.FixedSizeListArray.from_arrays(flat, shape[1]),
+                                                         shape[0])
+            arrays[name] = flat
+        bits = pa.Array.from_buffers(pa.bool_(), 4 * n, [None, pa.py_buffer(self._maps['valid'])])
+        arrays['valid'] = pa.FixedSizeListArray.from_arrays(bits, 4)
+        return pa.table(arrays)
+
+def _write_meta(path, meta):
+    target = os.path.join(path, META_FILE)
+    with open(target + '.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(target + '.tmp', target)
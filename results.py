@@ -0,0 +1,271 @@
+import csv
+import json
+import zipfile
+from dataclasses import dataclass
+
+import numpy as np
+
+from AssingmentRF import get_component_value, get_component_value_from_susceptance, element_kind
+from frequency_response import LAYOUTS, slot_layouts, solve_batch
+
+# --- Structured Results ---
+# Single designs are MatchingSolution objects; batches are flat structured
+# arrays with one record per (design, solution slot). Element columns always
+# run from SOURCE to LOAD and are NaN-padded to three (L-sections use two).
+
+TOPOLOGY_CODES = {'L': 0, 'T': 1, 'Pi': 2}
+TOPOLOGY_NAMES = {code: name for name, code in TOPOLOGY_CODES.items()}
+MAX_ELEMENTS = 3
+
+RESULT_DTYPE = np.dtype([
+    ('topology', 'u1'),
+    ('solution', 'u1'),
+    ('frequency_hz', 'f8'),
+    ('z_source', 'c16'),
+    ('z_load', 'c16'),
+    ('q_max', 'f8'),
+    ('valid', '?'),
+    ('reactance_ohm', 'f8', (MAX_ELEMENTS,)),
+    ('susceptance_s', 'f8', (MAX_ELEMENTS,)),
+    ('inductance_h', 'f8', (MAX_ELEMENTS,)),
+    ('capacitance_f', 'f8', (MAX_ELEMENTS,)),
+])
+
+@dataclass(slots=True)
+class MatchingElement:
+    """One component; inductance_h / capacitance_f is NaN for the other kind."""
+    position: str
+    kind: str
+    reactance_ohm: float
+    susceptance_s: float
+    inductance_h: float
+    capacitance_f: float
+
+@dataclass(slots=True)
+class LineElement:
+    """
+    One distributed element. position is 'line' (in the main path), 'shunt'
+    or 'series' (stubs); kind is 'line', 'open' or 'short'.
+    """
+    position: str
+    kind: str
+    z0_ohm: float
+    length_wl: float
+    length_m: float
+
+@dataclass(slots=True)
+class MatchingSolution:
+    """One matching network; `elements` (MatchingElement or LineElement) run from source to load."""
+    topology: str
+    layout: str
+    solution_number: int
+    frequency_hz: float
+    z_source: complex
+    z_load: complex
+    q_max: float
+    valid: bool
+    elements: tuple
+
+def layout_for(topology, slot):
+    """Layout name used by a topology's solution slot (0-3)."""
+    if topology == 'L':
+        return 'L_shunt_source' if slot < 2 else 'L_shunt_load'
+    return topology
+
+# --- Conversion ---
+
+def element_values(topology, solutions, omega):
+    """
+    (BATCH) Converts solve_*_batch output into per-element arrays.
+    Returns (X, B, L, C), each (..., 4, 3) in source-to-load order, in ohms,
+    siemens, henries and farads.
+    """
+    solutions = np.asarray(solutions, dtype=float)
+    omega = np.asarray(omega, dtype=float)[..., None, None]
+    X = np.full(solutions.shape[:-1] + (MAX_ELEMENTS,), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for slots, layout in slot_layouts(topology):
+            for j, (_, domain, column) in enumerate(layout):
+                raw = solutions[..., slots, column]
+                X[..., slots, j] = raw if domain == 'X' else -1 / raw
+        B = -1 / X
+        L = np.where(X > 0, X / omega, np.nan)
+        C = np.where(X < 0, -1 / (omega * X), np.nan)
+    return X, B, L, C
+
+def records_from_batch(topology, frequency_hz, z_source, z_load, solutions, valid, q_max=None):
+    """(BATCH) Flattens a solve_*_batch result into a RESULT_DTYPE array, 4 records per design."""
+    design_shape = solutions.shape[:-2]
+    omega = 2 * np.pi * np.broadcast_to(np.asarray(frequency_hz, dtype=float), design_shape)
+    X, B, L, C = element_values(topology, solutions, omega)
+
+    records = np.empty(design_shape + (4,), dtype=RESULT_DTYPE)
+    records['topology'] = TOPOLOGY_CODES[topology]
+    records['solution'] = np.arange(1, 5)
+    records['frequency_hz'] = np.broadcast_to(np.asarray(frequency_hz, dtype=float), design_shape)[..., None]
+    records['z_source'] = np.broadcast_to(np.asarray(z_source, dtype=complex), design_shape)[..., None]
+    records['z_load'] = np.broadcast_to(np.asarray(z_load, dtype=complex), design_shape)[..., None]
+    q = np.nan if q_max is None else q_max
+    records['q_max'] = np.broadcast_to(np.asarray(q, dtype=float), design_shape)[..., None]
+    records['valid'] = valid
+    records['reactance_ohm'] = X
+    records['susceptance_s'] = B
+    records['inductance_h'] = L
+    records['capacitance_f'] = C
+    return records.reshape(-1)
+
+def solution_from_record(record):
+    """Builds a MatchingSolution from one RESULT_DTYPE record."""
+    topology = TOPOLOGY_NAMES[int(record['topology'])]
+    layout = layout_for(topology, int(record['solution']) - 1)
+    elements = tuple(
+        MatchingElement(position,
+                        element_kind(float(record['reactance_ohm' if domain == 'X' else 'susceptance_s'][j]),
+                                     domain),
+                        float(record['reactance_ohm'][j]), float(record['susceptance_s'][j]),
+                        float(record['inductance_h'][j]), float(record['capacitance_f'][j]))
+        for j, (position, domain, _) in enumerate(LAYOUTS[layout]))
+    return MatchingSolution(topology, layout, int(record['solution']), float(record['frequency_hz']),
+                            complex(record['z_source']), complex(record['z_load']),
+                            float(record['q_max']), bool(record['valid']), elements)
+
+def solution_from_values(topology, slot, frequency_hz, z_source, z_load, values, q_max=None,
+                         solution_number=None):
+    """
+    Builds a MatchingSolution from one solution's raw values, given in the
+    column order of the batch solvers (e.g. the scalar calculate_* values).
+    """
+    solutions = np.full((4, 3 if topology != 'L' else 2), np.nan)
+    solutions[slot] = values
+    valid = np.zeros(4, dtype=bool)
+    valid[slot] = not np.isnan(solutions[slot]).any()
+    record = records_from_batch(topology, frequency_hz, z_source, z_load, solutions, valid, q_max)[slot]
+    solution = solution_from_record(record)
+    if solution_number is not None:
+        solution.solution_number = solution_number
+    return solution
+
+def design_solutions(topology, frequency_hz, z_source, z_load, q_max=None):
+    """Solves one design and returns its four MatchingSolution objects (check `.valid`)."""
+    solutions, valid, _ = solve_batch(topology, frequency_hz, z_source, z_load, q_max)
+    records = records_from_batch(topology, frequency_hz, z_source, z_load, solutions, valid, q_max)
+    return [solution_from_record(r) for r in records]
+
+# --- Console Formatter ---
+
+def format_console(solution):
+    """The calculate_* console block for one solution, as a list of lines."""
+    omega = 2 * np.pi * solution.frequency_hz
+    if solution.topology == 'Pi':
+        comps = [get_component_value_from_susceptance(e.susceptance_s, omega) for e in solution.elements]
+    else:
+        comps = [get_component_value(e.reactance_ohm, omega) for e in solution.elements]
+
+    n = solution.solution_number
+    if solution.layout == 'L_shunt_source':
+        return [f"--- Solution {n} ---",
+                f"  Shunt Component (at Zs): {comps[0]}",
+                f"  Series Component (at Zl): {comps[1]}"]
+    if solution.layout == 'L_shunt_load':
+        return [f"--- Solution {n} ---",
+                f"  Series Component (at Zs): {comps[0]}",
+                f"  Shunt Component (at Zl): {comps[1]}"]
+    if solution.topology == 'T':
+        relation = "Rl < Rs" if solution.z_load.real < solution.z_source.real else "Rl > Rs"
+        return [f"--- Solution {n} (Topology {relation}) ---",
+                f"  Series (at Zs):   {comps[0]}",
+                f"  Shunt (middle):   {comps[1]}",
+                f"  Series (at Zl):   {comps[2]}"]
+    relation = "Gl < Gs" if (1 / solution.z_load).real < (1 / solution.z_source).real else "Gl > Gs"
+    return [f"--- Solution {n} (Topology {relation}) ---",
+            f"  Shunt (at Zs):    {comps[0]}",
+            f"  Series (middle):  {comps[1]}",
+            f"  Shunt (at Zl):    {comps[2]}"]
+
+# --- Bulk Writers ---
+# Each writer takes a RESULT_DTYPE array or an iterable of such chunks and
+# streams it to disk chunk by chunk.
+
+CSV_COLUMNS = (['topology', 'solution', 'frequency_hz', 'zs_real', 'zs_imag', 'zl_real', 'zl_imag',
+                'q_max', 'valid']
+               + [f'{name}_{j + 1}' for name in ('reactance_ohm', 'susceptance_s', 'inductance_h', 'capacitance_f')
+                  for j in range(MAX_ELEMENTS)])
+
+def _iter_chunks(records):
+    if isinstance(records, np.ndarray):
+        yield records
+    else:
+        yield from records
+
+def record_columns(chunk):
+    """Per-column Python lists for one chunk, in CSV_COLUMNS order."""
+    columns = [[TOPOLOGY_NAMES[c] for c in chunk['topology'].tolist()],
+               chunk['solution'].tolist(), chunk['frequency_hz'].tolist(),
+               chunk['z_source'].real.tolist(), chunk['z_source'].imag.tolist(),
+               chunk['z_load'].real.tolist(), chunk['z_load'].imag.tolist(),
+               chunk['q_max'].tolist(), chunk['valid'].tolist()]
+    for name in ('reactance_ohm', 'susceptance_s', 'inductance_h', 'capacitance_f'):
+        columns.extend(chunk[name].T.tolist())
+    return columns
+
+def _json_float(value):
+    return value if np.isfinite(value) else None
+
+def json_rows(chunk):
+    """(GENERATOR) One JSON-ready dict per record of a chunk; NaN/inf become None."""
+    for row in zip(*record_columns(chunk)):
+        obj = dict(zip(CSV_COLUMNS[:9], row[:9]))
+        for k, name in enumerate(('reactance_ohm', 'susceptance_s', 'inductance_h', 'capacitance_f')):
+            obj[name] = [_json_float(v) for v in row[9 + k * MAX_ELEMENTS:9 + (k + 1) * MAX_ELEMENTS]]
+        obj['q_max'] = _json_float(obj['q_max'])
+        yield obj
+
+def write_jsonl(records, path):
+    """Writes one JSON object per record; NaN/inf become null. Returns the record count."""
+    count = 0
+    with open(path, 'w') as f:
+        for chunk in _iter_chunks(records):
+            for obj in json_rows(chunk):
+                f.write(json.dumps(obj))
+                f.write('\n')
+            count += len(chunk)
+    return count
+
+def write_csv(records, path):
+    """Writes records as CSV with one column per element value. Returns the record count."""
+    count = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for chunk in _iter_chunks(records):
+            writer.writerows(zip(*record_columns(chunk)))
+            count += len(chunk)
+    return count
+
+def write_npz(records, path):
+    """
+    Writes each chunk as its own array member ('records_000000', ...) of an
+    .npz archive, without concatenating in memory. Returns the record count.
+    """
+    count = 0
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for i, chunk in enumerate(_iter_chunks(records)):
+            with zf.open(f'records_{i:06d}.npy', 'w', force_zip64=True) as member:
+                np.lib.format.write_array(member, np.ascontiguousarray(chunk, dtype=RESULT_DTYPE))
+            count += len(chunk)
+    return count
+
+def read_npz(path):
+    """Reads a write_npz archive back into one RESULT_DTYPE array."""
+    with np.load(path) as data:
+        chunks = [data[name] for name in sorted(data.files)]
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=RESULT_DTYPE)
+
+WRITERS = {'.jsonl': write_jsonl, '.csv': write_csv, '.npz': write_npz}
+
+def write_records(records, path):
+    """Picks the writer from the file extension (.jsonl, .csv or .npz)."""
+    for extension, writer in WRITERS.items():
+        if str(path).lower().endswith(extension):
+            return writer(records, path)
+    raise ValueError(f"Unsupported output format for '{path}'. Use one of {tuple(WRITERS)}.")
@@ -0,0 +1,230 @@
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import schemdraw
+import schemdraw.elements as elm
+
+from profiling import count, stage
+
+# --- Schematic Rendering Pipeline ---
+# A schematic is fully described by a spec:
+#   (layout, source label, load label, ((kind, label), ...))
+# with kind 'L', 'C', 'W' (wire) or 'O' (open) taken from the element value
+# by AssingmentRF.element_kind, never from its label text. Headless renders
+# use schemdraw's SVG canvas (no display or GUI backend), run on a thread
+# pool and are cached by the spec's hash, so a duplicate diagram is a hard
+# link (or copy) of an earlier file. The cache may be shared by several
+# processes and holds at most max_entries diagrams: hits refresh a file's
+# mtime and every new render evicts the least recently used ones beyond the
+# cap (placed copies are separate links and stay).
+
+ELEMENTS = {'L': elm.Inductor, 'C': elm.Capacitor, 'W': elm.Line, 'O': elm.Gap}
+DEFAULT_CACHE_DIR = '.schematic_cache'
+KEY_LOCK_STRIPES = 64
+DEFAULT_MAX_ENTRIES = 4096
+
+def impedance_label(name, z):
+    return f'$Z_{name}$\n' + f'{z.real:.1f} + {z.imag:.1f}j Ω'
+
+def schematic_spec(layout, z_source, z_load, elements):
+    """Builds a hashable spec; `elements` are (kind, label) pairs in the order `draw_schematic` expects."""
+    return (layout, impedance_label('S', z_source), impedance_label('L', z_load),
+            tuple((kind, label) for kind, label in elements))
+
+def spec_key(spec):
+    """Content address of a schematic spec."""
+    return hashlib.sha256(repr(spec).encode('utf-8')).hexdigest()
+
+def draw_schematic(spec, filename, canvas='svg'):
+    """
+    Draws a spec with schemdraw and saves it. `canvas='svg'` needs no display;
+    `canvas='matplotlib'` leaves the figure open for plt.show().
+    Layouts: 'L_shunt_source' / 'L_shunt_load' take (shunt, series);
+    'T' takes (Xa, Xb, Xc); 'Pi' takes (Ba, Bb, Bc).
+    """
+    layout, source_label, load_label, elements = spec
+    parts = [(ELEMENTS[kind], label) for kind, label in elements]
+
+    with stage('render'):
+        with schemdraw.Drawing(canvas=canvas, show=False) as d:
+            d.config(unit=3)
+            d.add(elm.SourceV().label(source_label, loc='bottom'))
+
+            if layout == 'L_shunt_source':
+                (shunt_element, shunt_label), (series_element, series_label) = parts
+                d.add(elm.Line().right())
+                d.push()
+                d.add(shunt_element().down().label(shunt_label, loc='bottom'))
+                d.add(elm.Ground())
+                d.pop()
+                d.add(series_element().right().label(series_label, loc='bottom'))
+
+            elif layout == 'L_shunt_load':
+                (shunt_element, shunt_label), (series_element, series_label) = parts
+                d.add(series_element().right().label(series_label, loc='bottom'))
+                d.push()
+                d.add(shunt_element().down().label(shunt_label, loc='bottom'))
+                d.add(elm.Ground())
+                d.pop()
+
+            elif layout == 'T':
+                (el_a, xa), (el_b, xb), (el_c, xc) = parts
+                d.add(el_a().right().label(xa, loc='bottom'))
+                d.push()
+                d.add(el_c().down().label(xc, loc='bottom'))
+                d.add(elm.Ground())
+                d.pop()
+                d.add(el_b().right().label(xb, loc='bottom'))
+
+            elif layout == 'Pi':
+                (el_a, ba), (el_b, bb), (el_c, bc) = parts
+                # Short wire to create the node *after* the source
+                d.add(elm.Line().right(d.unit/2))
+                d.push()
+                d.add(el_a().down().label(ba, loc='bottom'))
+                d.add(elm.Ground())
+                d.pop()
+                d.add(el_c().right().label(bc, loc='bottom'))
+                # Short wire to create the second node
+                d.add(elm.Line().right(d.unit/2))
+                d.push()
+                d.add(el_b().down().label(bb, loc='bottom'))
+                d.add(elm.Ground())
+                d.pop()
+
+            else:
+                raise ValueError(f"Unknown schematic layout '{layout}'.")
+
+            d.add(elm.Resistor().right().label(load_label, loc='bottom'))
+            # Never write through a hard link into the cache
+            if os.path.lexists(filename):
+                os.remove(filename)
+            with stage('save'):
+                d.save(filename)
+
+class SchematicRenderer:
+    """Headless SVG renderer with a thread pool and a content-addressed file cache."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_workers=2, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='schematic')
+        self._lock = threading.Lock()
+        # Striped per-key locks: a fixed set, so long-running processes do not
+        # accumulate one lock per distinct diagram
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCK_STRIPES)]
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def submit(self, spec, filename):
+        """
+        Queues a render off the calling thread. Returns a Future resolving to
+        `filename`; a failed render is reported on stderr when it finishes.
+        """
+        future = self._pool.submit(self.render, spec, filename)
+        future.add_done_callback(lambda f: _report_failure(f, filename))
+        return future
+
+    def render(self, spec, filename):
+        """Renders `spec` to `filename`, reusing the cached SVG when one exists."""
+        key = spec_key(spec)
+        cached = os.path.join(self.cache_dir, key + '.svg')
+        for attempt in range(2):
+            with self._key_locks[int(key[:8], 16) % len(self._key_locks)]:
+                try:
+                    os.utime(cached)
+                    count('render_cache_hits')
+                    with self._lock:
+                        self.hits += 1
+                except FileNotFoundError:
+                    # uuid, not thread id: other processes may share the cache
+                    tmp = f"{cached}.{uuid.uuid4().hex}.tmp.svg"
+                    try:
+                        draw_schematic(spec, tmp, canvas='svg')
+                        os.replace(tmp, cached)
+                    except BaseException:
+                        if os.path.lexists(tmp):
+                            os.remove(tmp)
+                        raise
+                    count('render_cache_misses')
+                    with self._lock:
+                        self.misses += 1
+                    self._evict(keep=cached)
+            try:
+                _place(cached, filename)
+                return filename
+            except FileNotFoundError:
+                # Evicted by another process in between; render it again once
+                if attempt:
+                    raise
+
+    def _evict(self, keep):
+        """Removes the least recently used cached diagrams beyond max_entries."""
+        if self.max_entries is None:
+            return
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.svg') and not entry.name.endswith('.tmp.svg') and entry.path != keep:
+                    try:
+                        entries.append((entry.stat().st_mtime_ns, entry.path))
+                    except FileNotFoundError:
+                        pass
+        entries.sort()
+        for _, path in entries[:max(len(entries) + 1 - self.max_entries, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+def _report_failure(future, filename):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"  ❌ Circuit diagram {filename} was not written: {future.exception()!r}", file=sys.stderr)
+
+def _place(cached, filename):
+    """
+    Hard-links the cached file to `filename`, falling back to a copy. Both go
+    to a fresh temporary name next to `filename` that is then renamed over
+    it, so a copy never writes through an existing link into the cache.
+    """
+    if os.path.abspath(cached) == os.path.abspath(filename):
+        return
+    tmp = os.path.join(os.path.dirname(filename) or '.', f".{os.path.basename(filename)}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(cached, tmp)
+        except OSError:
+            shutil.copyfile(cached, tmp)
+        os.replace(tmp, filename)
+    finally:
+        # rename() leaves both names when they already link the same file
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+
+_default_renderer = None
+_default_lock = threading.Lock()
+
+def get_renderer():
+    """Returns the shared background renderer, creating it on first use."""
+    global _default_renderer
+    with _default_lock:
+        if _default_renderer is None:
+            _default_renderer = SchematicRenderer()
+        return _default_renderer
+
+def shutdown_renderer(wait=True):
+    """Finishes (or abandons) the shared renderer's queued renders and discards it."""
+    global _default_renderer
+    with _default_lock:
+        renderer, _default_renderer = _default_renderer, None
+    if renderer is not None:
+        renderer.shutdown(wait=wait)
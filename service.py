@@ -0,0 +1,317 @@
+import asyncio
+import ipaddress
+import json
+import math
+import time
+from dataclasses import asdict
+
+import numpy as np
+
+from frequency_response import solve_batch, verification_stats
+from results import json_rows, records_from_batch
+
+# --- Loopback JSON Service with Micro-Batching ---
+# A small HTTP/1.1 server on asyncio streams (standard library only):
+#   POST /match   {"topology": "T", "frequency_hz": 1e8, "z_source": 50,
+#                  "z_load": "10-25j", "q_max": 5}
+#                 -> {"solutions": [4 records in the results.write_jsonl format]}
+#   GET  /stats   request, batch, latency and solution verification statistics
+#   GET  /health
+# Impedances may be numbers, "R+Xj" strings or [R, X] pairs.
+#
+# Requests for the same topology that arrive within `window_s` of the first
+# are queued and solved with one solve_batch call; each caller gets its own
+# design back. Backpressure: once `max_pending` designs are queued or being
+# solved, new requests get 503 with Retry-After instead of joining the queue.
+
+TOPOLOGIES = {'l': 'L', 't': 'T', 'pi': 'Pi'}
+MAX_BODY_BYTES = 64 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+
+class Overloaded(Exception):
+    """Raised when the batcher's pending limit is reached."""
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (1 us - ~100 s, ~4.4 % bucket width)."""
+
+    def __init__(self, min_s=1e-6, max_s=100.0, buckets_per_decade=53):
+        self.min_s = min_s
+        self.buckets_per_decade = buckets_per_decade
+        self.counts = np.zeros(int(math.ceil(math.log10(max_s / min_s) * buckets_per_decade)) + 1, dtype=np.int64)
+        self.total = 0
+        self.sum_s = 0.0
+        self.max_s = 0.0
+
+    def record(self, seconds):
+        index = int(math.log10(max(seconds, self.min_s) / self.min_s) * self.buckets_per_decade)
+        self.counts[min(index, len(self.counts) - 1)] += 1
+        self.total += 1
+        self.sum_s += seconds
+        self.max_s = max(self.max_s, seconds)
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile, in seconds."""
+        if not self.total:
+            return float('nan')
+        index = int(np.searchsorted(np.cumsum(self.counts), p / 100 * self.total))
+        return min(self.min_s * 10 ** ((index + 1) / self.buckets_per_decade), self.max_s)
+
+    def summary(self):
+        return {
+            'count': self.total,
+            'mean_ms': self.sum_s / self.total * 1e3 if self.total else None,
+            'p50_ms': self.percentile(50) * 1e3 if self.total else None,
+            'p90_ms': self.percentile(90) * 1e3 if self.total else None,
+            'p99_ms': self.percentile(99) * 1e3 if self.total else None,
+            'max_ms': self.max_s * 1e3 if self.total else None,
+        }
+
+def _solve_records(topology, frequency_hz, z_source, z_load, q_max):
+    solutions, valid, _ = solve_batch(topology, frequency_hz, z_source, z_load, q_max)
+    return records_from_batch(topology, frequency_hz, z_source, z_load, solutions, valid, q_max)
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-design solves into batched solve_batch calls.
+    window_s: how long the first request of a batch waits for company.
+    max_batch: designs per batch (a full batch is solved at once).
+    max_pending: designs queued or in flight before Overloaded is raised.
+    """
+
+    def __init__(self, window_s=0.002, max_batch=4096, max_pending=16384):
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.pending = 0
+        self.batches = 0
+        self.designs = 0
+        self.largest_batch = 0
+        self.solve_latency = LatencyHistogram()
+        self._queues = {}     # topology -> [(args, future)]
+        self._timers = {}
+
+    async def solve(self, topology, frequency_hz, z_source, z_load, q_max=None):
+        """Returns the design's 4 results.RESULT_DTYPE records."""
+        if self.pending >= self.max_pending:
+            raise Overloaded()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self._queues.setdefault(topology, [])
+        queue.append(((frequency_hz, z_source, z_load, q_max), future))
+        self.pending += 1
+        if len(queue) >= self.max_batch:
+            self._flush(topology)
+        elif len(queue) == 1:
+            self._timers[topology] = loop.call_later(self.window_s, self._flush, topology)
+        return await future
+
+    def _flush(self, topology):
+        timer = self._timers.pop(topology, None)
+        if timer is not None:
+            timer.cancel()
+        items = self._queues.pop(topology, [])
+        if items:
+            asyncio.ensure_future(self._run_batch(topology, items))
+
+    async def _run_batch(self, topology, items):
+        args, futures = zip(*items)
+        frequency_hz, z_source, z_load, q_max = (np.array(column) for column in zip(*args))
+        start = time.perf_counter()
+        try:
+            # The solve runs off the event loop so sockets keep being served
+            records = await asyncio.get_running_loop().run_in_executor(
+                None, _solve_records, topology, frequency_hz.astype(float), z_source.astype(complex),
+                z_load.astype(complex), None if topology == 'L' else q_max.astype(float))
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for i, future in enumerate(futures):
+                if not future.done():
+                    future.set_result(records[4 * i:4 * i + 4])
+        finally:
+            self.pending -= len(items)
+        self.solve_latency.record(time.perf_counter() - start)
+        self.batches += 1
+        self.designs += len(items)
+        self.largest_batch = max(self.largest_batch, len(items))
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'designs': self.designs,
+            'mean_batch_size': self.designs / self.batches if self.batches else None,
+            'largest_batch': self.largest_batch,
+            'pending': self.pending,
+            'batch_solve_latency': self.solve_latency.summary(),
+        }
+
+def parse_impedance(value):
+    """A number, an 'R+Xj' string or an [R, X] pair as a complex impedance."""
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        return complex(float(value[0]), float(value[1]))
+    if isinstance(value, str):
+        return complex(value.replace(' ', '').replace('i', 'j'))
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return complex(value)
+    raise ValueError(f"invalid impedance {value!r}")
+
+def _field(request, name, convert):
+    """convert(request[name]); a missing or unconvertible value is a ValueError naming the field."""
+    if name not in request:
+        raise ValueError(f"missing field {name!r}")
+    try:
+        return convert(request[name])
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid {name} {request[name]!r}")
+
+def parse_match_request(body):
+    """(topology, frequency_hz, z_source, z_load, q_max) from a /match JSON body."""
+    request = json.loads(body)
+    if not isinstance(request, dict):
+        raise ValueError("request body must be a JSON object")
+    topology = TOPOLOGIES.get(_field(request, 'topology', lambda value: str(value).lower()))
+    if topology is None:
+        raise ValueError(f"unknown topology {request['topology']!r} (use L, T or Pi)")
+    if 'frequency_hz' in request:
+        frequency_hz = _field(request, 'frequency_hz', float)
+    else:
+        frequency_hz = _field(request, 'freq_mhz', float) * 1e6
+    z_source = _field(request, 'z_source', parse_impedance)
+    z_load = _field(request, 'z_load', parse_impedance)
+    q_max = None
+    if topology != 'L':
+        if request.get('q_max') is None:
+            raise ValueError(f"{topology}-section matching needs q_max")
+        q_max = _field(request, 'q_max', float)
+    return topology, frequency_hz, z_source, z_load, q_max
+
+class MatchingService:
+    """HTTP front end of a MicroBatcher; see the module comment for the API."""
+
+    def __init__(self, batcher=None):
+        self.batcher = batcher or MicroBatcher()
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.rejected = 0
+        self.errors = 0
+        self.started = time.time()
+
+    def stats(self):
+        return {
+            'uptime_s': time.time() - self.started,
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'request_latency': self.latency.summary(),
+            'batching': self.batcher.stats(),
+            'verification': asdict(verification_stats()),
+        }
+
+    async def handle_match(self, body):
+        topology, frequency_hz, z_source, z_load, q_max = parse_match_request(body)
+        records = await self.batcher.solve(topology, frequency_hz, z_source, z_load, q_max)
+        return {'solutions': list(json_rows(records))}
+
+    async def route(self, method, path, body):
+        """Returns (status, payload, extra headers)."""
+        if path == '/match':
+            if method != 'POST':
+                return 405, {'error': "use POST"}, {}
+            try:
+                return 200, await self.handle_match(body), {}
+            except ValueError as exc:
+                return 400, {'error': str(exc)}, {}
+            except Overloaded:
+                self.rejected += 1
+                return 503, {'error': "overloaded, retry later"}, {'Retry-After': '1'}
+        if path == '/stats' and method == 'GET':
+            return 200, self.stats(), {}
+        if path == '/health' and method == 'GET':
+            return 200, {'status': 'ok'}, {}
+        return 404, {'error': f"no route {method} {path}"}, {}
+
+    async def handle_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests on one keep-alive connection."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, {'error': "headers too large"}, {}, keep_alive=False)
+                    break
+                start = time.perf_counter()
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, _ = lines[0].split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': "bad request line"}, {}, keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {'error': "invalid Content-Length"}, {}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': "body too large"}, {}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                self.requests += 1
+                try:
+                    status, payload, extra = await self.route(method, target.split('?', 1)[0], body)
+                except Exception as exc:
+                    self.errors += 1
+                    status, payload, extra = 500, {'error': f"{type(exc).__name__}: {exc}"}, {}
+                await self._respond(writer, status, payload, extra, keep_alive)
+                self.latency.record(time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, extra, keep_alive):
+        body = json.dumps(payload).encode()
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                  413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+                  500: 'Internal Server Error', 503: 'Service Unavailable'}[status]
+        headers = {'Content-Type': 'application/json', 'Content-Length': str(len(body)),
+                   'Connection': 'keep-alive' if keep_alive else 'close', **extra}
+        head = f"HTTP/1.1 {status} {reason}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        writer.write(head.encode('latin-1') + b"\r\n" + body)
+        await writer.drain()
+
+def _check_loopback(host):
+    if host == 'localhost':
+        return
+    try:
+        loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError(f"Refusing to listen on {host!r}: the service is loopback-only.")
+
+async def serve(host='127.0.0.1', port=8765, window_s=0.002, max_batch=4096, max_pending=16384,
+                ready=None):
+    """Runs the service until cancelled. `ready`, if given, is called with the bound port."""
+    _check_loopback(host)
+    service = MatchingService(MicroBatcher(window_s, max_batch, max_pending))
+    server = await asyncio.start_server(service.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+    bound_port = server.sockets[0].getsockname()[1]
+    if ready is not None:
+        ready(bound_port)
+    async with server:
+        await server.serve_forever()
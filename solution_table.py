@@ -0,0 +1,235 @@
+import json
+import time
+
+import numpy as np
+
+from frequency_response import design_point_response, solve_batch
+
+# --- Precomputed Normalized Solution Tables ---
+# Matching solutions do not depend on frequency. Scaling both impedances by
+# 1/Rs scales every L/T reactance by 1/Rs, so one table over
+# (Rl/Rs, Xs/Rs, Xl/Rs[, Q_max]) answers every design with Rs > 0. Pi tables
+# use the dual admittance coordinates (Gl/Gs, Bs/Gs, Bl/Gs, Q_max), the same
+# way the Pi solver reuses the T math, and scale susceptances by Gs. A table
+# is built once into a flat binary file and opened with np.memmap, so
+# processes that open the same file share one page-cache copy.
+#
+# A lookup interpolates multilinearly between the 2**d surrounding grid
+# points. The build step also stores an error estimate for every grid cell:
+# the reflection |Gamma| of the interpolated network at the cell centre,
+# where linear interpolation error peaks. Cells whose corners disagree about a
+# solution's validity get an infinite error. The exact solver answers every
+# design that is off the grid or falls in a cell whose error exceeds
+# max_gamma, so a table hit costs one gather and no solve or check: hits are
+# not run through frequency_response.verify_batch, the cell error bound
+# stands in for it. Exact-solver fallbacks are verified as in solve_batch.
+#
+# File layout: 8-byte magic, uint32 header length, JSON header (topology,
+# axes, dtype, shape), zero padding to HEADER_ALIGN, the C-order solution
+# array grid_shape + (4, k), then the float32 cell errors (grid_shape - 1).
+
+MAGIC = b'RFTABLE1'
+HEADER_ALIGN = 64
+
+# (name, scale, start, stop, count); log axes are spaced evenly in log10
+DEFAULT_AXES = {
+    'L': (('r_ratio', 'log', 0.01, 100.0, 161),
+          ('x_source', 'linear', -5.0, 5.0, 101),
+          ('x_load', 'linear', -5.0, 5.0, 101)),
+    'T': (('r_ratio', 'log', 0.05, 20.0, 61),
+          ('x_source', 'linear', -3.0, 3.0, 41),
+          ('x_load', 'linear', -3.0, 3.0, 41),
+          ('q_max', 'linear', 1.0, 13.0, 25)),
+}
+DEFAULT_AXES['Pi'] = DEFAULT_AXES['T']
+
+def axis_values(axis):
+    """Grid values of one (name, scale, start, stop, count) axis."""
+    _, scale, start, stop, count = axis
+    if scale == 'log':
+        return np.logspace(np.log10(start), np.log10(stop), count)
+    return np.linspace(start, stop, count)
+
+def _axis_position(axis, values):
+    """Fractional grid index of each value (NaN for non-positive values on log axes)."""
+    _, scale, start, stop, count = axis
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if scale == 'log':
+            values, start, stop = np.log10(values), np.log10(start), np.log10(stop)
+        return (values - start) * ((count - 1) / (stop - start))
+
+def _grid_coordinates(topology, coords):
+    """(z_source, z_load, q_max) of normalized grid coordinates (Rs = 1, or Gs = 1 for Pi)."""
+    source = 1 + 1j * coords[1]
+    load = coords[0] + 1j * coords[2]
+    if topology == 'Pi':
+        source, load = 1 / source, 1 / load
+    q_max = coords[3] if topology != 'L' else None
+    return source, load, q_max
+
+def _normalize(topology, z_source, z_load):
+    """(resistance or conductance scale, [ratio, source part, load part]) of each design."""
+    if topology == 'Pi':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_source, z_load = 1 / z_source, 1 / z_load
+    scale = z_source.real
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return scale, [z_load.real / scale, z_source.imag / scale, z_load.imag / scale]
+
+def _corner_offsets(shape):
+    """Flat-index offsets of the 2**d corners of a grid cell, and their (d,) bit patterns."""
+    strides = np.array([int(np.prod(shape[i + 1:])) for i in range(len(shape))])
+    bits = (np.arange(2 ** len(shape))[:, None] >> np.arange(len(shape))[::-1]) & 1
+    return bits @ strides, bits
+
+def _data_offset(header_length):
+    return -(-(len(MAGIC) + 4 + header_length) // HEADER_ALIGN) * HEADER_ALIGN
+
+def build_table(path, topology, axes=None, dtype=np.float32, chunk_size=65536):
+    """
+    Solves every grid point of `axes` (DEFAULT_AXES[topology] by default),
+    estimates the interpolation error of every cell and writes the table to
+    `path`. Returns (grid points, seconds).
+    """
+    axes = tuple(tuple(a) for a in (axes or DEFAULT_AXES[topology]))
+    expected = 3 if topology == 'L' else 4
+    if len(axes) != expected:
+        raise ValueError(f"{topology}-section tables need {expected} axes, got {len(axes)}.")
+    dtype = np.dtype(dtype)
+    grid_shape = tuple(axis[4] for axis in axes)
+    cell_shape = tuple(n - 1 for n in grid_shape)
+    columns = 2 if topology == 'L' else 3
+    shape = grid_shape + (4, columns)
+    header = json.dumps({'topology': topology, 'axes': axes, 'dtype': dtype.str, 'shape': shape}).encode()
+    offset = _data_offset(len(header))
+    error_offset = offset + int(np.prod(shape)) * dtype.itemsize
+    values = [axis_values(axis) for axis in axes]
+
+    start_time = time.perf_counter()
+    with open(path, 'wb') as f:
+        f.write(MAGIC + np.uint32(len(header)).tobytes() + header)
+        f.write(b'\0' * (offset - f.tell()))
+    table = np.memmap(path, dtype=dtype, mode='r+', offset=offset, shape=shape)
+    flat = table.reshape((-1, 4, columns))
+    total = flat.shape[0]
+    for start in range(0, total, chunk_size):
+        indices = np.arange(start, min(start + chunk_size, total))
+        coords = [v[i] for v, i in zip(values, np.unravel_index(indices, grid_shape))]
+        flat[indices] = solve_batch(topology, 1.0, *_grid_coordinates(topology, coords))[0]
+    table.flush()
+
+    errors = np.memmap(path, dtype=np.float32, mode='r+', offset=error_offset, shape=cell_shape)
+    flat_errors = errors.reshape(-1)
+    offsets, _ = _corner_offsets(grid_shape)
+    centres = [(v[:-1] + v[1:]) / 2 if axis[1] == 'linear' else np.sqrt(v[:-1] * v[1:])
+               for v, axis in zip(values, axes)]
+    for start in range(0, flat_errors.size, chunk_size):
+        cells = np.arange(start, min(start + chunk_size, flat_errors.size))
+        cell_index = np.unravel_index(cells, cell_shape)
+        corners = flat[np.ravel_multi_index(cell_index, grid_shape)[:, None] + offsets].astype(float)
+        # Geometric centres on log axes sit halfway in log space, where the
+        # corner mean is the multilinear interpolant
+        interpolated = corners.mean(axis=1)
+        coords = [c[i] for c, i in zip(centres, cell_index)]
+        z_source, z_load, q_max = _grid_coordinates(topology, coords)
+        exact = solve_batch(topology, 1.0, z_source, z_load, q_max)[0]
+        gamma = np.abs(design_point_response(topology, interpolated, z_source, z_load)['gamma'])
+
+        corner_nan = np.isnan(corners).any(axis=-1)
+        all_valid = ~corner_nan.any(axis=1)
+        all_invalid = corner_nan.all(axis=1)
+        exact_valid = ~np.isnan(exact).any(axis=-1)
+        slot_error = np.where(all_valid & exact_valid, gamma,
+                              np.where(all_invalid & ~exact_valid, 0.0, np.inf))
+        flat_errors[cells] = slot_error.max(axis=-1)
+    errors.flush()
+    del flat, table, flat_errors, errors
+    return total, time.perf_counter() - start_time
+
+class SolutionTable:
+    """
+    Read-only, memory-mapped solution table (see build_table).
+    lookup() mirrors solve_batch and counts how many designs were answered
+    from the table (`hits`) versus the exact solver (`fallbacks`).
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a solution table.")
+            length = int(np.frombuffer(f.read(4), dtype=np.uint32)[0])
+            header = json.loads(f.read(length))
+        dtype = np.dtype(header['dtype'])
+        shape = tuple(header['shape'])
+        offset = _data_offset(length)
+        self.path = path
+        self.topology = header['topology']
+        self.axes = tuple(tuple(a) for a in header['axes'])
+        self.grid_shape = shape[:-2]
+        self.table = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+        self.cell_errors = np.memmap(path, dtype=np.float32, mode='r',
+                                     offset=offset + int(np.prod(shape)) * dtype.itemsize,
+                                     shape=tuple(n - 1 for n in self.grid_shape))
+        self._flat = self.table.reshape((-1,) + shape[-2:])
+        self._offsets, self._bits = _corner_offsets(self.grid_shape)
+        self.hits = 0
+        self.fallbacks = 0
+
+    def stats(self):
+        lookups = self.hits + self.fallbacks
+        return {'hits': self.hits, 'fallbacks': self.fallbacks,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def lookup(self, frequency_hz, z_source, z_load, q_max=None, max_gamma=1e-2):
+        """
+        (BATCH) Same inputs and (solutions, valid, omega) output as solve_batch.
+        Designs in cells with an estimated |Gamma| error above max_gamma
+        (default 1e-2, i.e. 40 dB return loss) and designs off the grid go to
+        the exact solver. Only those fallbacks are verified; table hits skip
+        verify_batch and are bounded by max_gamma instead.
+        """
+        topology = self.topology
+        arrays = [np.asarray(frequency_hz, dtype=float), np.asarray(z_source, dtype=complex),
+                  np.asarray(z_load, dtype=complex)]
+        if topology != 'L':
+            if q_max is None:
+                raise ValueError(f"{topology}-section matching needs a Q_max.")
+            arrays.append(np.asarray(q_max, dtype=float))
+        arrays = np.broadcast_arrays(*arrays)
+        design_shape = arrays[0].shape
+        frequency_hz, z_source, z_load = (a.reshape(-1) for a in arrays[:3])
+        q_max = arrays[3].reshape(-1) if topology != 'L' else None
+
+        scale, coords = _normalize(topology, z_source, z_load)
+        if q_max is not None:
+            coords.append(q_max)
+        positions = np.array([_axis_position(axis, c) for axis, c in zip(self.axes, coords)])
+        n = np.array(self.grid_shape)[:, None]
+        inside = (scale > 0) & ((positions >= 0) & (positions <= n - 1)).all(axis=0)
+        base = np.clip(np.floor(np.where(inside, positions, 0)), 0, n - 2).astype(np.intp)
+        inside &= self.cell_errors[tuple(base)] <= max_gamma
+
+        solutions = np.full((frequency_hz.size,) + self.table.shape[-2:], np.nan)
+        rows = np.flatnonzero(inside)
+        if rows.size:
+            frac = positions[:, rows] - base[:, rows]
+            # Corner weights: product over axes of frac (bit 1) or 1 - frac (bit 0)
+            weights = np.prod(np.where(self._bits.T[:, :, None] == 1, frac[:, None], 1 - frac[:, None]), axis=0)
+            corners = self._flat[np.ravel_multi_index(tuple(base[:, rows]), self.grid_shape)[None] +
+                                 self._offsets[:, None]]
+            values = np.einsum('cn,cnsk->nsk', weights, corners)
+            # Reactances scale with Rs; Pi susceptances (normalized to Gs = 1) with Gs
+            solutions[rows] = values * scale[rows, None, None]
+
+        fallback = np.flatnonzero(~inside)
+        if fallback.size:
+            solutions[fallback] = solve_batch(topology, frequency_hz[fallback], z_source[fallback],
+                                              z_load[fallback], None if q_max is None else q_max[fallback])[0]
+        self.hits += rows.size
+        self.fallbacks += fallback.size
+
+        valid = ~np.isnan(solutions).any(axis=-1) & (np.abs(frequency_hz) >= 1e-12)[:, None]
+        solutions[~valid] = np.nan
+        omega = 2 * np.pi * frequency_hz
+        return (solutions.reshape(design_shape + solutions.shape[1:]), valid.reshape(design_shape + (4,)),
+                omega.reshape(design_shape))
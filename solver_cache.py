@@ -0,0 +1,154 @@
+import copy
+import math
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# --- Opt-in Memoization for the Matching Solvers ---
+# Nothing is cached until enable_cache() installs a SolverCache. From then on
+# memoize() (used in front of solve_match, _solve_t_pi_math and scalar
+# solve_batch calls) answers repeated queries from a bounded, thread-safe LRU.
+# Numeric arguments are quantized to a relative tolerance, so queries that
+# agree within it share an entry and get the result of the first such query.
+
+CACHE_FORMAT = 1
+
+def quantize(value, rel_tol, abs_tol):
+    """Hashable bucket for a number: equal for values within ~rel_tol of each other."""
+    if isinstance(value, complex):
+        return (quantize(value.real, rel_tol, abs_tol), quantize(value.imag, rel_tol, abs_tol))
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = float(value)
+        if not math.isfinite(value) or abs(value) < abs_tol:
+            return 0.0 if math.isfinite(value) else value
+        mantissa, exponent = math.frexp(value)
+        return (round(mantissa / rel_tol), exponent)
+    return value
+
+class SolverCache:
+    """
+    Bounded LRU with optional time-to-live.
+    max_entries: entries kept before the least recently used is evicted.
+    ttl_s: seconds an entry stays valid (None = forever).
+    rel_tol / abs_tol: quantization of numeric key arguments.
+    """
+
+    def __init__(self, max_entries=4096, ttl_s=None, rel_tol=1e-9, abs_tol=1e-12):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()   # key -> (value, created wall time)
+        self._lock = threading.RLock()
+
+    def make_key(self, name, args):
+        return (name,) + tuple(quantize(a, self.rel_tol, self.abs_tol) for a in args)
+
+    def _expired(self, created):
+        return self.ttl_s is not None and time.time() - created > self.ttl_s
+
+    def get_or_compute(self, name, compute, *args):
+        """Returns a copy of the cached compute(*args), computing and storing it on a miss."""
+        key = self.make_key(name, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry[1]):
+                    del self._entries[key]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[0])
+            self.misses += 1
+
+        value = compute(*args)
+        self._store(key, copy.deepcopy(value), time.time())
+        return value
+
+    def _store(self, key, value, created):
+        with self._lock:
+            self._entries[key] = (value, created)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Hit/miss/eviction counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    # --- Persistence ---
+    # The file is a pickle: only warm from files you wrote yourself.
+
+    def save(self, path):
+        """Writes all live entries to `path` (atomically)."""
+        with self._lock:
+            entries = [(k, v, created) for k, (v, created) in self._entries.items()
+                       if not self._expired(created)]
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump({'format': CACHE_FORMAT, 'rel_tol': self.rel_tol, 'abs_tol': self.abs_tol,
+                         'entries': entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        return len(entries)
+
+    def warm(self, path):
+        """Loads entries saved with the same format and tolerances. Returns how many were kept."""
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if (data.get('format') != CACHE_FORMAT or data.get('rel_tol') != self.rel_tol
+                or data.get('abs_tol') != self.abs_tol):
+            return 0
+        loaded = 0
+        for key, value, created in data['entries']:
+            if not self._expired(created):
+                self._store(key, value, created)
+                loaded += 1
+        return loaded
+
+_active = None
+
+def enable_cache(cache=None, **kwargs):
+    """Installs `cache` (or a new SolverCache(**kwargs)) in front of the solvers and returns it."""
+    global _active
+    _active = cache if cache is not None else SolverCache(**kwargs)
+    return _active
+
+def disable_cache():
+    global _active
+    _active = None
+
+def active_cache():
+    return _active
+
+def memoize(name, compute, *args):
+    """compute(*args), answered from the active cache when one is enabled."""
+    cache = _active
+    if cache is None:
+        return compute(*args)
+    return cache.get_or_compute(name, compute, *args)
@@ -0,0 +1,273 @@
+import numpy as np
+
+from frequency_response import abcd_response, cascade_abcd
+
+# --- Distributed (Transmission-Line) Matching ---
+# Quarter-wave transformers and single/double stub tuners on a line of
+# characteristic impedance z0. Like the lumped solvers, every solver is
+# vectorized over broadcast (frequency, Zs, Zl) arrays, matches Zin = Zs* and
+# returns (solutions, valid, omega). Lengths are in wavelengths on the line;
+# physical_length converts them for a given effective permittivity.
+#
+# Solution columns and slots (elements listed from SOURCE to LOAD):
+#   'QW'              (d_wl, z_t_ohm), 2 slots: line of length d from the load
+#                     to a voltage maximum / minimum, then a lambda/4 section
+#                     of impedance z_t.  Source -> [lambda/4, z_t] -> [d, z0] -> load
+#   'StubShunt'       (d_wl, stub_wl), 4 slots: both roots with a short stub
+#   'StubSeries'      (slots 0-1), then both roots with an open stub (2-3).
+#                     Source -> stub -> [d, z0] -> load
+#   'DoubleStubShunt' (d0_wl, stub1_wl, spacing_wl, stub2_wl), 4 slots as above.
+#   'DoubleStubSeries' Source -> stub2 -> [spacing, z0] -> stub1 -> [d0, z0] -> load
+# Series variants are the impedance-domain duals of the shunt ones.
+
+SPEED_OF_LIGHT = 299792458.0
+
+DISTRIBUTED_TOPOLOGIES = ('QW', 'StubShunt', 'StubSeries', 'DoubleStubShunt', 'DoubleStubSeries')
+STUB_KINDS = ('short', 'short', 'open', 'open')   # stub termination of each stub slot
+
+def physical_length(length_wl, frequency_hz, eps_eff=1.0):
+    """Length in metres of `length_wl` wavelengths at frequency_hz on a line with eps_eff."""
+    return np.asarray(length_wl) * SPEED_OF_LIGHT / (np.asarray(frequency_hz) * np.sqrt(eps_eff))
+
+def _transform(y, length_wl):
+    """Normalized immittance seen through a matched line section of length_wl (same form for y and z)."""
+    t = np.tan(2 * np.pi * length_wl)
+    return (y + 1j * t) / (1 + 1j * y * t)
+
+def _stub_length(w, position, kind):
+    """Stub length (wavelengths, in [0, 0.5)) whose normalized immittance is j*w."""
+    # Shunt-open and series-short stubs follow j*tan(beta*l); the others -j*cot(beta*l)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if (position == 'shunt') == (kind == 'open'):
+            angle = np.arctan(w)
+        else:
+            angle = np.arctan(-1 / w)
+    return np.mod(angle / (2 * np.pi), 0.5)
+
+def _normalized(z_source, z_load, z0, position):
+    """Normalized load and conjugate-target immittances in the stub's domain (Y for shunt, Z for series)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if position == 'shunt':
+            return z0 / z_load, z0 / np.conj(z_source)
+        return z_load / z0, np.conj(z_source) / z0
+
+def _broadcast(frequency_hz, z_source, z_load, z0):
+    return np.broadcast_arrays(np.asarray(frequency_hz, dtype=float), np.asarray(z_source, dtype=complex),
+                               np.asarray(z_load, dtype=complex), np.asarray(z0, dtype=float))
+
+def solve_quarter_wave_batch(frequency_hz, z_source, z_load, z0=50.0):
+    """
+    (BATCH) Quarter-wave transformer after a z0 line section that makes the
+    load real. Zs must be real. Returns (solutions (..., 2, 2), valid, omega).
+    """
+    frequency_hz, z_source, z_load, z0 = _broadcast(frequency_hz, z_source, z_load, z0)
+    omega = 2 * np.pi * frequency_hz
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gamma = (z_load - z0) / (z_load + z0)
+        mag = np.abs(gamma)
+        d_max = np.mod(np.angle(gamma) / (4 * np.pi), 0.5)
+        d = np.stack([d_max, np.mod(d_max + 0.25, 0.5)], axis=-1)
+        r_max = z0 * (1 + mag) / (1 - mag)
+        r_real = np.stack([r_max, z0 ** 2 / r_max], axis=-1)
+        z_t = np.sqrt(z_source.real[..., None] * r_real)
+    solutions = np.stack([d, z_t], axis=-1)
+    ok = ((np.abs(z_source.imag) <= 1e-9 * np.maximum(1, np.abs(z_source))) & (z_source.real > 0)
+          & (z_load.real > 0) & (z0 > 0) & (np.abs(omega) >= 1e-12))
+    valid = ok[..., None] & np.isfinite(solutions).all(axis=-1)
+    solutions[~valid] = np.nan
+    return solutions, valid, omega
+
+def solve_single_stub_batch(frequency_hz, z_source, z_load, z0=50.0, position='shunt'):
+    """
+    (BATCH) Single-stub tuner: a z0 line of length d from the load, then a
+    shunt (or series) stub. Returns (solutions (..., 4, 2), valid, omega).
+    """
+    frequency_hz, z_source, z_load, z0 = _broadcast(frequency_hz, z_source, z_load, z0)
+    omega = 2 * np.pi * frequency_hz
+    y, y_target = _normalized(z_source, z_load, z0, position)
+    g, b, g_t = y.real, y.imag, y_target.real
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Re{y(d)} = g_t with t = tan(beta d):  a t^2 + b' t + c = 0
+        a = g - g_t * (g ** 2 + b ** 2)
+        bb = 2 * g_t * b
+        c = g - g_t
+        sqrt_disc = np.sqrt(np.where(bb ** 2 - 4 * a * c >= 0, bb ** 2 - 4 * a * c, np.nan))
+        linear = np.abs(a) < 1e-12
+        t = np.stack([np.where(linear, -c / bb, (-bb + sqrt_disc) / (2 * a)),
+                      np.where(linear, np.inf, (-bb - sqrt_disc) / (2 * a))], axis=-1)
+        d = np.mod(np.arctan(t) / (2 * np.pi), 0.5)
+        w_stub = y_target.imag[..., None] - _transform(y[..., None], d).imag
+
+    stub = np.concatenate([_stub_length(w_stub, position, 'short'), _stub_length(w_stub, position, 'open')], axis=-1)
+    solutions = np.stack([np.concatenate([d, d], axis=-1), stub], axis=-1)
+    ok = (g > 0) & (g_t > 0) & (z0 > 0) & (np.abs(omega) >= 1e-12)
+    valid = ok[..., None] & np.isfinite(solutions).all(axis=-1)
+    solutions[~valid] = np.nan
+    return solutions, valid, omega
+
+def solve_double_stub_batch(frequency_hz, z_source, z_load, z0=50.0, position='shunt',
+                            spacing_wl=0.125, d0_wl=0.0):
+    """
+    (BATCH) Double-stub tuner: stub 1 at d0_wl from the load, stub 2 a further
+    spacing_wl toward the source. Loads inside the forbidden region have no
+    solution. Returns (solutions (..., 4, 4), valid, omega).
+    """
+    frequency_hz, z_source, z_load, z0 = _broadcast(frequency_hz, z_source, z_load, z0)
+    omega = 2 * np.pi * frequency_hz
+    y, y_target = _normalized(z_source, z_load, z0, position)
+    y1 = _transform(y, d0_wl)
+    g, b_load, g_t = y1.real, y1.imag, y_target.real
+    t = np.tan(2 * np.pi * spacing_wl)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Total susceptance at stub 1 that puts y on the g = g_t circle after the spacing
+        disc = g * (1 + t ** 2) / g_t - (g * t) ** 2
+        root = np.sqrt(np.where(disc >= 0, disc, np.nan))
+        b_total = np.stack([(1 - root) / t, (1 + root) / t], axis=-1)
+        w_stub1 = b_total - b_load[..., None]
+        y2 = _transform(g[..., None] + 1j * b_total, spacing_wl)
+        w_stub2 = y_target.imag[..., None] - y2.imag
+
+    stub1 = np.concatenate([_stub_length(w_stub1, position, 'short'), _stub_length(w_stub1, position, 'open')], axis=-1)
+    stub2 = np.concatenate([_stub_length(w_stub2, position, 'short'), _stub_length(w_stub2, position, 'open')], axis=-1)
+    d0 = np.broadcast_to(np.float64(d0_wl), stub1.shape)
+    spacing = np.broadcast_to(np.float64(spacing_wl), stub1.shape)
+    solutions = np.stack([d0, stub1, spacing, stub2], axis=-1)
+    ok = (g > 0) & (g_t > 0) & (z0 > 0) & (np.abs(omega) >= 1e-12) & (np.abs(t) > 1e-9)
+    valid = ok[..., None] & np.isfinite(solutions).all(axis=-1)
+    solutions[~valid] = np.nan
+    return solutions, valid, omega
+
+def solve_distributed_batch(topology, frequency_hz, z_source, z_load, z0=50.0, **options):
+    """Dispatches to the quarter-wave / stub solvers by topology name."""
+    if topology == 'QW':
+        return solve_quarter_wave_batch(frequency_hz, z_source, z_load, z0)
+    if topology in ('StubShunt', 'StubSeries'):
+        position = 'shunt' if topology == 'StubShunt' else 'series'
+        return solve_single_stub_batch(frequency_hz, z_source, z_load, z0, position)
+    if topology in ('DoubleStubShunt', 'DoubleStubSeries'):
+        position = 'shunt' if topology == 'DoubleStubShunt' else 'series'
+        return solve_double_stub_batch(frequency_hz, z_source, z_load, z0, position, **options)
+    raise ValueError(f"Unknown topology '{topology}'. Use one of {DISTRIBUTED_TOPOLOGIES}.")
+
+# --- Frequency Response ---
+
+def _stub_immittance(position, kind, z0, theta):
+    """Series stub impedance or shunt stub admittance at electrical length theta."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = 1j * np.tan(theta) if (position == 'shunt') == (kind == 'open') else -1j / np.tan(theta)
+    return w * z0 if position == 'series' else w / z0
+
+def distributed_elements(topology, solutions, z0, ratio):
+    """
+    Layout of every slot as cascade_abcd elements, source to load.
+    ratio: omega / omega0 (electrical lengths scale with frequency).
+    Returns [(slot slice, elements)].
+    """
+    theta = lambda wl: 2 * np.pi * wl[..., None] * ratio
+    z0 = np.asarray(z0, dtype=float)[..., None, None]
+    if topology == 'QW':
+        s = solutions
+        return [(slice(0, 2), [('line', (s[..., 1, None], theta(np.full(s.shape[:-1], 0.25)))),
+                               ('line', (z0, theta(s[..., 0])))])]
+    position = 'shunt' if topology.endswith('Shunt') else 'series'
+    parts = []
+    for slots, kind in ((slice(0, 2), 'short'), (slice(2, 4), 'open')):
+        s = solutions[..., slots, :]
+        if topology.startswith('Stub'):
+            elements = [(position, _stub_immittance(position, kind, z0, theta(s[..., 1]))),
+                        ('line', (z0, theta(s[..., 0])))]
+        else:
+            elements = [(position, _stub_immittance(position, kind, z0, theta(s[..., 3]))),
+                        ('line', (z0, theta(s[..., 2]))),
+                        (position, _stub_immittance(position, kind, z0, theta(s[..., 1]))),
+                        ('line', (z0, theta(s[..., 0])))]
+        parts.append((slots, elements))
+    return parts
+
+def distributed_response(topology, solutions, frequency_hz, z_source, z_load, freq_grid_hz, z0=50.0):
+    """
+    (BATCH) frequency_response for distributed solutions: Zin, Gamma, return
+    loss and VSWR over freq_grid_hz as a dict of (..., S, F) arrays.
+    """
+    ratio = np.asarray(freq_grid_hz, dtype=float) / np.asarray(frequency_hz, dtype=float)[..., None, None]
+    parts = [cascade_abcd(elements) for _, elements in distributed_elements(topology, solutions, z0, ratio)]
+    abcd = tuple(np.concatenate(p, axis=-2) for p in zip(*parts))
+    return abcd_response(abcd, z_source, z_load)
+
+# --- Structured Results and Console Output ---
+
+def distributed_solutions(topology, solutions, valid, frequency_hz, z_source, z_load, z0=50.0, eps_eff=1.0):
+    """MatchingSolution objects (with LineElement elements) for one design's valid slots."""
+    from results import LineElement, MatchingSolution
+
+    metres = lambda wl: float(physical_length(wl, frequency_hz, eps_eff))
+    results = []
+    for slot in np.flatnonzero(valid):
+        s = solutions[slot]
+        if topology == 'QW':
+            elements = (LineElement('line', 'line', float(s[1]), 0.25, metres(0.25)),
+                        LineElement('line', 'line', float(z0), float(s[0]), metres(s[0])))
+        else:
+            position = 'shunt' if topology.endswith('Shunt') else 'series'
+            stub = lambda wl: LineElement(position, STUB_KINDS[slot], float(z0), float(wl), metres(wl))
+            line = lambda wl: LineElement('line', 'line', float(z0), float(wl), metres(wl))
+            if topology.startswith('Stub'):
+                elements = (stub(s[1]), line(s[0]))
+            else:
+                elements = (stub(s[3]), line(s[2]), stub(s[1]), line(s[0]))
+        results.append(MatchingSolution(topology, topology, int(slot) + 1, float(frequency_hz), complex(z_source),
+                                        complex(z_load), np.nan, True, elements))
+    return results
+
+def format_line_console(solution):
+    """Console block for one distributed solution, as a list of lines."""
+    lines = [f"--- Solution {solution.solution_number} ---"]
+    for e in solution.elements:
+        what = (f"Line (Z0 = {e.z0_ohm:.2f} Ω)" if e.position == 'line'
+                else f"{e.position.capitalize()} {e.kind} stub")
+        lines.append(f"  {what + ':':<28}{e.length_wl:.4f} λ = {e.length_m * 1e3:.3f} mm")
+    return lines
+
+def calculate_stub_section(frequency_hz, z_source, z_load, topology='StubShunt', z0=50.0, eps_eff=1.0, **options):
+    """
+    Calculates and prints distributed matching networks (source to load), the
+    counterpart of calculate_l_section. Returns MatchingSolution objects.
+    """
+    solutions, valid, _ = solve_distributed_batch(topology, frequency_hz, z_source, z_load, z0, **options)
+    results = distributed_solutions(topology, solutions, valid, frequency_hz, z_source, z_load, z0, eps_eff)
+
+    print("\n-------------------------------------------")
+    print(f" {topology} Transmission-Line Matching Solutions")
+    print(f" Matching Zs = {z_source} Ω to Zl = {z_load} Ω @ {frequency_hz / 1e6} MHz")
+    print(f" Line Z0 = {z0} Ω, ε_eff = {eps_eff} (λ = {physical_length(1.0, frequency_hz, eps_eff) * 1e3:.2f} mm)")
+    print("-------------------------------------------\n")
+    if not results:
+        reason = ("the quarter-wave transformer needs a real, positive Zs" if topology == 'QW'
+                  else "no real solution for this load (forbidden region or zero resistance)")
+        print(f"❌ No {topology} match possible: {reason}.")
+    for result in results:
+        print("\n".join(format_line_console(result)))
+    print("\n-------------------------------------------")
+    return results
+
+def print_distributed_bandwidth_report(topology, frequency_hz, z_source, z_load, z0=50.0, threshold_db=10.0,
+                                       points=20001, **options):
+    """Achieved bandwidth of every valid distributed solution (cf. print_bandwidth_report)."""
+    from frequency_response import matched_bandwidth
+
+    solutions, valid, _ = solve_distributed_batch(topology, frequency_hz, z_source, z_load, z0, **options)
+    freq_grid = np.linspace(0.5 * frequency_hz, 1.5 * frequency_hz, points)
+    response = distributed_response(topology, solutions, frequency_hz, z_source, z_load, freq_grid, z0)
+    bandwidth, f_low, f_high = matched_bandwidth(freq_grid, response['return_loss_db'], frequency_hz, threshold_db)
+
+    print("\n-------------------------------------------")
+    print(f" Achieved -{threshold_db:g} dB Bandwidth ({topology})")
+    print("-------------------------------------------")
+    for k in np.flatnonzero(valid):
+        if np.isnan(bandwidth[k]):
+            continue
+        at_edge = f_low[k] <= freq_grid[0] or f_high[k] >= freq_grid[-1]
+        print(f"  Solution {k + 1}: BW {'>= ' if at_edge else ''}{bandwidth[k] / 1e6:.3f} MHz "
+              f"({f_low[k] / 1e6:.3f} - {f_high[k] / 1e6:.3f} MHz), Q_loaded = {frequency_hz / bandwidth[k]:.2f}")
@@ -0,0 +1,194 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from frequency_response import VerificationStats, solve_batch, verify_batch
+
+# --- Process-Pool Design-Space Sweep ---
+# The grid is the outer product of (frequency, Zs, Zl, Q_max). It is split into
+# flat index chunks; every worker solves its chunk with the batch solvers and
+# writes straight into shared-memory result arrays, so no results are pickled.
+# Solutions are verified in the workers; each chunk reports its verification
+# totals back with its point count.
+
+GRID_AXES = ('frequency_hz', 'z_source', 'z_load', 'q_max')
+SOLUTION_COLUMNS = {'L': 2, 'T': 3, 'Pi': 3}
+
+# Per-worker state, set once by _init_worker
+_worker = {}
+
+def _init_worker(topology, axes, solutions_spec, valid_spec, verify, tolerance):
+    """Pool initializer: keeps the grid axes and attaches the shared result buffers."""
+    _worker['topology'] = topology
+    _worker['axes'] = axes
+    _worker['verify'] = (verify, tolerance)
+    _worker['shm'] = []
+    for key, (name, shape, dtype) in (('solutions', solutions_spec), ('valid', valid_spec)):
+        shm = shared_memory.SharedMemory(name=name)
+        _worker['shm'].append(shm)
+        _worker[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _solve_chunk(start, stop):
+    """
+    Solves flat grid points [start, stop) into the shared buffers.
+    Returns (point count, VerificationStats of the chunk).
+    """
+    frequency_hz, z_source, z_load, q_max = _worker['axes']
+    grid_shape = (len(frequency_hz), len(z_source), len(z_load), len(q_max))
+    fi, si, li, qi = np.unravel_index(np.arange(start, stop), grid_shape)
+    topology, (verify, tolerance) = _worker['topology'], _worker['verify']
+    solutions, valid, _ = solve_batch(topology, frequency_hz[fi], z_source[si], z_load[li], q_max[qi],
+                                      verify=None)
+    # Local totals: forked workers inherit the parent's process-wide counters
+    stats = VerificationStats()
+    if verify:
+        solutions, valid, _ = verify_batch(topology, solutions, valid, z_source[si], z_load[li],
+                                           tolerance, verify, stats)
+    _worker['solutions'][start:stop] = solutions
+    _worker['valid'][start:stop] = valid
+    return stop - start, stats
+
+class SweepResult:
+    """
+    Owns the shared-memory result arrays of a sweep.
+    `solutions` has shape grid_shape + (4, k) and `valid` grid_shape + (4,),
+    with grid_shape = (n_freq, n_zs, n_zl, n_q). `verification` holds the
+    totals of the solution check. Call close() (or use it as a context
+    manager) to release the shared memory.
+    """
+
+    def __init__(self, topology, axes, elapsed_s):
+        self.topology = topology
+        self.axes = axes
+        self.grid_shape = tuple(len(a) for a in axes)
+        self.elapsed_s = elapsed_s
+        self.verification = VerificationStats()
+        self.solutions = None
+        self.valid = None
+        self._shm = []
+
+    @property
+    def points(self):
+        return int(np.prod(self.grid_shape))
+
+    @property
+    def points_per_second(self):
+        return self.points / self.elapsed_s if self.elapsed_s > 0 else float('inf')
+
+    def iter_batches(self, chunk_size=65536):
+        """
+        (GENERATOR) Yields (frequency_hz, z_source, z_load, q_max, solutions,
+        valid) chunks covering the grid in flat order.
+        """
+        solutions = self.solutions.reshape((self.points,) + self.solutions.shape[-2:])
+        valid = self.valid.reshape(self.points, 4)
+        for start in range(0, self.points, chunk_size):
+            stop = min(start + chunk_size, self.points)
+            fi, si, li, qi = np.unravel_index(np.arange(start, stop), self.grid_shape)
+            frequency_hz, z_source, z_load, q_max = self.axes
+            yield (frequency_hz[fi], z_source[si], z_load[li], q_max[qi],
+                   solutions[start:stop], valid[start:stop])
+
+    def iter_records(self, chunk_size=65536):
+        """(GENERATOR) Yields results.RESULT_DTYPE chunks covering the grid in flat order."""
+        from results import records_from_batch
+
+        for frequency_hz, z_source, z_load, q_max, solutions, valid in self.iter_batches(chunk_size):
+            yield records_from_batch(self.topology, frequency_hz, z_source, z_load, solutions, valid, q_max)
+
+    def write_store(self, path, precision=None, chunk_size=65536):
+        """
+        Appends the grid to a result_store.ResultStore at `path`, created in
+        `precision` (default float64) if missing. An existing store keeps its
+        precision; asking for a different one raises ValueError. Returns the store.
+        """
+        from result_store import META_FILE, ResultStore
+
+        if os.path.exists(os.path.join(path, META_FILE)):
+            store = ResultStore(path, mode='a')
+            if precision is not None and precision != store.precision:
+                raise ValueError(f"Result store {path} holds {store.precision} data, not {precision}.")
+        else:
+            store = ResultStore.create(path, precision or 'float64')
+        for frequency_hz, z_source, z_load, q_max, solutions, valid in self.iter_batches(chunk_size):
+            store.append(self.topology, frequency_hz, z_source, z_load, solutions, valid, q_max)
+        return store
+
+    def close(self):
+        self.solutions = self.valid = None
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+        self._shm = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _allocate(result, key, shape, dtype):
+    """Creates a shared-memory array on `result` and returns its (name, shape, dtype) spec."""
+    dtype = np.dtype(dtype)
+    nbytes = max(int(np.prod(shape)) * dtype.itemsize, 1)
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    result._shm.append(shm)
+    setattr(result, key, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+    return shm.name, shape, dtype.str
+
+def run_sweep(topology, frequency_hz, z_source, z_load, q_max=None,
+              workers=None, chunk_size=65536, progress=True, verify='drop', tolerance=None):
+    """
+    Sweeps the full (frequency, Zs, Zl, Q_max) grid for one topology over a
+    process pool. `workers` defaults to os.cpu_count(); `chunk_size` is the
+    number of grid points per task. verify / tolerance are passed to
+    solve_batch. Returns a SweepResult.
+    """
+    if topology not in SOLUTION_COLUMNS:
+        raise ValueError(f"Unknown topology '{topology}'. Use one of {tuple(SOLUTION_COLUMNS)}.")
+    if q_max is None:
+        if topology != 'L':
+            raise ValueError(f"{topology}-section sweeps need Q_max values.")
+        q_max = [np.nan]
+    axes = (np.atleast_1d(np.asarray(frequency_hz, dtype=float)),
+            np.atleast_1d(np.asarray(z_source, dtype=complex)),
+            np.atleast_1d(np.asarray(z_load, dtype=complex)),
+            np.atleast_1d(np.asarray(q_max, dtype=float)))
+    grid_shape = tuple(len(a) for a in axes)
+    total = int(np.prod(grid_shape))
+    workers = workers or os.cpu_count() or 1
+
+    result = SweepResult(topology, axes, 0.0)
+    flat = (total, 4)
+    solutions_spec = _allocate(result, 'solutions', flat + (SOLUTION_COLUMNS[topology],), np.float64)
+    valid_spec = _allocate(result, 'valid', flat, np.bool_)
+
+    start_time = time.perf_counter()
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(topology, axes, solutions_spec, valid_spec, verify, tolerance)) as pool:
+            futures = [pool.submit(_solve_chunk, start, min(start + chunk_size, total))
+                       for start in range(0, total, chunk_size)]
+            for future in as_completed(futures):
+                points, verification = future.result()
+                done += points
+                result.verification.merge(verification)
+                if progress:
+                    elapsed = time.perf_counter() - start_time
+                    rate = done / elapsed if elapsed > 0 else float('inf')
+                    print(f"\r  Sweep {topology}: {done:,}/{total:,} points "
+                          f"({100 * done / total:5.1f}%), {rate:,.0f} points/s", end='', flush=True)
+    except BaseException:
+        result.close()
+        raise
+    if progress:
+        print()
+
+    result.elapsed_s = time.perf_counter() - start_time
+    result.solutions = result.solutions.reshape(grid_shape + result.solutions.shape[1:])
+    result.valid = result.valid.reshape(grid_shape + (4,))
+    return result
@@ -0,0 +1,25 @@
+import re
+
+import frequency_response
+from frequency_response import print_bandwidth_report
+
+def _numbers(output):
+    return [int(n) for n in re.findall(r'Solution (\d+):', output)]
+
+def test_no_valid_solution_prints_nothing(capsys):
+    print_bandwidth_report('L', 100e6, 50.0, 50.0)
+    assert capsys.readouterr().out == ''
+
+def test_numbers_follow_the_solver_slots(capsys, monkeypatch):
+    verify_batch = frequency_response.verify_batch
+
+    def drop_first(topology, solutions, valid, *args, **kwargs):
+        valid = valid.copy()
+        valid[valid.argmax()] = False
+        return verify_batch(topology, solutions, valid, *args, **kwargs)
+
+    print_bandwidth_report('T', 100e6, 50.0, 10 - 25j, 5.0)
+    assert _numbers(capsys.readouterr().out) == [1, 2, 3, 4]
+    monkeypatch.setattr(frequency_response, 'verify_batch', drop_first)
+    print_bandwidth_report('T', 100e6, 50.0, 10 - 25j, 5.0)
+    assert _numbers(capsys.readouterr().out) == [2, 3, 4]
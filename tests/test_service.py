@@ -0,0 +1,33 @@
+import asyncio
+import json
+
+import pytest
+
+from service import MatchingService, parse_match_request
+
+def _route(body):
+    service = MatchingService()
+    return asyncio.run(service.route('POST', '/match', json.dumps(body).encode()))
+
+def test_bad_q_max_is_a_400_naming_the_field():
+    status, payload, _ = _route({'topology': 'T', 'frequency_hz': 1e8, 'z_source': 50,
+                                 'z_load': [10, -25], 'q_max': [1]})
+    assert status == 400
+    assert 'q_max' in payload['error']
+
+def test_bad_frequency_is_a_400_naming_the_field():
+    status, payload, _ = _route({'topology': 'L', 'frequency_hz': {'value': 1e8}, 'z_source': 50,
+                                 'z_load': [10, -25]})
+    assert status == 400
+    assert 'frequency_hz' in payload['error']
+
+@pytest.mark.parametrize('field, value', [('z_source', ['a', 'b']), ('z_load', None), ('freq_mhz', 'fast')])
+def test_parse_names_the_invalid_field(field, value):
+    request = {'topology': 'L', 'freq_mhz': 100, 'z_source': 50, 'z_load': 25}
+    request[field] = value
+    with pytest.raises(ValueError, match=field):
+        parse_match_request(json.dumps(request))
+
+def test_valid_request_parses():
+    assert parse_match_request('{"topology": "pi", "freq_mhz": 100, "z_source": "50", '
+                               '"z_load": [10, -25], "q_max": "5"}') == ('Pi', 1e8, 50, 10 - 25j, 5.0)
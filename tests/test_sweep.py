@@ -0,0 +1,13 @@
+import numpy as np
+
+from frequency_response import solve_batch, verification_stats
+from sweep import run_sweep
+
+def test_chunk_totals_exclude_parent_counters():
+    # Forked workers inherit these process-wide counters
+    solve_batch('L', 100e6, 50.0, np.linspace(10, 200, 1000) - 25j)
+    assert verification_stats().checked > 0
+
+    with run_sweep('L', [100e6], [50.0], [10 - 25j], workers=1, progress=False) as result:
+        assert result.verification.checked == np.count_nonzero(result.valid)
+        assert result.verification.failed == 0
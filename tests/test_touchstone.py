@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+import pytest
+
+from touchstone import iter_touchstone
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+def _read(name, **kwargs):
+    chunks = list(iter_touchstone(os.path.join(DATA, name), **kwargs))
+    return np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks])
+
+def test_two_port_data_order_12_21():
+    freq_hz, s = _read('order_12_21.s2p')
+    np.testing.assert_allclose(freq_hz, [100e6, 200e6])
+    # Rows are S11 S12 S21 S22 in the file; [Noise Data] is skipped
+    np.testing.assert_allclose(s[:, 0, 1], [0.2, 0.6])
+    np.testing.assert_allclose(s[:, 1, 0], [0.3, 0.7])
+
+def test_v1_noise_block_is_skipped():
+    for chunk_points in (1, 2, 65536):
+        freq_hz, s = _read('noise_v1.s2p', chunk_points=chunk_points)
+        np.testing.assert_allclose(freq_hz, [1e9, 2e9, 3e9])
+        # 1.x order is S11 S21 S12 S22
+        np.testing.assert_allclose(s[:, 1, 0], [0.3, 0.7, 0.9])
+        np.testing.assert_allclose(s[:, 0, 1], [0.2, 0.6, 0.9])
+
+def test_unknown_data_order_is_rejected(tmp_path):
+    path = tmp_path / 'bad.s2p'
+    path.write_text("[Version] 2.0\n# GHz S RI R 50\n[Two-Port Data Order] 11_22\n1 0 0 0 0 0 0 0 0\n")
+    with pytest.raises(ValueError, match='Two-Port Data Order'):
+        list(iter_touchstone(str(path)))
@@ -0,0 +1,119 @@
+import numpy as np
+
+from frequency_response import design_point_response
+
+# --- Monte Carlo Tolerance and Yield Analysis ---
+# Every component value is scaled by (1 + delta), with delta drawn uniformly
+# in +-tolerance (or normally with sigma = tolerance / 3). An inductor's
+# reactance scales with its value and a capacitor's with its inverse. All
+# samples of all solutions are evaluated in one batched ABCD pass per chunk.
+# A chunk holds about chunk_size (sample, design) pairs, i.e.
+# chunk_size // designs samples, and only running sums are kept between
+# chunks, so memory is bounded by chunk_size and not by the sample or design
+# count.
+
+DISTRIBUTIONS = ('uniform', 'gaussian')
+
+def _unit_deltas(rng, distribution, size):
+    """Relative deviations for a tolerance of 1 (uniform in +-1, or normal with sigma 1/3)."""
+    if distribution == 'uniform':
+        return rng.uniform(-1.0, 1.0, size)
+    if distribution == 'gaussian':
+        return rng.standard_normal(size) / 3
+    raise ValueError(f"Unknown distribution '{distribution}'. Use one of {DISTRIBUTIONS}.")
+
+def monte_carlo_yield(topology, solutions, frequency_hz, z_source, z_load, tolerance=0.05,
+                      capacitor_tolerance=None, samples=100000, spec_rl_db=10.0,
+                      distribution='uniform', seed=0, chunk_size=65536):
+    """
+    (BATCH) Tolerance analysis of every solve_*_batch solution at its design frequency.
+    `tolerance` is the relative part tolerance (0.05 = +-5 %); `capacitor_tolerance`
+    overrides it for capacitors. chunk_size is the number of (sample, design)
+    pairs evaluated at once (at least one sample per chunk). Results are
+    identical for a given seed whatever the chunk size. Returns a dict of
+    arrays shaped (..., 4):
+      'yield'                 fraction of samples with return loss >= spec_rl_db
+      'worst_vswr'            largest VSWR seen
+      'worst_return_loss_db'  smallest return loss seen
+      'sensitivity'           (..., 4, k) |delta Gamma| per +1 % change of each
+                              solution column, from a least-squares fit
+    """
+    solutions = np.asarray(solutions, dtype=float)
+    domain = 'B' if topology == 'Pi' else 'X'
+    if capacitor_tolerance is None:
+        capacitor_tolerance = tolerance
+    rng = np.random.default_rng(seed)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        X = solutions if domain == 'X' else -1 / solutions
+    inductive = X > 0
+    element_tol = np.where(inductive, tolerance, capacitor_tolerance)
+
+    passed = np.zeros(solutions.shape[:-1])
+    worst_gamma = np.zeros(solutions.shape[:-1])
+    sum_d = np.zeros(solutions.shape)
+    sum_dd = np.zeros(solutions.shape)
+    sum_g = np.zeros(solutions.shape[:-1], dtype=complex)
+    sum_dg = np.zeros(solutions.shape, dtype=complex)
+    spec_gamma = 10 ** (-spec_rl_db / 20)
+
+    chunk_samples = max(1, chunk_size // max(int(np.prod(solutions.shape[:-2])), 1))
+    done = 0
+    while done < samples:
+        n = min(chunk_samples, samples - done)
+        delta = _unit_deltas(rng, distribution, (n,) + solutions.shape) * element_tol
+        with np.errstate(divide='ignore', invalid='ignore'):
+            X_pert = np.where(inductive, X * (1 + delta), X / (1 + delta))
+            perturbed = X_pert if domain == 'X' else -1 / X_pert
+        gamma = design_point_response(topology, perturbed, z_source, z_load)['gamma']
+        mag = np.abs(gamma)
+
+        passed += (mag <= spec_gamma).sum(axis=0)
+        worst_gamma = np.fmax(worst_gamma, mag.max(axis=0))
+        sum_d += delta.sum(axis=0)
+        sum_dd += (delta ** 2).sum(axis=0)
+        sum_g += gamma.sum(axis=0)
+        sum_dg += (delta * gamma[..., None]).sum(axis=0)
+        done += n
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_d = sum_d / samples
+        var_d = sum_dd / samples - mean_d ** 2
+        cov_dg = sum_dg / samples - mean_d * (sum_g / samples)[..., None]
+        sensitivity = np.abs(cov_dg / var_d) * 0.01
+        worst_gamma = np.minimum(worst_gamma, 1.0)
+        worst_vswr = (1 + worst_gamma) / (1 - worst_gamma)
+        worst_rl = -20 * np.log10(worst_gamma)
+
+    invalid = np.isnan(solutions).any(axis=-1)
+    return {
+        'yield': np.where(invalid, np.nan, passed / samples),
+        'worst_vswr': np.where(invalid, np.nan, worst_vswr),
+        'worst_return_loss_db': np.where(invalid, np.nan, worst_rl),
+        'sensitivity': np.where(invalid[..., None], np.nan, sensitivity),
+    }
+
+def print_yield_report(topology, frequency_hz, z_source, z_load, q_max=None, tolerance=0.05,
+                       samples=100000, spec_rl_db=10.0, seed=0):
+    """Prints yield, worst case and per-component sensitivity for every valid solution of one design."""
+    from frequency_response import LAYOUTS, solve_batch
+    from results import layout_for
+
+    solutions, valid, _ = solve_batch(topology, frequency_hz, z_source, z_load, q_max)
+    report = monte_carlo_yield(topology, solutions, frequency_hz, z_source, z_load, tolerance,
+                               samples=samples, spec_rl_db=spec_rl_db, seed=seed)
+
+    print("\n-------------------------------------------")
+    print(f" Monte Carlo Yield ({topology}-Section, ±{tolerance * 100:g} % parts, "
+          f"{samples:,} samples, seed {seed})")
+    print(f" Spec: return loss >= {spec_rl_db:g} dB")
+    print("-------------------------------------------")
+    # Same numbering as print_bandwidth_report
+    for sol_num, k in enumerate(np.flatnonzero(valid), start=1):
+        if topology == 'L':
+            sol_num = k + 1
+        columns = [column for _, _, column in LAYOUTS[layout_for(topology, k)]]
+        sensitivity = ", ".join(f"{report['sensitivity'][k, c]:.4f}" for c in columns)
+        print(f"  Solution {sol_num}: yield {report['yield'][k] * 100:.2f} %, "
+              f"worst VSWR {report['worst_vswr'][k]:.3f}, "
+              f"|dGamma| per +1 % (source -> load): {sensitivity}")
@@ -0,0 +1,138 @@
+import numpy as np
+
+from frequency_response import solve_batch
+
+# --- Touchstone (.s1p/.s2p) Reader ---
+# Data lines are streamed through generators and converted to NumPy arrays a
+# chunk at a time, so memory stays bounded however long the sweep file is.
+# Noise parameters are skipped: 1.x files append them after the S-parameters
+# (detected by the frequency stepping back down), 2.0 files after [Noise Data].
+
+FREQ_UNITS = {'HZ': 1.0, 'KHZ': 1e3, 'MHZ': 1e6, 'GHZ': 1e9}
+DATA_FORMATS = ('RI', 'MA', 'DB')
+TWO_PORT_ORDERS = ('21_12', '12_21')
+
+def parse_option_line(line):
+    """Parses a '# <unit> <parameter> <format> R <ref>' line into a dict."""
+    options = {'freq_scale': 1e9, 'parameter': 'S', 'format': 'MA', 'z_ref': 50.0}
+    tokens = line.lstrip('#').upper().split()
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in FREQ_UNITS:
+            options['freq_scale'] = FREQ_UNITS[token]
+        elif token in DATA_FORMATS:
+            options['format'] = token
+        elif token == 'R' and i + 1 < len(tokens):
+            options['z_ref'] = float(tokens[i + 1])
+            i += 1
+        elif token in ('S', 'Y', 'Z', 'H', 'G'):
+            options['parameter'] = token
+        i += 1
+    if options['parameter'] != 'S':
+        raise ValueError(f"Only S-parameter Touchstone files are supported (got '{options['parameter']}').")
+    return options
+
+def _iter_lines(file_obj, options):
+    """
+    (GENERATOR) Yields network data lines with comments stripped; updates
+    `options` from the header and stops at a 2.0 [Noise Data] or [End].
+    """
+    for raw in file_obj:
+        line = raw.split('!', 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            options.update(parse_option_line(line))
+        elif line.startswith('['):
+            # Touchstone 2.0 keywords; the rest only describe the file
+            keyword, _, rest = line.partition(']')
+            keyword, value = keyword[1:].strip().upper(), rest.split()
+            if keyword in ('NOISE DATA', 'END'):
+                return
+            if keyword == 'REFERENCE' and value:
+                options['z_ref'] = float(value[0])
+            elif keyword == 'TWO-PORT DATA ORDER':
+                if not value or value[0] not in TWO_PORT_ORDERS:
+                    raise ValueError(f"Unknown [Two-Port Data Order] {rest.strip()!r}; "
+                                     f"use one of {TWO_PORT_ORDERS}.")
+                options['two_port_order'] = value[0]
+            elif keyword == 'MATRIX FORMAT' and value and value[0].upper() != 'FULL':
+                raise ValueError(f"Only [Matrix Format] Full is supported (got '{value[0]}').")
+        else:
+            yield line
+
+def _to_complex(a, b, data_format):
+    """Converts a (a, b) column pair in RI/MA/DB format into complex values."""
+    if data_format == 'RI':
+        return a + 1j * b
+    magnitude = a if data_format == 'MA' else 10 ** (a / 20)
+    return magnitude * np.exp(1j * np.deg2rad(b))
+
+def iter_touchstone(path, n_ports=None, chunk_points=65536):
+    """
+    (GENERATOR) Streams a .s1p/.s2p file in chunks of at most `chunk_points`
+    frequency points. Yields (freq_hz, s_params, z_ref), with s_params of shape
+    (n, n_ports, n_ports) and s_params[:, i, j] = S_(i+1)(j+1). 2-port data
+    is read in the file's [Two-Port Data Order] (1.x files: 21_12).
+    """
+    if n_ports is None:
+        n_ports = 2 if str(path).lower().endswith('.s2p') else 1
+    if n_ports not in (1, 2):
+        raise ValueError("Only 1-port and 2-port Touchstone files are supported.")
+    values_per_point = 1 + 2 * n_ports**2
+    chunk_values = values_per_point * chunk_points
+
+    options = {'freq_scale': 1e9, 'parameter': 'S', 'format': 'MA', 'z_ref': 50.0, 'two_port_order': '21_12'}
+
+    def flush(tokens):
+        data = np.array(tokens, dtype=float).reshape(-1, values_per_point)
+        freq_hz = data[:, 0] * options['freq_scale']
+        s = _to_complex(data[:, 1::2], data[:, 2::2], options['format'])
+        s = s.reshape(-1, n_ports, n_ports)
+        if n_ports == 2 and options['two_port_order'] == '21_12':
+            # Stored as S11 S21 S12 S22 (the only order in Touchstone 1.x)
+            s = s.transpose(0, 2, 1)
+        return freq_hz, s, options['z_ref']
+
+    with open(path, 'r') as f:
+        tokens = []
+        last_freq = None
+        for line in _iter_lines(f, options):
+            values = line.split()
+            if len(tokens) % values_per_point == 0:
+                # A point starts on this line; frequencies only increase until
+                # a 1.x noise parameter block begins
+                freq = float(values[0])
+                if last_freq is not None and freq <= last_freq:
+                    break
+                last_freq = freq
+            tokens.extend(values)
+            if len(tokens) >= chunk_values:
+                yield flush(tokens[:chunk_values])
+                tokens = tokens[chunk_values:]
+        if len(tokens) % values_per_point:
+            raise ValueError(f"Truncated Touchstone data in {path}: "
+                             f"{len(tokens) % values_per_point} stray values at the end.")
+        if tokens:
+            yield flush(tokens)
+
+def s_to_impedance(s_ii, z_ref):
+    """Converts a reflection coefficient into the impedance it represents."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return z_ref * (1 + s_ii) / (1 - s_ii)
+
+def iter_touchstone_loads(path, port=1, n_ports=None, chunk_points=65536):
+    """(GENERATOR) Yields (freq_hz, z_load) chunks from the S_pp reflection of a Touchstone file."""
+    for freq_hz, s, z_ref in iter_touchstone(path, n_ports, chunk_points):
+        yield freq_hz, s_to_impedance(s[:, port - 1, port - 1], z_ref)
+
+def match_touchstone(path, topology, z_source, q_max=None, port=1, n_ports=None, chunk_points=65536):
+    """
+    (GENERATOR) Matches every measured frequency point to `z_source`.
+    Yields (freq_hz, z_load, solutions, valid) chunks from the batch solvers,
+    one matching network per frequency point.
+    """
+    for freq_hz, z_load in iter_touchstone_loads(path, port, n_ports, chunk_points):
+        solutions, valid, _ = solve_batch(topology, freq_hz, z_source, z_load, q_max)
+        yield freq_hz, z_load, solutions, valid